@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+准入控制与基于成本的背压
+
+检查的耗时大致与 (字符数、句子数) × max_align 成正比。单个超大请求会长时间占满
+CPU，使其他用户的请求全部排队。本模块：
+- estimate_cost(): 在分句之前，用字符数和粗略句子数估算请求成本和预计耗时
+- AdmissionController: 限制同时运行的检查数、在途总成本和排队长度；
+  超出时抛出 AdmissionRejected（接口返回 429 + Retry-After）
+- 每次请求结束后记录预计耗时与实际耗时，并据此在线校准每单位成本的耗时
+"""
+
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+# 粗略的句子边界（只用于估算，不替代真正的分句）
+_SENTENCE_END = re.compile(r'[.!?。！？；;\n]+')
+
+# 多少个字符折算为一个成本单位（与一个句子相当）
+CHARS_PER_UNIT = 100.0
+
+
+class AdmissionRejected(Exception):
+    """请求未被准入"""
+
+    def __init__(self, message, retry_after, status=429, reason='queue_full'):
+        """
+        参数:
+            message: 错误信息
+            retry_after: 建议的重试等待秒数
+            status: HTTP 状态码（429 表示稍后重试，413 表示请求本身超出上限）
+            reason: 拒绝原因（too_large / queue_full / queue_timeout），用于监控指标的标签
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+        self.reason = reason
+
+
+def count_sentences(text):
+    """粗略统计句子数（按句末标点和换行）"""
+    if not text:
+        return 0
+    return max(1, len([s for s in _SENTENCE_END.split(text) if s.strip()]))
+
+
+def estimate_cost(source_text, target_text, max_align):
+    """
+    估算一次检查的成本
+
+    参数:
+        source_text: 原文
+        target_text: 译文
+        max_align: 最大对齐数（编码窗口数和 DP 对齐类型数都随之增长）
+
+    返回:
+        dict: {'chars', 'sentences', 'units'}
+    """
+    chars = len(source_text) + len(target_text)
+    sentences = count_sentences(source_text) + count_sentences(target_text)
+    units = (chars / CHARS_PER_UNIT + sentences) * max(1, max_align)
+    return {'chars': chars, 'sentences': sentences, 'units': units}
+
+
+def estimate_batch_cost(pairs, max_align):
+    """
+    估算批量检查的成本（各文档对成本之和）
+
+    参数:
+        pairs: [(source_text, target_text), ...]
+        max_align: 最大对齐数
+
+    返回:
+        dict: {'chars', 'sentences', 'units'}
+    """
+    costs = [estimate_cost(source_text, target_text, max_align) for source_text, target_text in pairs]
+    return {key: sum(cost[key] for cost in costs) for key in ('chars', 'sentences', 'units')}
+
+
+class _Ticket:
+    """一个已准入（或正在排队）的请求"""
+
+    __slots__ = ('cost', 'estimated_seconds', 'started_at', 'label')
+
+    def __init__(self, cost, estimated_seconds, label):
+        self.cost = cost
+        self.estimated_seconds = estimated_seconds
+        self.started_at = None
+        self.label = label
+
+
+class AdmissionController:
+    """
+    准入控制器
+
+    用法:
+        controller = AdmissionController(max_concurrent=2, max_queue=8)
+        cost = estimate_cost(source_text, target_text, options.max_align)
+        with controller.admit(cost, label='/api/check'):
+            ...  # 执行检查
+    """
+
+    def __init__(self, max_concurrent=2, max_queue=8, max_inflight_units=0.0,
+                 max_request_units=0.0, queue_timeout=30.0, seconds_per_unit=0.002):
+        """
+        初始化准入控制器
+
+        参数:
+            max_concurrent: 同时运行的检查数
+            max_queue: 允许排队等待的请求数，超过时立即拒绝
+            max_inflight_units: 在途请求的总成本上限（0 表示不限制）
+            max_request_units: 单个请求的成本上限（0 表示不限制），超过时返回 413
+            queue_timeout: 排队的最长等待秒数，超时后拒绝
+            seconds_per_unit: 每单位成本的初始预计耗时（运行中根据实际耗时校准）
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.max_inflight_units = max_inflight_units
+        self.max_request_units = max_request_units
+        self.queue_timeout = queue_timeout
+        self.seconds_per_unit = seconds_per_unit
+
+        self._cond = threading.Condition()
+        self._running = []
+        self._waiting = 0
+        self.stats = {
+            'admitted': 0,
+            'rejected': 0,
+            'completed': 0,
+            'abs_error_seconds': 0.0,
+            'abs_error_ratio': 0.0,
+        }
+
+    def estimate_seconds(self, cost):
+        """按当前校准值估算耗时（秒）"""
+        return cost['units'] * self.seconds_per_unit
+
+    def acquire(self, cost, label='', block=False):
+        """
+        申请运行槽位
+
+        参数:
+            cost: estimate_cost() 的返回值
+            label: 日志中显示的请求名称
+            block: True 时一直等待（用于已排队的后台任务），不受单请求成本上限、排队上限和超时限制
+
+        返回:
+            ticket: 传给 release() 的凭据
+
+        异常:
+            AdmissionRejected: 请求超出上限或等待超时
+        """
+        units = cost['units']
+        if not block and self.max_request_units and units > self.max_request_units:
+            with self._cond:
+                self.stats['rejected'] += 1
+            raise AdmissionRejected(
+                f"请求过大（估算成本 {units:.0f}，上限 {self.max_request_units:.0f}），"
+                f"请改用异步任务接口 /api/jobs 或减小 max_align", retry_after=0, status=413,
+                reason='too_large')
+
+        ticket = _Ticket(units, self.estimate_seconds(cost), label)
+        with self._cond:
+            if not block and not self._can_run(units) and self._waiting >= self.max_queue:
+                self.stats['rejected'] += 1
+                raise AdmissionRejected("服务器繁忙，请稍后重试", retry_after=self._retry_after(),
+                                        reason='queue_full')
+
+            self._waiting += 1
+            try:
+                deadline = None if block else time.monotonic() + self.queue_timeout
+                while not self._can_run(units):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self.stats['rejected'] += 1
+                        raise AdmissionRejected("服务器繁忙，排队超时，请稍后重试",
+                                                retry_after=self._retry_after(),
+                                                reason='queue_timeout')
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            ticket.started_at = time.monotonic()
+            self._running.append(ticket)
+            self.stats['admitted'] += 1
+        return ticket
+
+    def release(self, ticket):
+        """
+        释放槽位，并记录预计耗时与实际耗时
+
+        参数:
+            ticket: acquire() 返回的凭据
+        """
+        actual = time.monotonic() - ticket.started_at
+        with self._cond:
+            self._running.remove(ticket)
+            self._cond.notify_all()
+
+            error = actual - ticket.estimated_seconds
+            ratio = abs(error) / actual if actual > 0 else 0.0
+            self.stats['completed'] += 1
+            self.stats['abs_error_seconds'] += abs(error)
+            self.stats['abs_error_ratio'] += ratio
+            # 指数滑动平均校准每单位成本的耗时
+            if ticket.cost > 0 and actual > 0:
+                self.seconds_per_unit = 0.8 * self.seconds_per_unit + 0.2 * (actual / ticket.cost)
+
+        print(f"  成本估计 {ticket.label}: 成本 {ticket.cost:.0f}, "
+              f"预计 {ticket.estimated_seconds:.2f}s, 实际 {actual:.2f}s "
+              f"(误差 {error:+.2f}s, {ratio:.0%})")
+
+    @contextmanager
+    def admit(self, cost, label='', block=False):
+        """acquire()/release() 的上下文管理器形式"""
+        ticket = self.acquire(cost, label, block)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def get_stats(self):
+        """
+        获取准入统计
+
+        返回:
+            dict: 运行数、排队数、在途成本、准入/拒绝/完成数、平均估算误差、当前校准值
+        """
+        with self._cond:
+            stats = dict(self.stats)
+            stats['running'] = len(self._running)
+            stats['waiting'] = self._waiting
+            stats['inflight_units'] = sum(t.cost for t in self._running)
+            stats['seconds_per_unit'] = self.seconds_per_unit
+        completed = stats['completed']
+        stats['mean_abs_error_seconds'] = stats.pop('abs_error_seconds') / completed if completed else 0.0
+        stats['mean_abs_error_ratio'] = stats.pop('abs_error_ratio') / completed if completed else 0.0
+        return stats
+
+    def _can_run(self, units):
+        """当前是否可以开始运行（调用方持有锁）"""
+        if len(self._running) >= self.max_concurrent:
+            return False
+        if self.max_inflight_units and self._running:
+            # 在途成本超限时排队；没有在途请求时总是放行，避免大请求永远无法运行
+            inflight = sum(t.cost for t in self._running)
+            if inflight + units > self.max_inflight_units:
+                return False
+        return True
+
+    def _retry_after(self):
+        """估算最早有槽位释放的秒数（调用方持有锁）"""
+        if not self._running:
+            return 1
+        now = time.monotonic()
+        remaining = min(t.estimated_seconds - (now - t.started_at) for t in self._running)
+        return max(1, int(math.ceil(remaining)))
+
@@ -4,55 +4,876 @@
 翻译质量检查工具 - Web服务器
 """
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS
+import atexit
+import json
 import os
+import queue
 import sys
+import threading
+import time
 from model_config import setup_hanlp_env
 
 # 设置 HanLP 环境变量（优先使用本地模型）
 setup_hanlp_env()
 
-from translation_qa_tool import TranslationQA
+from translation_qa_tool import TranslationQA, CheckOptions, WORD_ALIGNMENT_SCOPES, route_bertalign_encoder
 from word_aligner import WordAligner
+from word_vector_cache import WordVectorCache
+from sentence_cache import SentenceCache
+from labse_onnx_encoder import LaBSEOnnxEncoder
+from encoder_dispatcher import EncoderDispatcher
+from prefork import register_post_fork
+from job_manager import JobManager, JobQueueFull
+from admission import AdmissionController, AdmissionRejected, estimate_batch_cost, estimate_cost
+from metrics import REGISTRY, exponential_buckets
+from result_cache import ResultCache, make_key, normalize_text
+from response_format import (FORMAT_COMPACT, FORMAT_JSON, MIMETYPES, compress, dumps_json,
+                             negotiate_encoding, negotiate_format, serialize)
 
 app = Flask(__name__)
 CORS(app)  # 允许跨域请求
 
-# 全局QA工具实例（复用以提高性能）
+# ONNX Runtime 算子内线程数（0 表示默认；多进程预加载部署时由 gunicorn.conf.py 设为 1）
+ORT_THREADS = int(os.environ.get('TQA_ORT_THREADS', '0'))
+# 预加载部署中 worker 的 ONNX Runtime 线程数：默认 1，各 worker 共用主进程中单线程的会话（权重写时复制共享）；
+# 大于 1 时每个 worker 在 fork 之后以该线程数重建会话（每个 worker 各自重新加载一份 LaBSE 权重）
+WORKER_ORT_THREADS = int(os.environ.get('TQA_WORKER_ORT_THREADS', '1'))
+
+# 跨请求编码微批处理：等待时间（毫秒，0 表示关闭）和单次推理的 token 预算
+ENCODER_BATCH_WAIT_MS = float(os.environ.get('TQA_ENCODER_BATCH_WAIT_MS', '5'))
+ENCODER_BATCH_TOKENS = int(os.environ.get('TQA_ENCODER_BATCH_TOKENS', '16384'))
+
+# 本地编码服务的 Unix socket（设置后不在本进程加载 LaBSE，由 encoder_server.py 统一推理和批处理）
+ENCODER_SOCKET = os.environ.get('TQA_ENCODER_SOCKET', '')
+
+# 异步检查任务：工作线程数、结果保留时间（秒）和最大排队数
+JOB_WORKERS = int(os.environ.get('TQA_JOB_WORKERS', '2'))
+JOB_TTL_SECONDS = float(os.environ.get('TQA_JOB_TTL_SECONDS', '3600'))
+JOB_MAX_PENDING = int(os.environ.get('TQA_JOB_MAX_PENDING', '16'))
+# 多进程部署时各 worker 共享的任务目录（gunicorn.conf.py 在多个 worker 时自动设置），为空时任务只保存在本进程
+JOB_DIR = os.environ.get('TQA_JOB_DIR', '')
+
+# 启动预热：是否启用（0 表示首个请求时再加载）和需要预加载模型的语言
+WARMUP_ENABLED = os.environ.get('TQA_WARMUP', '1') != '0'
+WARMUP_LANGUAGES = [lang.strip() for lang in os.environ.get('TQA_WARMUP_LANGUAGES', 'en,zh').split(',')
+                    if lang.strip()]
+
+# 预加载语言的分句模型缺失时：fallback 使用规则分句并照常就绪；fail 使预热失败（/api/ready 保持 503，
+# 预加载模式下主进程直接退出）。运行时不会下载模型
+MISSING_MODEL_POLICIES = ('fallback', 'fail')
+MISSING_MODEL_POLICY = os.environ.get('TQA_MISSING_MODEL_POLICY', 'fallback').strip().lower()
+if MISSING_MODEL_POLICY not in MISSING_MODEL_POLICIES:
+    raise ValueError(f"TQA_MISSING_MODEL_POLICY 必须是 {'、'.join(MISSING_MODEL_POLICIES)} 之一，"
+                     f"实际为 {MISSING_MODEL_POLICY!r}")
+
+# 预热用的示例句子（未列出的语言使用英文示例）
+WARMUP_SAMPLES = {
+    'en': "The engineer repaired the old bridge yesterday. The committee approved the annual report.",
+    'zh': "工程师昨天修好了那座旧桥。委员会批准了年度报告。",
+}
+
+# 准入控制：同时运行的检查数、排队上限、排队超时（秒）、在途总成本上限和单请求成本上限（0 表示不限制）
+MAX_CONCURRENT_CHECKS = int(os.environ.get('TQA_MAX_CONCURRENT_CHECKS', '2'))
+MAX_QUEUED_CHECKS = int(os.environ.get('TQA_MAX_QUEUED_CHECKS', '8'))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get('TQA_QUEUE_TIMEOUT_SECONDS', '30'))
+MAX_INFLIGHT_COST = float(os.environ.get('TQA_MAX_INFLIGHT_COST', '0'))
+MAX_REQUEST_COST = float(os.environ.get('TQA_MAX_REQUEST_COST', '0'))
+
+# /api/check-batch：单次请求最多的文档对数和并行对齐的线程数
+BATCH_MAX_PAIRS = int(os.environ.get('TQA_BATCH_MAX_PAIRS', '100'))
+BATCH_WORKERS = int(os.environ.get('TQA_BATCH_WORKERS', '4'))
+
+# /api/word-align 按句对缓存的结果数（0 表示关闭）
+WORD_ALIGN_CACHE_ENTRIES = int(os.environ.get('TQA_WORD_ALIGN_CACHE_ENTRIES', '256'))
+
+# 逐词编码的词向量缓存：最多缓存的词数（0 表示关闭）和持久化文件（.npz，为空时不持久化）
+WORD_VECTOR_CACHE_ENTRIES = int(os.environ.get('TQA_WORD_VECTOR_CACHE_ENTRIES', '50000'))
+WORD_VECTOR_CACHE_PATH = os.environ.get('TQA_WORD_VECTOR_CACHE_PATH', '')
+
+# spaCy 分句方式（full / senter / sentencizer）和按语言的覆盖（如 "ja=full,ko=sentencizer"）
+SPLIT_SEGMENTER = os.environ.get('TQA_SPLIT_SEGMENTER', 'senter')
+SPLIT_LANGUAGE_SEGMENTERS = {
+    language.strip(): segmenter.strip()
+    for language, segmenter in (item.split('=', 1) for item in
+                                os.environ.get('TQA_SPLIT_LANGUAGE_SEGMENTERS', '').split(',') if '=' in item)
+}
+
+# 超长分句单元分块分句：块大小（字符）和进程数
+SPLIT_CHUNK_CHARS = int(os.environ.get('TQA_SPLIT_CHUNK_CHARS', '100000'))
+SPLIT_PROCESSES = int(os.environ.get('TQA_SPLIT_PROCESSES', '1'))
+
+# 分句结果缓存最多缓存的分句单元数（0 表示关闭）
+SPLIT_CACHE_ENTRIES = int(os.environ.get('TQA_SPLIT_CACHE_ENTRIES', '20000'))
+
+# 词对齐的中文分词方式（hanlp / jieba / rule）和 jieba 用户词典
+ZH_TOKENIZER = os.environ.get('TQA_ZH_TOKENIZER', 'hanlp')
+ZH_USER_DICT = os.environ.get('TQA_ZH_USER_DICT', '')
+
+# 词对齐的词向量模式（contextual: 每句一次前向计算；static: 逐词编码）和匹配算法（itermax / argmax）
+WORD_ALIGN_MODE = os.environ.get('TQA_WORD_ALIGN_MODE', 'contextual')
+WORD_ALIGN_MATCHING = os.environ.get('TQA_WORD_ALIGN_MATCHING', 'itermax')
+
+# /api/check 结果缓存：最多条目数（0 表示关闭）、总大小（MB）和存活时间（秒）
+RESULT_CACHE_ENTRIES = int(os.environ.get('TQA_RESULT_CACHE_ENTRIES', '256'))
+RESULT_CACHE_MB = float(os.environ.get('TQA_RESULT_CACHE_MB', '256'))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get('TQA_RESULT_CACHE_TTL_SECONDS', '3600'))
+
+# 全局QA工具实例（复用以提高性能，在所有请求线程间共享）
+# 注意：不要在请求中修改其属性，单次检查的参数通过 CheckOptions 传入
 qa_tool = None
 word_aligner = None
+shared_encoder = None
+job_manager = None
+_server_fingerprint = None  # 服务端配置指纹（结果缓存键和 ETag 的一部分）
+_init_lock = threading.RLock()
+
+# 预热状态（/api/ready）
+warmup_state = {'status': 'pending', 'ready': False, 'seconds': None, 'languages': {}, 'error': None}
+
+# 所有检查（同步、流式、异步任务）共用一个准入控制器
+admission = AdmissionController(max_concurrent=MAX_CONCURRENT_CHECKS,
+                                max_queue=MAX_QUEUED_CHECKS,
+                                max_inflight_units=MAX_INFLIGHT_COST,
+                                max_request_units=MAX_REQUEST_COST,
+                                queue_timeout=QUEUE_TIMEOUT_SECONDS)
+
+# 相同输入和参数的检查结果（已序列化的响应体）
+result_cache = ResultCache(max_entries=RESULT_CACHE_ENTRIES,
+                           max_bytes=int(RESULT_CACHE_MB * 1024 * 1024),
+                           ttl_seconds=RESULT_CACHE_TTL_SECONDS)
+
+# 按分句单元缓存的分句结果（未改动的单元在重新提交时不再分句）
+sentence_cache = SentenceCache(max_entries=SPLIT_CACHE_ENTRIES)
+
+# Prometheus 指标（/metrics）
+HTTP_LATENCY = REGISTRY.histogram('tqa_http_request_duration_seconds', 'HTTP 请求耗时（秒，流式接口计到最后一个事件输出完毕）',
+                                  ['endpoint', 'method', 'status'])
+HTTP_IN_FLIGHT = REGISTRY.gauge('tqa_http_requests_in_flight', '正在处理的 HTTP 请求数')
+STAGE_LATENCY = REGISTRY.histogram('tqa_stage_duration_seconds', '检查流水线各阶段耗时（秒）', ['stage'])
+CHECK_SENTENCES = REGISTRY.histogram('tqa_check_sentences', '每次检查的句子数（源+目标）',
+                                     buckets=exponential_buckets(10, 4, 9))
+DP_CELLS = REGISTRY.histogram('tqa_dp_cells', '每次对齐的 DP 单元数', ['stage'],
+                              buckets=exponential_buckets(1000, 4, 12))
+ENCODER_BATCH_SENTENCES = REGISTRY.histogram('tqa_encoder_batch_sentences', '每次 ONNX 推理的句子数',
+                                             buckets=exponential_buckets(1, 2, 11))
+ENCODER_BATCH_TOKENS_HIST = REGISTRY.histogram('tqa_encoder_batch_tokens', '每次 ONNX 推理的填充后 token 数',
+                                               buckets=exponential_buckets(64, 2, 10))
+ENCODER_TOKENS = REGISTRY.counter('tqa_encoder_tokens_total', '编码的有效 token 数')
+ENCODER_PADDED_TOKENS = REGISTRY.counter('tqa_encoder_padded_tokens_total', '编码的填充后 token 数')
+ENCODER_SECONDS = REGISTRY.counter('tqa_encoder_inference_seconds_total', 'ONNX 推理累计耗时（秒）')
+ENCODER_TOKENS_PER_SECOND = REGISTRY.gauge('tqa_encoder_tokens_per_second', '编码吞吐（有效 token / 推理秒，累计平均）')
+QUEUE_DEPTH = REGISTRY.gauge('tqa_queue_depth', '队列长度', ['queue'])
+CHECKS_IN_FLIGHT = REGISTRY.gauge('tqa_checks_in_flight', '正在运行的检查数')
+ADMISSION_REJECTED = REGISTRY.counter('tqa_admission_rejected_total', '被准入控制拒绝的请求数',
+                                      ['endpoint', 'reason'])
+JOBS = REGISTRY.gauge('tqa_jobs', '本地存储中的异步任务数', ['status'])
+
+
+def observe_encoder_batch(sentences, tokens, padded_tokens, seconds):
+    """EncoderDispatcher 每次推理后的回调：记录批大小和吞吐"""
+    ENCODER_BATCH_SENTENCES.observe(sentences)
+    ENCODER_BATCH_TOKENS_HIST.observe(padded_tokens)
+    ENCODER_TOKENS.inc(tokens)
+    ENCODER_PADDED_TOKENS.inc(padded_tokens)
+    ENCODER_SECONDS.inc(seconds)
+
+
+def observe_check(results):
+    """记录一次检查的各阶段耗时、句子数和 DP 单元数"""
+    performance = results['metadata']['performance']
+    for stage in performance['stages']:
+        STAGE_LATENCY.observe(stage['wall_ms'] / 1000.0, stage=stage['stage'])
+        if 'dp_cells' in stage['counts']:
+            DP_CELLS.observe(stage['counts']['dp_cells'], stage=stage['stage'])
+    CHECK_SENTENCES.observe(results['metadata']['source_sentences'] + results['metadata']['target_sentences'])
+
+
+def collect_runtime_metrics():
+    """抓取 /metrics 时更新队列深度、在途检查数等瞬时值"""
+    stats = admission.get_stats()
+    QUEUE_DEPTH.set(stats['waiting'], queue='admission')
+    CHECKS_IN_FLIGHT.set(stats['running'])
+    if isinstance(shared_encoder, EncoderDispatcher):
+        encoder_stats = shared_encoder.get_stats()
+        QUEUE_DEPTH.set(encoder_stats['queue_depth'], queue='encoder')
+        ENCODER_TOKENS_PER_SECOND.set(encoder_stats['tokens_per_second'])
+    elif shared_encoder is not None and shared_encoder.server_socket:
+        # 编码服务的批处理统计（所有 worker 共享同一个队列）
+        encoder_stats = shared_encoder.client.get_stats()
+        QUEUE_DEPTH.set(encoder_stats['queue_depth'], queue='encoder')
+        ENCODER_TOKENS_PER_SECOND.set(encoder_stats['tokens_per_second'])
+    if job_manager is not None:
+        job_stats = job_manager.get_stats()
+        QUEUE_DEPTH.set(job_stats['queued'], queue='jobs')
+        for status, count in job_stats.items():
+            JOBS.set(count, status=status)
+
+
+REGISTRY.register_collector(collect_runtime_metrics)
+REGISTRY.register_cache('check_results', result_cache.get_stats)
+REGISTRY.register_cache('sentences', sentence_cache.get_stats)
+
+
+def get_shared_encoder():
+    """获取或初始化共享的句子编码器（检查、词对齐和 Bertalign 共用一个 ONNX 会话）"""
+    global shared_encoder
+    if shared_encoder is not None:
+        return shared_encoder
+    with _init_lock:
+        if shared_encoder is None:
+            if ENCODER_SOCKET:
+                # 批处理在编码服务中完成，本进程不再包一层调度器
+                encoder = LaBSEOnnxEncoder(server_socket=ENCODER_SOCKET)
+            else:
+                encoder = LaBSEOnnxEncoder(intra_op_threads=ORT_THREADS or None)
+                if WORKER_ORT_THREADS > 1:
+                    # 预加载部署：主进程中的会话是单线程的，按需在 worker fork 之后以更多线程重建
+                    register_post_fork(lambda worker_threads: encoder.reset_session(WORKER_ORT_THREADS))
+            if ENCODER_BATCH_WAIT_MS > 0 and not ENCODER_SOCKET:
+                encoder = EncoderDispatcher(encoder,
+                                            max_wait_ms=ENCODER_BATCH_WAIT_MS,
+                                            max_batch_tokens=ENCODER_BATCH_TOKENS,
+                                            listener=observe_encoder_batch)
+                print(f"✓ 编码微批处理已启用 (等待 {ENCODER_BATCH_WAIT_MS} ms, "
+                      f"token 预算 {ENCODER_BATCH_TOKENS})")
+            route_bertalign_encoder(encoder)
+            shared_encoder = encoder
+    return shared_encoder
 
 
 def get_qa_tool():
     """获取或初始化QA工具实例"""
     global qa_tool
-    if qa_tool is None:
-        print("初始化翻译质量检查工具...")
-        qa_tool = TranslationQA(
-            similarity_threshold=0.7,
-            max_align=6,
-            top_k=5,
-            skip=-1.0,
-            win=10,
-            auto_detect_language=True,  # 启用自动语言检测（使用fastText）
-            force_split_threshold=0.3,  # 降低阈值（0.5 -> 0.3），避免误拆散
-            use_min_similarity=False    # 使用平均相似度（更宽松）
-        )
-        print("✓ 工具初始化完成")
+    if qa_tool is not None:
+        return qa_tool
+    with _init_lock:
+        if qa_tool is None:
+            print("初始化翻译质量检查工具...")
+            qa_tool = TranslationQA(
+                similarity_threshold=0.7,
+                max_align=6,
+                top_k=5,
+                skip=-1.0,
+                win=10,
+                auto_detect_language=True,  # 启用自动语言检测（使用fastText）
+                force_split_threshold=0.3,  # 降低阈值（0.5 -> 0.3），避免误拆散
+                use_min_similarity=False,   # 使用平均相似度（更宽松）
+                encoder=get_shared_encoder(),
+                word_aligner=get_word_aligner(),  # 与 /api/word-align 共用分词模型和缓存
+                sentence_segmenter=SPLIT_SEGMENTER,
+                language_segmenters=SPLIT_LANGUAGE_SEGMENTERS,
+                split_chunk_chars=SPLIT_CHUNK_CHARS,
+                split_processes=SPLIT_PROCESSES,
+                sentence_cache=sentence_cache
+            )
+            # 进程退出时关闭分块分句的进程池
+            atexit.register(qa_tool.text_splitter.close)
+            print("✓ 工具初始化完成")
     return qa_tool
 
 
+def server_fingerprint():
+    """服务端配置指纹（模型版本、分句和词对齐配置，见 TranslationQA.fingerprint），每个进程计算一次"""
+    global _server_fingerprint
+    if _server_fingerprint is None:
+        _server_fingerprint = get_qa_tool().fingerprint()
+    return _server_fingerprint
+
+
 def get_word_aligner():
     """获取或初始化词对齐器实例"""
     global word_aligner
-    if word_aligner is None:
-        print("初始化词对齐器...")
-        word_aligner = WordAligner()
-        print("✓ 词对齐器初始化完成")
+    if word_aligner is not None:
+        return word_aligner
+    with _init_lock:
+        if word_aligner is None:
+            print("初始化词对齐器...")
+            word_vectors = WordVectorCache(max_entries=WORD_VECTOR_CACHE_ENTRIES,
+                                           path=WORD_VECTOR_CACHE_PATH or None)
+            word_aligner = WordAligner(encoder=get_shared_encoder(), cache_size=WORD_ALIGN_CACHE_ENTRIES,
+                                       mode=WORD_ALIGN_MODE, matching=WORD_ALIGN_MATCHING,
+                                       word_vector_cache=word_vectors,
+                                       zh_tokenizer=ZH_TOKENIZER, zh_user_dict=ZH_USER_DICT or None)
+            REGISTRY.register_cache('word_alignments', word_aligner.cache.get_stats)
+            REGISTRY.register_cache('word_vectors', word_vectors.get_stats)
+            if WORD_VECTOR_CACHE_PATH:
+                # 进程退出时写回，下次启动时加载
+                atexit.register(save_word_vectors)
+            print("✓ 词对齐器初始化完成")
     return word_aligner
 
 
+def save_word_vectors():
+    """将词向量缓存写入 TQA_WORD_VECTOR_CACHE_PATH"""
+    if word_aligner is None:
+        return
+    try:
+        count = word_aligner.word_vectors.save()
+        if count:
+            print(f"✓ 词向量缓存已保存: {count} 个词 ({WORD_VECTOR_CACHE_PATH})")
+    except Exception as e:
+        print(f"⚠️  词向量缓存保存失败: {e}")
+
+
+def get_job_manager():
+    """获取或初始化异步任务管理器"""
+    global job_manager
+    if job_manager is not None:
+        return job_manager
+    with _init_lock:
+        if job_manager is None:
+            job_manager = JobManager(max_workers=JOB_WORKERS,
+                                     ttl_seconds=JOB_TTL_SECONDS,
+                                     max_pending=JOB_MAX_PENDING,
+                                     store_dir=JOB_DIR or None)
+    return job_manager
+
+
+def parse_check_request(data):
+    """
+    解析检查请求
+
+    参数:
+        data: 请求体 JSON
+
+    返回:
+        (source_text, target_text, options)
+
+    异常:
+        ValueError: 请求数据为空或原文/译文为空
+    """
+    if not data:
+        raise ValueError('请求数据为空')
+
+    # 规范化后的文本既用于检查也用于计算结果缓存键
+    source_text = normalize_text(data.get('source_text', ''))
+    target_text = normalize_text(data.get('target_text', ''))
+
+    if not source_text or not target_text:
+        raise ValueError('原文和译文不能为空')
+
+    return source_text, target_text, parse_check_options(data)
+
+
+def parse_check_options(data):
+    """
+    解析检查参数（/api/check 与 /api/check-batch 共用）
+
+    参数:
+        data: 请求体 JSON
+
+    返回:
+        CheckOptions
+
+    异常:
+        ValueError: word_alignments 不是 'none'、'flagged' 或 'all'
+    """
+    word_alignments = data.get('word_alignments', 'none')
+    if word_alignments not in WORD_ALIGNMENT_SCOPES:
+        raise ValueError(f"word_alignments 必须是 {'、'.join(WORD_ALIGNMENT_SCOPES)} 之一")
+
+    # 本次请求的参数（不修改共享的工具实例，避免并发请求互相覆盖）
+    return CheckOptions(
+        similarity_threshold=data.get('similarity_threshold', 0.7),
+        force_split_threshold=data.get('force_split_threshold', 0.5),
+        max_align=data.get('max_align', 5),
+        top_k=data.get('top_k', 3),
+        skip=data.get('skip', -1.0),
+        win=data.get('win', 5),
+        score_threshold=data.get('score_threshold', 0.0),
+        use_min_similarity=data.get('use_min_similarity', True),
+        auto_split_nm=data.get('auto_split_nm', True),  # 默认启用自动拆散
+        word_alignments=word_alignments  # 随结果预先计算词对齐的对齐组
+    )
+
+
+def parse_batch_request(data):
+    """
+    解析批量检查请求
+
+    参数:
+        data: 请求体 JSON，{"pairs": [{"id": ..., "source_text": ..., "target_text": ...}, ...], 其他参数同 /api/check}
+
+    返回:
+        (ids, pairs, options): ids 为各文档对的 id（未提供时为序号），pairs 为 [(原文, 译文), ...]
+
+    异常:
+        ValueError: 请求数据为空、文档对数量不合法或某个文档对的原文/译文为空
+    """
+    if not data:
+        raise ValueError('请求数据为空')
+
+    items = data.get('pairs')
+    if not isinstance(items, list) or not items:
+        raise ValueError('pairs 必须是非空列表')
+    if len(items) > BATCH_MAX_PAIRS:
+        raise ValueError(f'单次最多 {BATCH_MAX_PAIRS} 组文档对，实际为 {len(items)} 组')
+
+    ids, pairs = [], []
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise ValueError(f'第 {i + 1} 组文档对格式错误')
+        source_text = normalize_text(item.get('source_text', ''))
+        target_text = normalize_text(item.get('target_text', ''))
+        if not source_text or not target_text:
+            raise ValueError(f'第 {i + 1} 组文档对的原文和译文不能为空')
+        ids.append(item.get('id', i))
+        pairs.append((source_text, target_text))
+
+    return ids, pairs, parse_check_options(data)
+
+
+def run_check(source_text, target_text, options, progress=None, on_group=None, compact=False):
+    """
+    执行检查并生成接口返回的数据
+
+    参数:
+        source_text: 原文
+        target_text: 译文
+        options: CheckOptions
+        progress: 可选进度回调 progress(stage, percent)
+        on_group: 可选回调 on_group(item, issues)，对齐组最终确定后按源文本顺序调用
+        compact: 是否生成紧凑格式（见 build_compact_check_data）
+
+    返回:
+        dict: {'csv', 'summary', 'issues', 'force_split_count', 'performance'}
+    """
+    tool = get_qa_tool()
+
+    # 执行检查（使用 fastText 自动检测语言）
+    print(f"开始检查翻译...")
+    print(f"  使用 fastText 自动检测语言...")
+
+    results = tool.check_translation(
+        source_text=source_text,
+        target_text=target_text,
+        source_language='auto',  # 自动检测
+        target_language='auto',  # 自动检测
+        is_split=False,  # 让工具自动分句
+        options=options,
+        progress=progress,
+        on_group=on_group
+    )
+    observe_check(results)
+    if compact:
+        return build_compact_check_data(results, options.similarity_threshold)
+    return build_check_data(results, options.similarity_threshold)
+
+
+def omission_row(item):
+    """缺失问题对应的报告行"""
+    return {
+        'src_text': item['src_text'],
+        'tgt_text': "",
+        'src_index': item['src_index'],
+        'tgt_index': "",
+        'similarity': "",
+        'exception': "缺失 (Omission)",
+        '_sort_key': item['src_index']
+    }
+
+
+def addition_row(item):
+    """增添问题对应的报告行"""
+    return {
+        'src_text': "",
+        'tgt_text': item['tgt_text'],
+        'src_index': "",
+        'tgt_index': item['tgt_index'],
+        'similarity': "",
+        'exception': "增添 (Addition)",
+        '_sort_key': 999999
+    }
+
+
+def alignment_rows(item, similarity_threshold):
+    """
+    将一个对齐组展开为报告行（N:M 对齐每个句子一行）
+
+    参数:
+        item: 对齐组
+        similarity_threshold: 相似度阈值
+
+    返回:
+        list: 行字典列表（含 _sort_key）
+    """
+    src_indices = item['src_indices']
+    tgt_indices = item['tgt_indices']
+    similarity = item['similarity']
+
+    # 检查异常
+    exception = "OK"
+    if similarity is None:
+        exception = "空对齐"
+    elif similarity < similarity_threshold:
+        exception = "相似度低 (Low Similarity)"
+
+    # 🔴 修复: 使用第一个源索引作为排序键（如果有源索引的话）
+    # 对于N:M对齐，所有行都应该使用相同的排序键，这样它们会被排在一起
+    if len(src_indices) > 0:
+        sort_key = src_indices[0]
+    elif len(tgt_indices) > 0:
+        # 如果没有源索引（增添），使用目标索引 + 大偏移量
+        sort_key = 999999 + tgt_indices[0]
+    else:
+        sort_key = 999999
+
+    rows = []
+    # N:M对齐展开
+    max_len = max(len(src_indices), len(tgt_indices))
+    for i in range(max_len):
+        src_text = item['src_texts'][i] if i < len(item['src_texts']) else ""
+        tgt_text = item['tgt_texts'][i] if i < len(item['tgt_texts']) else ""
+        src_idx = src_indices[i] if i < len(src_indices) else ""
+        tgt_idx = tgt_indices[i] if i < len(tgt_indices) else ""
+
+        # 只有第一行显示相似度和异常情况
+        if i == 0:
+            sim_str = f"{similarity:.4f}" if similarity is not None else ""
+            exc_str = exception
+        else:
+            sim_str = ""
+            exc_str = exception if exception != "OK" else ""
+
+        # 🔴 修复: 为了保持N:M对齐的多行在一起，使用子排序键
+        # sort_key相同时，按i排序
+        subsort_key = sort_key + (i * 0.001)  # 添加小数部分来保持顺序
+
+        rows.append({
+            'src_text': src_text,
+            'tgt_text': tgt_text,
+            'src_index': src_idx,
+            'tgt_index': tgt_idx,
+            'similarity': sim_str,
+            'exception': exc_str,
+            '_sort_key': subsort_key  # 使用子排序键
+        })
+    return rows
+
+
+def run_job_check(source_text, target_text, options, progress=None):
+    """异步任务中执行检查（等待准入槽位，不受排队上限和超时限制）"""
+    cost = estimate_cost(source_text, target_text, options.max_align)
+    if progress is not None:
+        progress('waiting', 0)
+    with admission.admit(cost, label='/api/jobs', block=True):
+        return run_check(source_text, target_text, options, progress=progress)
+
+
+def rejected_response(error):
+    """准入被拒绝时的响应（429/413 + Retry-After），并按接口和原因计数"""
+    ADMISSION_REJECTED.inc(endpoint=request.path, reason=error.reason)
+    response = jsonify({
+        'success': False,
+        'error': str(error),
+        'retry_after': error.retry_after
+    })
+    response.status_code = error.status
+    if error.retry_after:
+        response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def encoded_response(body, fmt, encoding):
+    """
+    生成按协商结果压缩的响应
+
+    参数:
+        body: 已按 fmt 序列化的响应体
+        fmt: negotiate_format() 的结果
+        encoding: negotiate_encoding() 的结果
+    """
+    body, content_encoding = compress(body, encoding)
+    response = Response(body, mimetype=MIMETYPES[fmt])
+    if content_encoding:
+        response.headers['Content-Encoding'] = content_encoding
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    return response
+
+
+def build_report_rows(results, similarity_threshold):
+    """
+    生成按源索引排序的报告行（CSV 报告和紧凑格式共用）
+
+    参数:
+        results: check_translation() 的返回值
+        similarity_threshold: 相似度阈值
+
+    返回:
+        list: 行字典列表
+    """
+    # 收集所有行
+    all_rows = []
+
+    # 获取被拆散的对齐组
+    force_split_set = set()
+    for fs_item in results.get('force_split_alignments', []):
+        force_split_set.add((tuple(fs_item['src_indices']), tuple(fs_item['tgt_indices'])))
+
+    # 对齐组
+    for item in results['alignments']:
+        # 跳过被拆散的对齐组
+        if (tuple(item['src_indices']), tuple(item['tgt_indices'])) in force_split_set:
+            continue
+        all_rows.extend(alignment_rows(item, similarity_threshold))
+
+    # 缺失和增添
+    all_rows.extend(omission_row(item) for item in results['issues']['omissions'])
+    all_rows.extend(addition_row(item) for item in results['issues']['additions'])
+
+    # 按源索引排序
+    all_rows.sort(key=lambda x: x['_sort_key'])
+    return all_rows
+
+
+def build_summary(results):
+    """接口返回的统计信息"""
+    return {
+        # 前端需要的字段
+        'src_count': results['metadata']['source_sentences'],
+        'tgt_count': results['metadata']['target_sentences'],
+        'alignment_count': results['metadata']['alignments'],
+        'similarity_threshold': results['metadata']['similarity_threshold'],
+        # 原有的统计字段
+        'total_issues': results['summary']['total_issues'],
+        'omission_count': results['summary']['omission_count'],
+        'addition_count': results['summary']['addition_count'],
+        'low_similarity_count': results['summary']['low_similarity_count'],
+        'force_split_count': results['summary']['force_split_count']
+    }
+
+
+def build_check_data(results, similarity_threshold):
+    """
+    将 check_translation 的结果转换为接口返回的数据
+
+    参数:
+        results: check_translation() 的返回值
+        similarity_threshold: 相似度阈值
+
+    返回:
+        dict: {'csv', 'summary', 'issues', 'force_split_count', 'performance'}，
+              预先计算了词对齐时另有 'word_alignments'
+    """
+    # 生成CSV格式的报告
+    csv_lines = []
+    csv_lines.append("原文 (Source),译文 (Target),源索引,目标索引,相似度 (Similarity),异常情况 (Exception)")
+
+    # 生成CSV
+    for row in build_report_rows(results, similarity_threshold):
+        csv_lines.append(f'"{row["src_text"]}","{row["tgt_text"]}",{row["src_index"]},{row["tgt_index"]},{row["similarity"]},{row["exception"]}')
+
+    csv_content = "\n".join(csv_lines)
+
+    data = {
+        'csv': csv_content,
+        'summary': build_summary(results),
+        'issues': {
+            'omissions': results['issues']['omissions'],
+            'additions': results['issues']['additions'],
+            'low_similarity': results['issues']['low_similarity']
+        },
+        'force_split_count': len(results.get('force_split_alignments', [])),
+        'performance': results['metadata']['performance']
+    }
+    if 'word_alignments' in results:
+        # 预先计算的词对齐（请求参数 word_alignments 不为 'none' 时）
+        data['word_alignments'] = results['word_alignments']
+    return data
+
+
+def build_compact_check_data(results, similarity_threshold):
+    """
+    紧凑格式：每个句子只发送一次，报告行和问题列表用句子索引引用
+
+    返回:
+        dict: {
+            'format': 'compact',
+            'sentences': {'source': [...], 'target': [...]},
+            'exceptions': [异常情况文本, ...],
+            'rows': [[源索引, 目标索引, 相似度, 异常情况编号], ...],  // 索引/相似度可为 null
+            'summary', 'issues', 'force_split_count', 'performance',
+            'word_alignments': [[源索引列表, 目标索引列表, 词对齐 CSV], ...]  // 仅在预先计算了词对齐时
+        }
+        issues 中 omissions/additions 为句子索引列表，
+        low_similarity 为 [源索引列表, 目标索引列表, 相似度] 列表
+    """
+    exceptions = []
+    exception_ids = {}
+    rows = []
+    for row in build_report_rows(results, similarity_threshold):
+        exception = row['exception']
+        if exception not in exception_ids:
+            exception_ids[exception] = len(exceptions)
+            exceptions.append(exception)
+        rows.append([
+            row['src_index'] if row['src_index'] != "" else None,
+            row['tgt_index'] if row['tgt_index'] != "" else None,
+            # 与 CSV 相同的 4 位小数
+            float(row['similarity']) if row['similarity'] else None,
+            exception_ids[exception]
+        ])
+
+    issues = results['issues']
+    data = {
+        'format': 'compact',
+        'sentences': results['sentences'],
+        'exceptions': exceptions,
+        'rows': rows,
+        'summary': build_summary(results),
+        'issues': {
+            'omissions': [item['src_index'] for item in issues['omissions']],
+            'additions': [item['tgt_index'] for item in issues['additions']],
+            'low_similarity': [[item['src_indices'], item['tgt_indices'], item['similarity']]
+                               for item in issues['low_similarity']]
+        },
+        'force_split_count': len(results.get('force_split_alignments', [])),
+        'performance': results['metadata']['performance']
+    }
+    if 'word_alignments' in results:
+        # 对齐组的文本由句子索引还原，只发送词对齐 CSV
+        data['word_alignments'] = [[item['src_indices'], item['tgt_indices'], item['alignment']['csv']]
+                                   for item in results['word_alignments']]
+    return data
+
+
+def build_group_event(item, issues, similarity_threshold):
+    """
+    生成流式接口中一个对齐组的事件
+
+    参数:
+        item: 已最终确定的对齐组
+        issues: TranslationQA._classify_alignment() 的返回值
+        similarity_threshold: 相似度阈值
+
+    返回:
+        dict: {'event': 'group', ..., 'rows': [[原文, 译文, 源索引, 目标索引, 相似度, 异常情况], ...],
+               'sort_keys': [...]}；sort_keys 为各行在完整报告中的排序键（与 build_report_rows 相同），
+              客户端按它插入行，使缺失/增添行出现在源位置而非到达顺序
+    """
+    # 被强制拆散的对齐组只输出对应的缺失+增添行（与 CSV 报告一致）
+    rows = [] if issues['force_split'] else alignment_rows(item, similarity_threshold)
+    rows += [omission_row(o) for o in issues['omissions']]
+    rows += [addition_row(a) for a in issues['additions']]
+    return {
+        'event': 'group',
+        'src_indices': item['src_indices'],
+        'tgt_indices': item['tgt_indices'],
+        'src_text': item['src_text'],
+        'tgt_text': item['tgt_text'],
+        'similarity': item['similarity'],
+        'force_split': issues['force_split'],
+        'issues': {
+            'omissions': issues['omissions'],
+            'additions': issues['additions'],
+            'low_similarity': issues['low_similarity']
+        },
+        'rows': [[row['src_text'], row['tgt_text'], row['src_index'], row['tgt_index'],
+                  row['similarity'], row['exception']] for row in rows],
+        'sort_keys': [row['_sort_key'] for row in rows]
+    }
+
+
+def warm_up(languages):
+    """
+    启动预热：创建 ONNX 会话、加载 fastText/HanLP/spaCy 模型，并运行一次小型检查
+    （触发 numba JIT 编译），完成后 /api/ready 返回 200
+
+    参数:
+        languages: 需要预加载模型的语言代码列表
+    """
+    warmup_state['status'] = 'running'
+    start = time.perf_counter()
+    try:
+        print(f"\n开始预热 (语言: {', '.join(languages)})...")
+        tool = get_qa_tool()
+        aligner = get_word_aligner()
+        splitter_loaded = tool.text_splitter.preload(languages)
+        aligner_loaded = aligner.preload(languages)
+        warmup_state['languages'] = {
+            lang: {'splitter': splitter_loaded[lang], 'tokenizer': aligner_loaded[lang]}
+            for lang in languages
+        }
+        missing = [lang for lang in languages if not splitter_loaded[lang]]
+        if missing:
+            if MISSING_MODEL_POLICY == 'fail':
+                raise RuntimeError(f"分句模型缺失: {', '.join(missing)}（TQA_MISSING_MODEL_POLICY=fail）")
+            print(f"⚠️  分句模型缺失，以下语言使用规则分句: {', '.join(missing)}")
+
+        # 用前两种语言（只有一种时与自身）运行一次小型检查和词对齐
+        src_lang = languages[0] if languages else 'en'
+        tgt_lang = languages[1] if len(languages) > 1 else src_lang
+        src_text = WARMUP_SAMPLES.get(src_lang, WARMUP_SAMPLES['en'])
+        tgt_text = WARMUP_SAMPLES.get(tgt_lang, WARMUP_SAMPLES['en'])
+        tool.check_translation(source_text=src_text, target_text=tgt_text, is_split=False,
+                               source_language='auto', target_language='auto')
+        aligner.align_words(src_text, tgt_text, src_lang, tgt_lang)
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        warmup_state.update(status='failed', error=str(e), seconds=round(time.perf_counter() - start, 3))
+        print(f"❌ 预热失败: {e}")
+        return
+
+    warmup_state.update(status='ready', ready=True, seconds=round(time.perf_counter() - start, 3))
+    print(f"✓ 预热完成，耗时 {warmup_state['seconds']:.1f} 秒")
+
+
+def start_warmup(background=True):
+    """
+    按配置预热（关闭预热时直接标记为就绪）
+
+    参数:
+        background: True 时在后台线程中预热；False 时同步完成（多进程部署的主进程在 fork 前调用）
+    """
+    if not WARMUP_ENABLED:
+        warmup_state.update(status='disabled', ready=True)
+        return
+    if background:
+        threading.Thread(target=warm_up, args=(WARMUP_LANGUAGES,), name="warmup", daemon=True).start()
+    else:
+        warm_up(WARMUP_LANGUAGES)
+        if warmup_state['status'] == 'failed' and MISSING_MODEL_POLICY == 'fail':
+            # 预加载模式：不 fork 出无法正常分句的 worker
+            raise SystemExit(f"❌ 预热失败: {warmup_state['error']}")
+
+
+@app.before_request
+def start_request_timer():
+    """记录请求开始时间"""
+    g.request_start = time.perf_counter()
+    HTTP_IN_FLIGHT.inc()
+
+
+@app.after_request
+def record_response_status(response):
+    """记录响应状态码（耗时在 teardown 中统计，异常请求也会计入）"""
+    g.response_status = response.status_code
+    return response
+
+
+@app.teardown_request
+def observe_request(exc):
+    """统计请求耗时"""
+    start = g.pop('request_start', None)
+    if start is None:
+        return
+    HTTP_IN_FLIGHT.dec()
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    HTTP_LATENCY.observe(time.perf_counter() - start,
+                         endpoint=endpoint,
+                         method=request.method,
+                         status=g.pop('response_status', 500))
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus 指标"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
 @app.route('/')
 def index():
     """主页"""
@@ -87,191 +908,143 @@ def check_translation():
             "issues": {...}
         }
     }
+
+    响应格式按 Accept 协商（见 response_format.py）:
+        application/json（默认）、application/vnd.tqa.compact+json（紧凑格式，
+        见 build_compact_check_data）、application/msgpack（紧凑格式的 MessagePack 编码）；
+    按 Accept-Encoding 使用 br/gzip 压缩。
+
+    结果按规范化输入、实际参数和服务端配置指纹（见 server_fingerprint）的哈希缓存，
+    响应带 ETag（该哈希 + 格式 + 压缩方式）和 X-Cache (HIT/MISS)。
+    请求头 If-None-Match 与之匹配时直接返回 304，不做检查也不占用准入名额；模型或配置变化后 ETag 随之改变。
     """
     try:
-        # 获取请求数据
-        data = request.get_json()
-        
-        if not data:
+        try:
+            source_text, target_text, options = parse_check_request(request.get_json())
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': '请求数据为空'
+                'error': str(e)
             }), 400
-        
-        source_text = data.get('source_text', '').strip()
-        target_text = data.get('target_text', '').strip()
-        
-        if not source_text or not target_text:
+
+        fmt = negotiate_format(request.accept_mimetypes)
+        encoding = negotiate_encoding(request.accept_encodings)
+
+        # 缓存键取决于输入、参数和服务端配置，客户端持有相同 ETag 说明已有相同结果
+        cache_key = f"{make_key(source_text, target_text, options, server_fingerprint())}-{fmt}"
+        etag = f"{cache_key}-{encoding or 'identity'}"
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.headers['ETag'] = f'"{etag}"'
+            response.headers['Vary'] = 'Accept, Accept-Encoding'
+            return response
+
+        body = result_cache.get(cache_key)
+        cache_status = 'HIT'
+        if body is None:
+            cost = estimate_cost(source_text, target_text, options.max_align)
+            try:
+                with admission.admit(cost, label='/api/check'):
+                    data = run_check(source_text, target_text, options, compact=fmt != FORMAT_JSON)
+            except AdmissionRejected as e:
+                return rejected_response(e)
+
+            body = serialize({
+                'success': True,
+                'data': data
+            }, fmt)
+            result_cache.put(cache_key, body)
+            cache_status = 'MISS'
+
+        # 返回结果
+        response = encoded_response(body, fmt, encoding)
+        response.headers['ETag'] = f'"{etag}"'
+        response.headers['X-Cache'] = cache_status
+        return response
+
+    except Exception as e:
+        import traceback
+        error_msg = str(e)
+        traceback_msg = traceback.format_exc()
+        print(f"错误: {error_msg}")
+        print(traceback_msg)
+
+        return jsonify({
+            'success': False,
+            'error': error_msg,
+            'traceback': traceback_msg
+        }), 500
+
+
+@app.route('/api/check-batch', methods=['POST'])
+def check_translation_batch():
+    """
+    批量翻译质量检查API（适用于大量短文本，如 CMS 发布时的界面字符串、商品描述）
+
+    请求体:
+    {
+        "pairs": [
+            {"id": "title", "source_text": "原文", "target_text": "译文"},  // id 可选，默认为序号
+            ...
+        ],
+        "similarity_threshold": 0.7,      // 可选，其他参数同 /api/check，所有文档对共用
+        ...
+    }
+
+    所有文本一次检测语言、按语言分组分句，所有句子窗口合并编码，各文档对并行对齐。
+
+    返回:
+    {
+        "success": true,
+        "data": {
+            "results": [
+                {"id": "title", "success": true, "data": {...}},     // data 与 /api/check 相同
+                {"id": 1, "success": false, "error": "..."}
+            ],
+            "performance": {...}
+        }
+    }
+
+    响应格式与压缩的协商同 /api/check（紧凑格式时每组的 data 为紧凑格式）。
+    """
+    try:
+        try:
+            ids, pairs, options = parse_batch_request(request.get_json())
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'error': '原文和译文不能为空'
+                'error': str(e)
             }), 400
-        
-        # 获取可选参数
-        similarity_threshold = data.get('similarity_threshold', 0.7)
-        force_split_threshold = data.get('force_split_threshold', 0.5)
-
-        # 获取高级参数
-        max_align = data.get('max_align', 5)
-        top_k = data.get('top_k', 3)
-        skip = data.get('skip', -1.0)
-        win = data.get('win', 5)
-        score_threshold = data.get('score_threshold', 0.0)
-        use_min_similarity = data.get('use_min_similarity', True)
-        auto_split_nm = data.get('auto_split_nm', True)  # 默认启用自动拆散
-
-        # 更新参数（如果与当前不同）
-        tool = get_qa_tool()
-        tool.similarity_threshold = similarity_threshold
-        tool.force_split_threshold = force_split_threshold
-        tool.max_align = max_align
-        tool.top_k = top_k
-        tool.skip = skip
-        tool.win = win
-        tool.score_threshold = score_threshold
-        tool.use_min_similarity = use_min_similarity
-        tool.auto_split_nm = auto_split_nm
-
-        # 执行检查（使用 fastText 自动检测语言）
-        print(f"开始检查翻译...")
-        print(f"  使用 fastText 自动检测语言...")
-
-        results = tool.check_translation(
-            source_text=source_text,
-            target_text=target_text,
-            source_language='auto',  # 自动检测
-            target_language='auto',  # 自动检测
-            is_split=False  # 让工具自动分句
-        )
-        
-        # 生成CSV格式的报告
-        csv_lines = []
-        csv_lines.append("原文 (Source),译文 (Target),源索引,目标索引,相似度 (Similarity),异常情况 (Exception)")
-        
-        # 收集所有行
-        all_rows = []
-        
-        # 获取被拆散的对齐组
-        force_split_set = set()
-        for fs_item in results.get('force_split_alignments', []):
-            force_split_set.add((tuple(fs_item['src_indices']), tuple(fs_item['tgt_indices'])))
-        
-        # 对齐组
-        for item in results['alignments']:
-            src_indices = item['src_indices']
-            tgt_indices = item['tgt_indices']
-
-            # 跳过被拆散的对齐组
-            if (tuple(src_indices), tuple(tgt_indices)) in force_split_set:
-                continue
 
-            similarity = item['similarity']
-
-            # 检查异常
-            exception = "OK"
-            if similarity is None:
-                exception = "空对齐"
-            elif similarity < similarity_threshold:
-                exception = "相似度低 (Low Similarity)"
-
-            # 🔴 修复: 使用第一个源索引作为排序键（如果有源索引的话）
-            # 对于N:M对齐，所有行都应该使用相同的排序键，这样它们会被排在一起
-            if len(src_indices) > 0:
-                sort_key = src_indices[0]
-            elif len(tgt_indices) > 0:
-                # 如果没有源索引（增添），使用目标索引 + 大偏移量
-                sort_key = 999999 + tgt_indices[0]
+        fmt = negotiate_format(request.accept_mimetypes)
+        encoding = negotiate_encoding(request.accept_encodings)
+
+        try:
+            with admission.admit(estimate_batch_cost(pairs, options.max_align), label='/api/check-batch'):
+                batch = get_qa_tool().check_translation_batch(pairs, options=options, max_workers=BATCH_WORKERS)
+        except AdmissionRejected as e:
+            return rejected_response(e)
+
+        items = []
+        for pair_id, results in zip(ids, batch['results']):
+            if 'error' in results:
+                items.append({'id': pair_id, 'success': False, 'error': results['error']})
+                continue
+            observe_check(results)
+            if fmt == FORMAT_JSON:
+                data = build_check_data(results, options.similarity_threshold)
             else:
-                sort_key = 999999
-
-            # N:M对齐展开
-            max_len = max(len(src_indices), len(tgt_indices))
-            for i in range(max_len):
-                src_text = item['src_texts'][i] if i < len(item['src_texts']) else ""
-                tgt_text = item['tgt_texts'][i] if i < len(item['tgt_texts']) else ""
-                src_idx = src_indices[i] if i < len(src_indices) else ""
-                tgt_idx = tgt_indices[i] if i < len(tgt_indices) else ""
-
-                # 只有第一行显示相似度和异常情况
-                if i == 0:
-                    sim_str = f"{similarity:.4f}" if similarity is not None else ""
-                    exc_str = exception
-                else:
-                    sim_str = ""
-                    exc_str = exception if exception != "OK" else ""
-
-                # 🔴 修复: 为了保持N:M对齐的多行在一起，使用子排序键
-                # sort_key相同时，按i排序
-                subsort_key = sort_key + (i * 0.001)  # 添加小数部分来保持顺序
-
-                all_rows.append({
-                    'src_text': src_text,
-                    'tgt_text': tgt_text,
-                    'src_index': src_idx,
-                    'tgt_index': tgt_idx,
-                    'similarity': sim_str,
-                    'exception': exc_str,
-                    '_sort_key': subsort_key  # 使用子排序键
-                })
-        
-        # 缺失和增添
-        for item in results['issues']['omissions']:
-            all_rows.append({
-                'src_text': item['src_text'],
-                'tgt_text': "",
-                'src_index': item['src_index'],
-                'tgt_index': "",
-                'similarity': "",
-                'exception': "缺失 (Omission)",
-                '_sort_key': item['src_index']
-            })
-        
-        for item in results['issues']['additions']:
-            all_rows.append({
-                'src_text': "",
-                'tgt_text': item['tgt_text'],
-                'src_index': "",
-                'tgt_index': item['tgt_index'],
-                'similarity': "",
-                'exception': "增添 (Addition)",
-                '_sort_key': 999999
-            })
-
-        # 按源索引排序
-        all_rows.sort(key=lambda x: x['_sort_key'])
-
-        # 生成CSV
-        for row in all_rows:
-            csv_lines.append(f'"{row["src_text"]}","{row["tgt_text"]}",{row["src_index"]},{row["tgt_index"]},{row["similarity"]},{row["exception"]}')
-
-        csv_content = "\n".join(csv_lines)
+                data = build_compact_check_data(results, options.similarity_threshold)
+            items.append({'id': pair_id, 'success': True, 'data': data})
 
-        # 返回结果
-        return jsonify({
+        body = serialize({
             'success': True,
             'data': {
-                'csv': csv_content,
-                'summary': {
-                    # 前端需要的字段
-                    'src_count': results['metadata']['source_sentences'],
-                    'tgt_count': results['metadata']['target_sentences'],
-                    'alignment_count': results['metadata']['alignments'],
-                    'similarity_threshold': results['metadata']['similarity_threshold'],
-                    # 原有的统计字段
-                    'total_issues': results['summary']['total_issues'],
-                    'omission_count': results['summary']['omission_count'],
-                    'addition_count': results['summary']['addition_count'],
-                    'low_similarity_count': results['summary']['low_similarity_count'],
-                    'force_split_count': results['summary']['force_split_count']
-                },
-                'issues': {
-                    'omissions': results['issues']['omissions'],
-                    'additions': results['issues']['additions'],
-                    'low_similarity': results['issues']['low_similarity']
-                },
-                'force_split_count': len(results.get('force_split_alignments', []))
+                'results': items,
+                'performance': batch['performance']
             }
-        })
+        }, fmt)
+        return encoded_response(body, fmt, encoding)
 
     except Exception as e:
         import traceback
@@ -287,15 +1060,181 @@ def check_translation():
         }), 500
 
 
+@app.route('/api/check-stream', methods=['POST'])
+def check_translation_stream():
+    """
+    翻译质量检查API（流式，NDJSON）
+
+    请求体: 与 /api/check 相同
+
+    返回: application/x-ndjson，每行一个事件：
+        {"event": "progress", "stage": "encode", "percent": 10.0}
+        {"event": "group", "src_indices": [...], "tgt_indices": [...], "rows": [[...], ...], "issues": {...}}
+        {"event": "done", "data": {...}}     // 与 /api/check 的 data 相同
+        {"event": "error", "error": "..."}
+
+    对齐组在相似度计算阶段逐组确定，按源文本顺序输出，前端可增量渲染。
+    Accept 中包含 application/vnd.tqa.compact+json 时，done 事件的 data 使用紧凑格式。
+
+    与 /api/check 共用结果缓存：命中时只输出 done 事件（响应头 X-Cache: HIT），不占用准入名额。
+    """
+    try:
+        source_text, target_text, options = parse_check_request(request.get_json())
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    compact = negotiate_format(request.accept_mimetypes) != FORMAT_JSON
+    fmt = FORMAT_COMPACT if compact else FORMAT_JSON
+    cache_key = f"{make_key(source_text, target_text, options, server_fingerprint())}-{fmt}"
+    body = result_cache.get(cache_key)
+    if body is not None:
+        data = json.loads(body)['data']
+        return Response(dumps_json({'event': 'done', 'data': data}) + b"\n",
+                        mimetype='application/x-ndjson',
+                        headers={'Cache-Control': 'no-cache', 'X-Cache': 'HIT'})
+
+    try:
+        ticket = admission.acquire(estimate_cost(source_text, target_text, options.max_align),
+                                   label='/api/check-stream')
+    except AdmissionRejected as e:
+        return rejected_response(e)
+
+    events = queue.Queue()
+
+    def progress(stage, percent):
+        events.put({'event': 'progress', 'stage': stage, 'percent': round(percent, 1)})
+
+    def on_group(item, issues):
+        events.put(build_group_event(item, issues, options.similarity_threshold))
+
+    def worker():
+        try:
+            data = run_check(source_text, target_text, options, progress=progress, on_group=on_group,
+                             compact=compact)
+            result_cache.put(cache_key, serialize({'success': True, 'data': data}, fmt))
+            events.put({'event': 'done', 'data': data})
+        except Exception as e:
+            import traceback
+            print(f"错误: {str(e)}")
+            traceback.print_exc()
+            events.put({'event': 'error', 'error': str(e)})
+        finally:
+            admission.release(ticket)
+            events.put(None)
+
+    # 检查在后台线程中运行，回调产生的事件经队列写入响应
+    threading.Thread(target=worker, name="check-stream", daemon=True).start()
+
+    def generate():
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield dumps_json(event) + b"\n"
+
+    return Response(stream_with_context(generate()),
+                    mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no', 'X-Cache': 'MISS'})
+
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """
+    提交异步检查任务（适用于大文档，避免 HTTP 请求超时）
+
+    请求体: 与 /api/check 相同
+
+    返回:
+    {
+        "success": true,
+        "data": {
+            "job_id": "任务ID",
+            "status": "queued"
+        }
+    }
+    """
+    try:
+        source_text, target_text, options = parse_check_request(request.get_json())
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+    try:
+        job_id = get_job_manager().submit(run_job_check, source_text, target_text, options)
+    except JobQueueFull as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 503
+
+    print(f"✓ 已提交检查任务: {job_id}")
+    return jsonify({
+        'success': True,
+        'data': {
+            'job_id': job_id,
+            'status': 'queued'
+        }
+    }), 202
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """
+    查询异步检查任务
+
+    返回:
+    {
+        "success": true,
+        "data": {
+            "id": "任务ID",
+            "status": "queued" | "running" | "done" | "failed",
+            "progress": {"stage": "encode", "percent": 10.0},
+            "result": {...},   // 完成后与 /api/check 的 data 相同
+            "error": null
+        }
+    }
+    """
+    job = get_job_manager().get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': '任务不存在或已过期'
+        }), 404
+    return jsonify({
+        'success': True,
+        'data': job
+    })
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """健康检查"""
     return jsonify({
         'status': 'ok',
-        'model_loaded': qa_tool is not None
+        'model_loaded': qa_tool is not None,
+        'admission': admission.get_stats(),
+        'result_cache': result_cache.get_stats(),
+        'word_vector_cache': word_aligner.word_vectors.get_stats() if word_aligner is not None else None,
+        'sentence_cache': sentence_cache.get_stats(),
+        'worker': {
+            'pid': os.getpid(),
+            'ort_threads': getattr(shared_encoder, 'intra_op_threads', None) if shared_encoder is not None else None,
+        },
+        'languages': qa_tool.text_splitter.language_status() if qa_tool is not None else None
     })
 
 
+@app.route('/api/ready', methods=['GET'])
+def readiness_check():
+    """就绪检查：预热完成后返回 200，否则返回 503（供负载均衡器判断是否转发流量）"""
+    return jsonify(dict(warmup_state)), 200 if warmup_state['ready'] else 503
+
+
 @app.route('/api/word-align', methods=['POST'])
 def word_align():
     """
@@ -350,19 +1289,16 @@ def word_align():
         print(f"  源语言: {source_lang}")
         print(f"  目标语言: {target_lang}")
 
-        alignments = aligner.align_words(source_text, target_text, source_lang, target_lang)
-        csv_lines = aligner.align_words_to_csv(source_text, target_text, source_lang, target_lang)
+        # 分词、编码和匹配只执行一次（同一句对的重复请求直接命中缓存），JSON 和 CSV 由同一结果生成
+        result = aligner.align(source_text, target_text, source_lang, target_lang)
 
-        print(f"✓ 词对齐完成: {len(alignments)} 个词对")
-        if alignments:
-            print(f"  前3个对齐: {alignments[:3]}")
+        print(f"✓ 词对齐完成: {len(result.alignments)} 个词对")
+        if result.alignments:
+            print(f"  前3个对齐: {result.alignments[:3]}")
 
         return jsonify({
             'success': True,
-            'data': {
-                'csv': '\n'.join(csv_lines),
-                'alignments': alignments
-            }
+            'data': result.to_dict()
         })
 
     except Exception as e:
@@ -383,5 +1319,11 @@ if __name__ == '__main__':
     print("访问地址: http://localhost:5001")
     print("\n按 Ctrl+C 停止服务器\n")
 
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    debug = True
+    # debug 模式下 werkzeug 重载器的父进程只负责监视文件变化，不需要预热
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_warmup()
+
+    # threaded=True: 多个请求在不同线程中并发处理，共享已加载的模型
+    app.run(host='0.0.0.0', port=5001, debug=debug, threaded=True)
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+长文档分块分句基准测试
+
+比较 TextSplitter 对超长分句单元（整篇合成语料拼成一个段落，见 text_splitter.split_units）的两种处理方式：
+- whole: 整个单元一次交给 spaCy / HanLP（chunk_chars=0；超过 spaCy max_length 时无法整体处理）
+- chunked: 在句末标点处切块（iter_text_chunks），spaCy 用 nlp.pipe 批量处理、HanLP 用进程池，
+  分别以 --processes 中的每个进程数运行
+
+每种方式在独立子进程中运行，报告耗时、峰值常驻内存 (RSS)、句子数和与 whole 结果一致的比例。
+文本来自 synthetic_corpus（英语原文 / 中文译文，可复现）。
+
+使用方法:
+    python benchmarks/chunked_split_benchmark.py --sentences 20000
+    python benchmarks/chunked_split_benchmark.py --languages en --sentences 50000 --chunk-chars 50000 --processes 1,2,4
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_corpus import generate_corpus
+
+
+def peak_rss():
+    """当前进程的峰值常驻内存（字节）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的 ru_maxrss 单位为字节，Linux 为 KB
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def corpus_text(language, num_sentences, seed):
+    """合成语料拼成一个段落（按行排版的文本会被切成许多短的分句单元，不会进入分块模式）"""
+    corpus = generate_corpus(num_sentences, seed=seed)
+    if language == 'zh':
+        return "".join(corpus['target_sents'])
+    return " ".join(corpus['source_sents'])
+
+
+def measure(language, chunk_chars, processes, num_sentences, seed):
+    """
+    在当前进程中测量一种方式（由子进程调用）
+
+    返回:
+        dict: {'seconds', 'rss_before', 'peak_rss', 'sentences'}
+    """
+    from text_splitter import TextSplitter
+
+    text = corpus_text(language, num_sentences, seed)
+    splitter = TextSplitter(auto_detect=False, chunk_chars=chunk_chars, processes=processes)
+    splitter.preload([language])
+    # 预热一次（首次调用的延迟初始化不计入）
+    splitter.split_sentences(text[:1000], language)
+    rss_before = peak_rss()
+
+    start = time.perf_counter()
+    sentences = splitter.split_sentences(text, language)
+    seconds = time.perf_counter() - start
+    splitter.close()
+    return {'seconds': seconds, 'rss_before': rss_before, 'peak_rss': peak_rss(), 'sentences': sentences}
+
+
+def run_child(language, chunk_chars, processes, args):
+    """在独立子进程中测量，避免峰值内存互相影响"""
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--child', language,
+         '--chunk-chars', str(chunk_chars), '--processes', str(processes),
+         '--sentences', str(args.sentences), '--seed', str(args.seed)],
+        cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL
+    )
+    # 子进程的最后一行为 JSON 结果（之前可能有模型加载日志）
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="长文档分块分句基准测试")
+    parser.add_argument('--languages', default='en,zh', help="语言代码，逗号分隔（en 使用合成原文，zh 使用合成译文）")
+    parser.add_argument('--sentences', type=int, default=20000, help="合成语料的句子数")
+    parser.add_argument('--chunk-chars', type=int, default=100000, help="分块大小（字符）")
+    parser.add_argument('--processes', default='1,4', help="分块模式的进程数，逗号分隔")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    parser.add_argument('--output', default=None, help="结果 JSON 输出路径")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        result = measure(args.child, args.chunk_chars, int(args.processes), args.sentences, args.seed)
+        print(json.dumps(result, ensure_ascii=False))
+        return
+
+    results = []
+    for language in args.languages.split(','):
+        text_chars = len(corpus_text(language, args.sentences, args.seed))
+        print(f"\n{language}：{args.sentences} 句，{text_chars} 字符")
+        print(f"  {'方式':<14}{'耗时(s)':>10}{'峰值内存(MB)':>14}{'句子数':>8}{'与whole一致':>12}")
+
+        configs = [('whole', 0, 1)] + [(f"chunked×{p}", args.chunk_chars, int(p)) for p in args.processes.split(',')]
+        reference = None
+        for name, chunk_chars, processes in configs:
+            try:
+                result = run_child(language, chunk_chars, processes, args)
+            except subprocess.CalledProcessError as e:
+                print(f"  {name:<14}❌ 失败 (退出码 {e.returncode})")
+                continue
+            sentences = result.pop('sentences')
+            if name == 'whole':
+                reference = set(sentences)
+            agreement = len(reference & set(sentences)) / len(reference) if reference else None
+            memory_mb = (result['peak_rss'] - result['rss_before']) / 1024 / 1024
+            agreement_text = f"{agreement:.1%}" if agreement is not None else '-'
+            print(f"  {name:<14}{result['seconds']:>10.2f}{memory_mb:>14.1f}{len(sentences):>8}{agreement_text:>12}")
+            results.append({'language': language, 'mode': name, 'chunk_chars': chunk_chars,
+                            'processes': processes, 'seconds': result['seconds'],
+                            'peak_memory_mb': memory_mb, 'sentences': len(sentences),
+                            'agreement_with_whole': agreement})
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
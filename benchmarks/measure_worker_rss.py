@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程部署的 worker 内存测量
+
+分别以以下模式启动 gunicorn：
+- preload: 预加载 (TQA_PRELOAD=1)，worker 共用主进程中单线程的 ONNX Runtime 会话
+- preload-ort: 预加载，worker 在 fork 之后按 TQA_WORKER_ORT_THREADS 重建会话（各自重新加载 LaBSE 权重）
+- no-preload: 非预加载 (TQA_PRELOAD=0)，每个 worker 各自加载模型
+- encoder-socket: 先启动 encoder_server.py，worker 以 TQA_ENCODER_SOCKET 客户端模式运行，不应持有 LaBSE 模型
+
+等待所有 worker 预热完成后，读取主进程、每个 worker（和编码服务）的内存：
+- RSS: 常驻内存（包含与其他进程共享的页，预加载模式下会重复计算共享权重）
+- PSS: 按共享进程数均摊后的内存（各进程 PSS 之和 ≈ 实际占用的物理内存）
+- USS: 进程独占的内存
+
+PSS/USS 读取自 /proc/<pid>/smaps_rollup（仅 Linux）；其他平台只报告 RSS。
+
+测量内存之后再发送若干个检查请求（合成语料，每个请求内容不同以避开结果缓存），报告检查耗时的中位数，
+并从 /api/health 读取每个 worker 的 ONNX Runtime 线程数。对比 preload 与 preload-ort 即可看到
+重建会话多占的内存和换来的编码速度。
+
+使用方法:
+    python benchmarks/measure_worker_rss.py --workers 4
+    python benchmarks/measure_worker_rss.py --modes preload --workers 2 --port 5101
+    python benchmarks/measure_worker_rss.py --modes preload,encoder-socket --workers 4
+    python benchmarks/measure_worker_rss.py --modes preload,preload-ort --workers 4 --worker-ort-threads 4
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_corpus import generate_corpus
+from prefork import default_worker_threads
+
+# 模式 -> (TQA_PRELOAD, 是否使用本地编码服务, worker 是否重建 ONNX Runtime 会话)
+MODES = {
+    'preload': ('1', False, False),
+    'preload-ort': ('1', False, True),
+    'no-preload': ('0', False, False),
+    'encoder-socket': ('1', True, False),
+}
+
+
+def read_memory(pid):
+    """
+    读取进程内存（字节）
+
+    返回:
+        dict: {'rss', 'pss', 'uss'}（平台不支持的项为 None）
+    """
+    rollup = f"/proc/{pid}/smaps_rollup"
+    if os.path.exists(rollup):
+        fields = {}
+        with open(rollup) as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[-1] == 'kB':
+                    fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+        uss = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+        return {'rss': fields.get('Rss'), 'pss': fields.get('Pss'), 'uss': uss}
+
+    # macOS 等：只有 RSS
+    output = subprocess.check_output(['ps', '-o', 'rss=', '-p', str(pid)]).decode().strip()
+    return {'rss': int(output) * 1024 if output else None, 'pss': None, 'uss': None}
+
+
+def child_pids(pid):
+    """获取直接子进程 PID 列表"""
+    output = subprocess.run(['pgrep', '-P', str(pid)], capture_output=True).stdout.decode()
+    return [int(p) for p in output.split()]
+
+
+def wait_until_ready(port, expected_workers, master_pid, timeout):
+    """等待所有 worker 启动且 /api/ready 返回 200"""
+    deadline = time.monotonic() + timeout
+    url = f"http://127.0.0.1:{port}/api/ready"
+    consecutive = 0
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                ready = response.status == 200
+        except (urllib.error.URLError, ConnectionError, OSError):
+            ready = False
+        if ready and len(child_pids(master_pid)) >= expected_workers:
+            consecutive += 1
+            # 连续多次就绪：请求可能落在不同 worker 上
+            if consecutive >= expected_workers * 2:
+                return True
+        else:
+            consecutive = 0
+        time.sleep(1)
+    return False
+
+
+def probe_workers(port, requests, sentences):
+    """
+    发送检查请求并读取各 worker 的 ONNX Runtime 线程数
+
+    返回:
+        dict: {'check_seconds': 检查耗时中位数, 'ort_threads': {pid: 线程数}}
+    """
+    timings = []
+    for seed in range(requests):
+        corpus = generate_corpus(sentences, seed=1000 + seed)
+        body = json.dumps({'source_text': corpus['source_text'], 'target_text': corpus['target_text']}).encode('utf-8')
+        request = urllib.request.Request(f"http://127.0.0.1:{port}/api/check", data=body,
+                                         headers={'Content-Type': 'application/json'})
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=600) as response:
+            response.read()
+        timings.append(time.perf_counter() - start)
+
+    # 请求由各 worker 轮流接收，多读几次以覆盖所有 worker
+    ort_threads = {}
+    for _ in range(requests * 2):
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=5) as response:
+            worker = json.loads(response.read())['worker']
+        ort_threads[worker['pid']] = worker['ort_threads']
+    timings.sort()
+    return {'check_seconds': timings[len(timings) // 2] if timings else None, 'ort_threads': ort_threads}
+
+
+def measure_mode(mode, workers, port, timeout, settle, probe_requests, probe_sentences, worker_ort_threads):
+    """
+    启动一种模式并测量内存
+
+    参数:
+        worker_ort_threads: preload-ort 模式下每个 worker 的 ONNX Runtime 线程数
+
+    返回:
+        dict: {'mode', 'master', 'workers': [...], 'total': {...}}
+    """
+    preload, use_socket, rebuild_ort = MODES[mode]
+    env = dict(os.environ)
+    env.update({
+        'TQA_PRELOAD': preload,
+        'TQA_WORKERS': str(workers),
+        'TQA_BIND': f"127.0.0.1:{port}",
+        'TQA_WORKER_ORT_THREADS': str(worker_ort_threads if rebuild_ort else 1),
+    })
+
+    server = None
+    if use_socket:
+        socket_path = f"/tmp/tqa-encoder-{port}.sock"
+        env['TQA_ENCODER_SOCKET'] = socket_path
+        print(f"\n启动编码服务 ({socket_path})...")
+        server = subprocess.Popen(
+            [sys.executable, 'encoder_server.py', '--socket', socket_path],
+            cwd=PROJECT_ROOT, env=env, start_new_session=True,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(socket_path):
+            if time.monotonic() > deadline or server.poll() is not None:
+                os.killpg(server.pid, signal.SIGKILL)
+                raise RuntimeError(f"{mode}: 编码服务未能启动")
+            time.sleep(1)
+
+    print(f"\n启动 gunicorn ({mode}, {workers} 个 worker)...")
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:application'],
+        cwd=PROJECT_ROOT, env=env, start_new_session=True,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        start = time.monotonic()
+        if not wait_until_ready(port, workers, process.pid, timeout):
+            raise RuntimeError(f"{mode}: {timeout} 秒内未就绪")
+        startup_seconds = time.monotonic() - start
+        # 等待内存稳定（worker 的延迟初始化、分配器回收等）
+        time.sleep(settle)
+
+        master = read_memory(process.pid)
+        worker_mem = [dict(pid=pid, **read_memory(pid)) for pid in child_pids(process.pid)]
+        encoder_server = read_memory(server.pid) if server is not None else None
+        total = {}
+        for key in ('rss', 'pss', 'uss'):
+            values = [master[key]] + [w[key] for w in worker_mem]
+            if encoder_server is not None:
+                values.append(encoder_server[key])
+            total[key] = sum(values) if all(v is not None for v in values) else None
+        probe = probe_workers(port, probe_requests, probe_sentences) if probe_requests else {}
+        for worker in worker_mem:
+            worker['ort_threads'] = probe.get('ort_threads', {}).get(worker['pid'])
+        return {
+            'mode': mode,
+            'startup_seconds': round(startup_seconds, 1),
+            'check_seconds': probe.get('check_seconds'),
+            'master': master,
+            'workers': worker_mem,
+            'encoder_server': encoder_server,
+            'total': total,
+        }
+    finally:
+        for proc in (process, server):
+            if proc is None:
+                continue
+            os.killpg(proc.pid, signal.SIGTERM)
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+
+
+def _mb(value):
+    return f"{value / 1024 / 1024:>10.1f}" if value is not None else f"{'-':>10}"
+
+
+def print_report(results):
+    """打印对比表格"""
+    print("\n" + "="*80)
+    print("worker 内存 (MB)")
+    print("="*80)
+    print(f"{'模式':<12}{'进程':<16}{'RSS':>10}{'PSS':>10}{'USS':>10}{'ORT线程':>10}")
+    for item in results:
+        rows = [('master', item['master'])]
+        rows += [(f"worker {w['pid']}", w) for w in item['workers']]
+        if item.get('encoder_server') is not None:
+            rows.append(('encoder_server', item['encoder_server']))
+        rows.append(('总计', item['total']))
+        for name, mem in rows:
+            threads = mem.get('ort_threads')
+            print(f"{item['mode']:<12}{name:<16}{_mb(mem['rss'])}{_mb(mem['pss'])}{_mb(mem['uss'])}"
+                  f"{threads if threads is not None else '-':>10}")
+        print(f"{item['mode']:<12}启动到就绪耗时: {item['startup_seconds']} 秒")
+        if item['check_seconds'] is not None:
+            print(f"{item['mode']:<12}检查耗时中位数: {item['check_seconds']:.2f} 秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量预加载 / 非预加载模式下每个 worker 的内存")
+    parser.add_argument('--modes', default=",".join(MODES),
+                        help="逗号分隔的模式 (preload, preload-ort, no-preload, encoder-socket)")
+    parser.add_argument('--workers', type=int, default=2, help="worker 进程数")
+    parser.add_argument('--worker-ort-threads', type=int, default=0,
+                        help="preload-ort 模式下每个 worker 的 ONNX Runtime 线程数（默认 CPU 核心数 / worker 数，至少 2）")
+    parser.add_argument('--port', type=int, default=5101, help="测试端口")
+    parser.add_argument('--timeout', type=float, default=600, help="等待就绪的最长秒数")
+    parser.add_argument('--settle', type=float, default=5, help="就绪后等待内存稳定的秒数")
+    parser.add_argument('--probe-requests', type=int, default=4, help="测量内存后发送的检查请求数（0 表示不发送）")
+    parser.add_argument('--probe-sentences', type=int, default=200, help="每个检查请求的句子数")
+    parser.add_argument('--output', default="worker_rss.json", help="结果输出路径")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"未知模式: {', '.join(unknown)}")
+    # 线程数为 1 时 worker 不会重建会话，preload-ort 与 preload 相同
+    worker_ort_threads = args.worker_ort_threads or max(2, default_worker_threads(args.workers))
+
+    results = [measure_mode(mode, args.workers, args.port, args.timeout, args.settle,
+                            args.probe_requests, args.probe_sentences, worker_ort_threads) for mode in modes]
+    print_report(results)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 结果已保存: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
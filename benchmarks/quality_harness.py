@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检测质量回归测试
+
+在带金标准标注（已知注入的缺失、增添、语义歪曲和 N:M 合并）的合成平行语料上运行 TranslationQA，
+对每种编码器/对齐器模式统计：
+- 每类异常（缺失 / 增添 / 语义歪曲）的精确率和召回率
+- 句子对齐的 F1（使用 bertalign.eval.score_multiple）
+- 运行耗时
+
+用于在启用加速模式（量化模型、近似 top-k、锚点切分等）之前，用数据确认检测质量没有下降。
+
+使用方法:
+    python benchmarks/quality_harness.py --modes default,fast --sizes 200 --seeds 1,2,3
+    python benchmarks/quality_harness.py --reference default --max-drop 0.02
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+# bertalign 的编码器从当前工作目录加载 labse_onnx
+os.chdir(PROJECT_ROOT)
+
+from benchmarks.synthetic_corpus import generate_corpus
+
+# 模式名 → CheckOptions 参数
+# 新的加速模式（量化编码器、近似 top-k 等）在此注册后即可与基准模式对比
+MODES = {
+    'default': dict(similarity_threshold=0.7, max_align=6, top_k=5, skip=-1.0, win=10,
+                    force_split_threshold=0.3, use_min_similarity=False),
+    'strict': dict(similarity_threshold=0.7, max_align=5, top_k=3, skip=-1.0, win=5,
+                   force_split_threshold=0.5, use_min_similarity=True, auto_split_nm=True),
+    'fast': dict(similarity_threshold=0.7, max_align=3, top_k=1, skip=-1.0, win=3,
+                 force_split_threshold=0.5, use_min_similarity=False),
+}
+
+ANOMALY_TYPES = ['omission', 'addition', 'distortion']
+
+
+def _precision_recall(tp, predicted, gold):
+    """由计数计算精确率、召回率和 F1（没有预测也没有金标准时视为满分）"""
+    precision = tp / predicted if predicted else (1.0 if not gold else 0.0)
+    recall = tp / gold if gold else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+    return {
+        'precision': round(precision, 4),
+        'recall': round(recall, 4),
+        'f1': round(f1, 4),
+        'gold': gold,
+        'predicted': predicted,
+    }
+
+
+def detection_sets(results):
+    """
+    从检查结果中提取预测的异常集合
+
+    参数:
+        results: check_translation() 的返回值
+
+    返回:
+        dict: {'omission': 源索引集合, 'addition': 目标索引集合, 'distortion': 源索引集合}
+    """
+    distorted = set()
+    for item in results['issues']['low_similarity']:
+        distorted.update(item['src_indices'])
+    # 被强制拆散的低相似度对齐组同样算作检出了语义问题
+    for item in results.get('force_split_alignments', []):
+        distorted.update(item['src_indices'])
+    return {
+        'omission': {item['src_index'] for item in results['issues']['omissions']},
+        'addition': {item['tgt_index'] for item in results['issues']['additions']},
+        'distortion': distorted,
+    }
+
+
+def gold_sets(corpus):
+    """从语料的注入记录中提取金标准异常集合"""
+    injected = corpus['injected']
+    return {
+        'omission': set(injected['omissions']),
+        'addition': set(injected['additions']),
+        'distortion': {src for src, _ in injected['distortions']},
+    }
+
+
+def evaluate_mode(qa, mode, sizes, seeds, rates):
+    """
+    评估一种模式
+
+    参数:
+        qa: TranslationQA 实例（各模式共享，参数通过 CheckOptions 传入）
+        mode: MODES 中的模式名
+        sizes: 语料规模列表
+        seeds: 随机种子列表（每个种子一份语料）
+        rates: 注入比例 {'omission_rate', 'addition_rate', 'merge_rate', 'distortion_rate'}
+
+    返回:
+        dict: 该模式的质量与耗时统计
+    """
+    from bertalign.eval import score_multiple
+    from translation_qa_tool import CheckOptions
+
+    options = CheckOptions(**MODES[mode])
+
+    counts = {t: {'tp': 0, 'predicted': 0, 'gold': 0} for t in ANOMALY_TYPES}
+    gold_list, test_list = [], []
+    wall_ms = 0.0
+    sentences = 0
+
+    for size in sizes:
+        for seed in seeds:
+            corpus = generate_corpus(size, seed=seed, **rates)
+            start = time.perf_counter()
+            results = qa.check_translation(
+                source_text=corpus['source_sents'],
+                target_text=corpus['target_sents'],
+                is_split=True,
+                source_language=corpus['source_language'],
+                target_language=corpus['target_language'],
+                options=options
+            )
+            wall_ms += (time.perf_counter() - start) * 1000.0
+            sentences += size
+
+            predicted = detection_sets(results)
+            gold = gold_sets(corpus)
+            for t in ANOMALY_TYPES:
+                counts[t]['tp'] += len(predicted[t] & gold[t])
+                counts[t]['predicted'] += len(predicted[t])
+                counts[t]['gold'] += len(gold[t])
+
+            gold_list.append(corpus['gold_alignments'])
+            test_list.append([(item['src_indices'], item['tgt_indices'])
+                              for item in results['alignments']])
+
+    anomalies = {t: _precision_recall(**counts[t]) for t in ANOMALY_TYPES}
+
+    alignment = {k: round(float(v), 4) for k, v in score_multiple(gold_list, test_list).items()}
+
+    return {
+        'mode': mode,
+        'config': MODES[mode],
+        'anomalies': anomalies,
+        'alignment': alignment,
+        'runtime': {
+            'wall_ms': round(wall_ms, 3),
+            'sentences_per_second': round(sentences / (wall_ms / 1000.0), 2) if wall_ms > 0 else None,
+        },
+    }
+
+
+def find_quality_drops(report, reference, max_drop):
+    """
+    找出相对参考模式质量下降超过 max_drop 的指标
+
+    返回:
+        drops: [{'mode', 'metric', 'reference', 'value'}, ...]
+    """
+    ref = report['modes'].get(reference)
+    if not ref:
+        return []
+    drops = []
+    for mode, item in report['modes'].items():
+        if mode == reference:
+            continue
+        metrics = [(f"{t}.recall", item['anomalies'][t]['recall'], ref['anomalies'][t]['recall'])
+                   for t in ANOMALY_TYPES]
+        metrics += [(f"{t}.precision", item['anomalies'][t]['precision'], ref['anomalies'][t]['precision'])
+                    for t in ANOMALY_TYPES]
+        metrics.append(('alignment.f1_strict', item['alignment']['f1_strict'], ref['alignment']['f1_strict']))
+        for name, value, ref_value in metrics:
+            if ref_value - value > max_drop:
+                drops.append({'mode': mode, 'metric': name, 'reference': ref_value, 'value': value})
+    return drops
+
+
+def print_report(report):
+    """打印各模式的对比表格"""
+    print("\n" + "="*80)
+    print("检测质量对比")
+    print("="*80)
+    header = f"{'模式':<10}" + "".join(f"{t[:4] + ' P/R':>14}" for t in ANOMALY_TYPES) \
+        + f"{'对齐F1':>10}{'耗时(s)':>10}{'句/秒':>10}"
+    print(header)
+    for mode, item in report['modes'].items():
+        row = f"{mode:<10}"
+        for t in ANOMALY_TYPES:
+            a = item['anomalies'][t]
+            row += f"{a['precision']:.3f}/{a['recall']:.3f}".rjust(14)
+        row += f"{item['alignment']['f1_strict']:>10.3f}"
+        row += f"{item['runtime']['wall_ms'] / 1000.0:>10.2f}"
+        row += f"{item['runtime']['sentences_per_second'] or 0:>10.1f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TranslationQA 检测质量回归测试")
+    parser.add_argument('--modes', default=",".join(MODES), help=f"逗号分隔的模式 (可选: {', '.join(MODES)})")
+    parser.add_argument('--sizes', default="200", help="逗号分隔的语料规模")
+    parser.add_argument('--seeds', default="1,2,3", help="逗号分隔的随机种子")
+    parser.add_argument('--omission-rate', type=float, default=0.05)
+    parser.add_argument('--addition-rate', type=float, default=0.05)
+    parser.add_argument('--merge-rate', type=float, default=0.05)
+    parser.add_argument('--distortion-rate', type=float, default=0.05)
+    parser.add_argument('--reference', default='default', help="作为质量参考的模式")
+    parser.add_argument('--max-drop', type=float, default=0.02,
+                        help="允许相对参考模式下降的最大绝对值（超过时退出码为 1）")
+    parser.add_argument('--output', default="quality_results.json", help="结果输出路径")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in MODES]
+    if unknown:
+        parser.error(f"未知模式: {', '.join(unknown)}")
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    seeds = [int(s) for s in args.seeds.split(",") if s.strip()]
+    rates = {
+        'omission_rate': args.omission_rate,
+        'addition_rate': args.addition_rate,
+        'merge_rate': args.merge_rate,
+        'distortion_rate': args.distortion_rate,
+    }
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'corpus': {'sizes': sizes, 'seeds': seeds, **rates},
+        'modes': {},
+    }
+    from translation_qa_tool import TranslationQA
+    qa = TranslationQA()
+    for mode in modes:
+        print(f"\n评估模式: {mode}")
+        report['modes'][mode] = evaluate_mode(qa, mode, sizes, seeds, rates)
+
+    print_report(report)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 结果已保存: {args.output}")
+
+    drops = find_quality_drops(report, args.reference, args.max_drop)
+    if drops:
+        print(f"\n❌ 以下模式相对 {args.reference} 质量下降超过 {args.max_drop}:")
+        for d in drops:
+            print(f"  {d['mode']} / {d['metric']}: {d['reference']:.3f} → {d['value']:.3f}")
+        return 1
+
+    print(f"\n✓ 所有模式相对 {args.reference} 的质量下降均在 {args.max_drop} 以内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
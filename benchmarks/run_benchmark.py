@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端性能基准测试
+
+对不同规模的合成平行语料运行完整的翻译质量检查流水线，
+按阶段（分句、语言检测、编码、第一遍对齐、第二遍对齐、相似度计算、报告导出）统计耗时，
+输出机器可读的 JSON 结果，并与已保存的基线比较（超过容忍度视为性能回退）。
+
+使用方法:
+    # 运行并写出结果
+    python benchmarks/run_benchmark.py --sizes 100,1000 --output bench_results.json
+
+    # 将本次结果保存为基线
+    python benchmarks/run_benchmark.py --sizes 100,1000 --update-baseline
+
+    # 与基线比较（回退时退出码为 1）
+    python benchmarks/run_benchmark.py --sizes 100,1000 --baseline benchmarks/baseline.json --tolerance 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_corpus import generate_corpus
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, "benchmarks", "baseline.json")
+
+# check_translation 记录的阶段 → 基准报告中的阶段
+STAGE_GROUPS = {
+    'split': ['split_source', 'split_target'],
+    'detect': ['detect_source', 'detect_target'],
+    'encode': ['encode'],
+    'first_pass': ['first_pass'],
+    'second_pass': ['second_pass'],
+    'score': ['score', 'auto_split_nm', 'detect_issues'],
+}
+STAGES = list(STAGE_GROUPS) + ['report', 'total']
+
+
+def _git_revision():
+    """获取当前 git 提交（不可用时返回 None）"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def run_once(qa, corpus, report_dir):
+    """
+    运行一次完整流水线
+
+    参数:
+        qa: TranslationQA 实例
+        corpus: generate_corpus() 的返回值
+        report_dir: 报告导出目录
+
+    返回:
+        stages: {阶段名: {'wall_ms', 'cpu_ms'}}
+    """
+    start = time.perf_counter()
+    results = qa.check_translation(
+        source_text=corpus['source_text'],
+        target_text=corpus['target_text'],
+        is_split=False,
+        source_language='auto',
+        target_language='auto'
+    )
+
+    report_start = time.perf_counter()
+    report_cpu_start = time.process_time()
+    qa.save_report_csv(results, os.path.join(report_dir, "report.csv"))
+    qa.save_report_json(results, os.path.join(report_dir, "report.json"))
+    report_wall = (time.perf_counter() - report_start) * 1000.0
+    report_cpu = (time.process_time() - report_cpu_start) * 1000.0
+
+    recorded = results['metadata']['performance']['stages']
+    stages = {}
+    for group, names in STAGE_GROUPS.items():
+        matched = [s for s in recorded if s['stage'] in names]
+        stages[group] = {
+            'wall_ms': sum(s['wall_ms'] for s in matched),
+            'cpu_ms': sum(s['cpu_ms'] for s in matched),
+        }
+    stages['report'] = {'wall_ms': report_wall, 'cpu_ms': report_cpu}
+    stages['total'] = {
+        'wall_ms': (time.perf_counter() - start) * 1000.0,
+        'cpu_ms': sum(v['cpu_ms'] for v in stages.values()),
+    }
+    return stages, results
+
+
+def run_benchmark(sizes, repeat=1, seed=42, warmup=True):
+    """
+    运行基准测试
+
+    参数:
+        sizes: 句子规模列表
+        repeat: 每个规模重复次数（取中位数）
+        seed: 语料随机种子
+        warmup: 是否先用小语料预热（numba JIT、模型加载不计入结果）
+
+    返回:
+        report: 机器可读的结果字典
+
+    异常:
+        ValueError: repeat 小于 1
+    """
+    if repeat < 1:
+        raise ValueError(f"repeat 必须 >= 1，实际为 {repeat}")
+
+    from translation_qa_tool import TranslationQA
+
+    qa = TranslationQA(
+        similarity_threshold=0.7,
+        max_align=6,
+        top_k=5,
+        skip=-1.0,
+        win=10,
+        auto_detect_language=True,
+        force_split_threshold=0.3,
+        use_min_similarity=False
+    )
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'git_revision': _git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'seed': seed,
+            'repeat': repeat,
+            'max_align': qa.max_align,
+            'top_k': qa.top_k,
+            'win': qa.win,
+        },
+        'results': {},
+    }
+
+    with tempfile.TemporaryDirectory() as report_dir:
+        if warmup:
+            print("\n预热（不计入结果）...")
+            run_once(qa, generate_corpus(20, seed=seed), report_dir)
+
+        for size in sizes:
+            corpus = generate_corpus(size, seed=seed)
+            runs = []
+            for _ in range(repeat):
+                stages, results = run_once(qa, corpus, report_dir)
+                runs.append(stages)
+
+            summary = {}
+            for stage in STAGES:
+                summary[stage] = {
+                    'wall_ms': round(statistics.median(r[stage]['wall_ms'] for r in runs), 3),
+                    'cpu_ms': round(statistics.median(r[stage]['cpu_ms'] for r in runs), 3),
+                }
+            total_s = summary['total']['wall_ms'] / 1000.0
+            report['results'][str(size)] = {
+                'source_sentences': results['metadata']['source_sentences'],
+                'target_sentences': results['metadata']['target_sentences'],
+                'sentences_per_second': round(size / total_s, 2) if total_s > 0 else None,
+                'peak_rss_bytes': results['metadata']['performance']['peak_rss_bytes'],
+                'stages': summary,
+            }
+            print(f"\n✓ {size}句: 总耗时 {summary['total']['wall_ms']:.1f} ms")
+
+    return report
+
+
+def compare_with_baseline(report, baseline, tolerance=0.2, min_delta_ms=5.0):
+    """
+    与基线比较
+
+    参数:
+        report: 本次结果
+        baseline: 基线结果
+        tolerance: 允许的相对变慢比例（0.2 表示慢 20% 以内不算回退）
+        min_delta_ms: 绝对差值低于此值时忽略（避免小阶段的计时噪声）
+
+    返回:
+        regressions: 回退列表 [{'size', 'stage', 'baseline_ms', 'current_ms', 'ratio'}, ...]
+    """
+    regressions = []
+    for size, current in report['results'].items():
+        base = baseline.get('results', {}).get(size)
+        if not base:
+            continue
+        for stage, timing in current['stages'].items():
+            base_ms = base['stages'].get(stage, {}).get('wall_ms')
+            if not base_ms:
+                continue
+            cur_ms = timing['wall_ms']
+            ratio = cur_ms / base_ms
+            if ratio > 1.0 + tolerance and cur_ms - base_ms > min_delta_ms:
+                regressions.append({
+                    'size': int(size),
+                    'stage': stage,
+                    'baseline_ms': base_ms,
+                    'current_ms': cur_ms,
+                    'ratio': round(ratio, 3),
+                })
+    return regressions
+
+
+def print_report(report):
+    """打印结果表格"""
+    print("\n" + "="*80)
+    print("性能基准测试结果 (wall ms)")
+    print("="*80)
+    header = f"{'句子数':>8} " + " ".join(f"{s:>11}" for s in STAGES)
+    print(header)
+    for size, item in report['results'].items():
+        row = f"{size:>8} " + " ".join(f"{item['stages'][s]['wall_ms']:>11.1f}" for s in STAGES)
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TranslationQA 端到端性能基准测试")
+    parser.add_argument('--sizes', default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="逗号分隔的句子规模 (默认: 100,1000,10000,100000)")
+    parser.add_argument('--repeat', type=int, default=1, help="每个规模重复次数，取中位数")
+    parser.add_argument('--seed', type=int, default=42, help="语料随机种子")
+    parser.add_argument('--no-warmup', action='store_true', help="不预热")
+    parser.add_argument('--output', default="bench_results.json", help="结果输出路径")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基线文件路径")
+    parser.add_argument('--update-baseline', action='store_true', help="将本次结果保存为基线")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="允许的相对变慢比例")
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help="忽略小于此值的绝对差值")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat 必须 >= 1")
+
+    # 输出路径相对于调用时的目录；bertalign 的编码器从当前工作目录加载 labse_onnx
+    args.output = os.path.abspath(args.output)
+    args.baseline = os.path.abspath(args.baseline)
+    os.chdir(PROJECT_ROOT)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    report = run_benchmark(sizes, repeat=args.repeat, seed=args.seed, warmup=not args.no_warmup)
+    print_report(report)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 结果已保存: {args.output}")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✓ 基线已更新: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  基线文件不存在，跳过比较: {args.baseline}")
+        print("   使用 --update-baseline 生成基线")
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    regressions = compare_with_baseline(report, baseline, args.tolerance, args.min_delta_ms)
+    if regressions:
+        print(f"\n❌ 发现 {len(regressions)} 处性能回退 (容忍度 {args.tolerance:.0%}):")
+        for r in regressions:
+            print(f"  {r['size']}句 / {r['stage']}: {r['baseline_ms']:.1f} ms → "
+                  f"{r['current_ms']:.1f} ms (x{r['ratio']})")
+        return 1
+
+    print(f"\n✓ 与基线相比无性能回退 (容忍度 {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
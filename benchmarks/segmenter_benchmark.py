@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+spaCy 分句方式对比
+
+对每种语言比较 TextSplitter 的三种 spaCy 分句方式（见 text_splitter.load_spacy_pipeline）：
+- full: 完整管道（tagger、parser、lemmatizer、NER 等全部运行，依存句法决定句子边界）
+- senter: 只保留统计分句组件
+- sentencizer: 只保留分词器 + 标点规则
+
+报告加载耗时、管道组件、吞吐（字符/秒）、句子数，以及与第一种方式（默认 full）
+分句结果的差异（一致比例和不同句子的示例）。英语默认使用合成语料，另有金标准句子时报告与金标准一致的比例。
+
+使用方法:
+    python benchmarks/segmenter_benchmark.py --sentences 2000
+    python benchmarks/segmenter_benchmark.py --languages en,fr --text fr=samples/fr.txt --repeat 3
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_corpus import generate_corpus
+from text_splitter import TextSplitter, load_spacy_pipeline
+
+
+def split(nlp, text):
+    """与 TextSplitter._split_paragraphs 相同的句子提取"""
+    return [s for s in (sent.text.strip() for sent in nlp(text).sents) if s]
+
+
+def sentence_diff(sentences, reference):
+    """
+    返回:
+        (不在参考结果中的句子列表, 与参考结果一致的句子比例)
+    """
+    reference_set = set(reference)
+    extra = [s for s in sentences if s not in reference_set]
+    matched = len(set(sentences) & reference_set)
+    return extra, matched / len(reference_set) if reference_set else 1.0
+
+
+def load_texts(args):
+    """
+    返回:
+        dict: {语言: (文本, 金标准句子列表或 None)}
+    """
+    texts = {}
+    for item in args.text:
+        language, path = item.split('=', 1)
+        with open(path, encoding='utf-8') as f:
+            texts[language] = (f.read(), None)
+    if 'en' not in texts:
+        corpus = generate_corpus(args.sentences, seed=args.seed)
+        texts['en'] = (corpus['source_text'], corpus['source_sents'])
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="spaCy 分句方式对比")
+    parser.add_argument('--languages', default='en', help="语言代码，逗号分隔（默认 en）")
+    parser.add_argument('--segmenters', default=','.join(TextSplitter.SEGMENTERS), help="分句方式，逗号分隔")
+    parser.add_argument('--text', action='append', default=[],
+                        help="语言=文本文件路径（可重复；英语未指定时使用合成语料）")
+    parser.add_argument('--sentences', type=int, default=2000, help="合成英语语料的句子数")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    parser.add_argument('--repeat', type=int, default=3, help="每种方式的重复次数（取最快）")
+    parser.add_argument('--examples', type=int, default=3, help="每种方式打印的差异示例数")
+    parser.add_argument('--output', default=None, help="结果 JSON 输出路径")
+    args = parser.parse_args()
+
+    texts = load_texts(args)
+    segmenters = args.segmenters.split(',')
+    results = []
+
+    for language in args.languages.split(','):
+        model_name = TextSplitter.SPACY_MODELS.get(language)
+        if model_name is None or language not in texts:
+            print(f"⚠️  跳过 {language}：没有 spaCy 模型或文本（用 --text {language}=路径 指定）")
+            continue
+        text, gold = texts[language]
+        print(f"\n{language} ({model_name})：{len(text)} 字符")
+
+        # 参考结果为第一种方式（默认 full）的分句
+        reference, reference_name = None, segmenters[0]
+        for segmenter in segmenters:
+            start = time.perf_counter()
+            try:
+                nlp, _ = load_spacy_pipeline(model_name, segmenter)
+            except OSError as e:
+                print(f"❌ 模型未安装: {e}")
+                break
+            load_seconds = time.perf_counter() - start
+
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                sentences = split(nlp, text)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            if reference is None:
+                reference = sentences
+            extra, agreement = sentence_diff(sentences, reference)
+            result = {
+                'language': language,
+                'segmenter': segmenter,
+                'components': nlp.pipe_names,
+                'load_seconds': load_seconds,
+                'seconds': best,
+                'chars_per_second': len(text) / best if best else 0.0,
+                'sentences': len(sentences),
+                'reference': reference_name,
+                'agreement_with_reference': agreement,
+            }
+            if gold is not None:
+                result['agreement_with_gold'] = sentence_diff(sentences, gold)[1]
+            results.append(result)
+
+            gold_text = f"，与金标准一致 {result['agreement_with_gold']:.1%}" if gold is not None else ""
+            print(f"  {segmenter:<12} 组件 [{', '.join(nlp.pipe_names)}]")
+            print(f"  {'':<12} 加载 {load_seconds:.2f}s，{result['chars_per_second'] / 1000:.0f}k 字符/秒，"
+                  f"{len(sentences)} 句，与 {reference_name} 一致 {agreement:.1%}{gold_text}")
+            for sentence in extra[:args.examples]:
+                print(f"  {'':<12} ≠ {sentence[:100]}")
+
+        full = next((r for r in results if r['language'] == language and r['segmenter'] == 'full'), None)
+        if full:
+            for r in results:
+                if r['language'] == language and r['segmenter'] != 'full':
+                    print(f"  {r['segmenter']} 相对 full 加速 {full['seconds'] / r['seconds']:.1f}x")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
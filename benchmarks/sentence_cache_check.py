@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分句缓存一致性检查
+
+分句缓存只能省掉重复的分句，不能改变结果。本脚本对每种语言比较 TextSplitter
+关闭缓存与启用缓存（首次提交、原样重新提交、改动几个段落后重新提交）的分句结果，
+任何一处不同即报告差异并以退出码 1 结束。
+
+文本包括 synthetic_corpus 的合成语料、按固定宽度硬换行后的同一语料（句子跨行），
+以及空行、标题、引号结尾等边界情况。
+
+使用方法:
+    python benchmarks/sentence_cache_check.py
+    python benchmarks/sentence_cache_check.py --languages en,zh,fr --sentences 500 --wrap 60
+"""
+
+import argparse
+import os
+import sys
+import textwrap
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_corpus import generate_corpus
+from sentence_cache import SentenceCache
+from text_splitter import TextSplitter
+
+# 边界情况：硬换行、空行分隔的标题、引号/括号结尾、没有句末标点的最后一行
+EDGE_CASES = {
+    'zh': [
+        "第一句话被换行\n打断了。",
+        "标题\n\n正文第一句。正文第二句！\n他说：“好的。”\n最后一行没有句号",
+        "（括号里的句子。）\n\n\n  缩进的一行。",
+    ],
+    'default': [
+        "This sentence is hard-wrapped\nacross two lines.",
+        "Heading\n\nBody text starts here. It goes on!\nHe said \"fine.\"\nLast line without a stop",
+        "(A parenthetical sentence.)\n\n\n   Indented line. Another one?",
+    ],
+}
+
+
+def hard_wrap(text, width, language):
+    """按固定宽度硬换行（模拟从 PDF 或邮件复制的文本）"""
+    if language == 'zh':
+        return "\n".join("\n".join(line[i:i + width] for i in range(0, len(line), width))
+                         for line in text.split("\n"))
+    return "\n".join(textwrap.fill(line, width) for line in text.split("\n"))
+
+
+def edit_paragraphs(text, every):
+    """每隔 every 行改动一行（模拟修改过几个段落的文档）"""
+    lines = text.split("\n")
+    for i in range(0, len(lines), every):
+        lines[i] = lines[i][::-1]
+    return "\n".join(lines)
+
+
+def report_diff(name, expected, actual):
+    """打印第一处差异"""
+    for i, (a, b) in enumerate(zip(expected, actual)):
+        if a != b:
+            print(f"    第 {i} 句不同:\n      关闭缓存: {a[:100]!r}\n      启用缓存: {b[:100]!r}")
+            return
+    print(f"    句子数不同: 关闭缓存 {len(expected)}，启用缓存 {len(actual)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分句缓存一致性检查")
+    parser.add_argument('--languages', default='en,zh', help="语言代码，逗号分隔（zh 使用合成译文，其余使用合成原文）")
+    parser.add_argument('--sentences', type=int, default=300, help="合成语料的句子数")
+    parser.add_argument('--wrap', type=int, default=40, help="硬换行的宽度（字符）")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.sentences, seed=args.seed)
+    uncached = TextSplitter(auto_detect=False)
+    failures = 0
+
+    for language in args.languages.split(','):
+        text = corpus['target_text'] if language == 'zh' else corpus['source_text']
+        texts = {
+            'corpus': text,
+            'hard-wrapped': hard_wrap(text, args.wrap, language),
+        }
+        for i, edge in enumerate(EDGE_CASES.get(language, EDGE_CASES['default'])):
+            texts[f"edge-{i}"] = edge
+
+        # 每种语言一个新缓存：首次提交全部未命中，之后的提交部分或全部命中
+        cached = TextSplitter(auto_detect=False, sentence_cache=SentenceCache())
+        print(f"\n{language}:")
+        for name, sample in texts.items():
+            for variant, variant_text in (('首次', sample), ('重新提交', sample),
+                                          ('改动后', edit_paragraphs(sample, 5))):
+                expected = uncached.split_sentences(variant_text, language)
+                actual = cached.split_sentences(variant_text, language)
+                if expected == actual:
+                    print(f"  ✓ {name:<14}{variant:<8}{len(expected)} 句一致")
+                else:
+                    failures += 1
+                    print(f"  ❌ {name:<14}{variant:<8}结果不同")
+                    report_diff(name, expected, actual)
+        batch = list(texts.values())
+        if uncached.split_batch(batch, language) != cached.split_batch(batch, language):
+            failures += 1
+            print("  ❌ split_batch 结果不同")
+        else:
+            print(f"  ✓ split_batch ({len(batch)} 个文本) 一致")
+
+    if failures:
+        print(f"\n❌ {failures} 处分句结果因缓存而不同")
+        return 1
+    print("\n✓ 启用缓存与关闭缓存的分句结果完全一致")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
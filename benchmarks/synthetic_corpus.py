@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成双语平行语料生成器
+
+使用固定随机种子和一个小型英中双语词表，按模板生成可复现的平行句对，
+并按比例注入以下异常（同时记录金标准对齐）：
+- 缺失 (omission): 删除某句源文本对应的译文 → ([i], [])
+- 增添 (addition): 在译文中插入一句无对应的句子 → ([], [j])
+- N:M 合并 (merge): 将连续两句源文本合译为一句译文 → ([i, i+1], [j])
+- 语义歪曲 (distortion): 译文保留主语/时间/地点，但替换谓语和宾语 → ([i], [j])
+
+金标准对齐的格式与 bertalign.eval 一致：[(src_indices, tgt_indices), ...]
+"""
+
+import random
+
+# 英中双语词表（按词性分组，每项为 (英文, 中文)）
+SUBJECTS = [
+    ("the engineer", "工程师"), ("the teacher", "老师"), ("the doctor", "医生"),
+    ("the committee", "委员会"), ("the company", "公司"), ("the student", "学生"),
+    ("the farmer", "农民"), ("the pilot", "飞行员"), ("the author", "作者"),
+    ("the government", "政府"), ("the team", "团队"), ("the scientist", "科学家"),
+]
+VERBS = [
+    ("repaired", "修好了"), ("inspected", "检查了"), ("designed", "设计了"),
+    ("sold", "卖掉了"), ("described", "描述了"), ("cleaned", "清洗了"),
+    ("painted", "粉刷了"), ("approved", "批准了"), ("measured", "测量了"),
+    ("moved", "搬走了"), ("tested", "测试了"), ("ordered", "订购了"),
+]
+OBJECTS = [
+    ("the old bridge", "那座旧桥"), ("a new engine", "一台新发动机"), ("the annual report", "年度报告"),
+    ("the red car", "那辆红色汽车"), ("the small garden", "那个小花园"), ("the wooden table", "那张木桌"),
+    ("the water pump", "那台水泵"), ("the school library", "学校图书馆"), ("the budget plan", "预算方案"),
+    ("the power station", "发电站"), ("the hospital roof", "医院的屋顶"), ("the train schedule", "列车时刻表"),
+]
+TIMES = [
+    ("yesterday", "昨天"), ("last week", "上周"), ("this morning", "今天早上"),
+    ("in March", "三月份"), ("after lunch", "午饭后"), ("on Friday", "星期五"),
+    ("two years ago", "两年前"), ("at midnight", "半夜"),
+]
+PLACES = [
+    ("in the city", "在城里"), ("near the river", "在河边"), ("at the factory", "在工厂"),
+    ("in the village", "在村子里"), ("at the airport", "在机场"), ("on the island", "在岛上"),
+]
+
+
+def _sample_parts(rng):
+    """随机抽取一个句子的各个成分"""
+    return {
+        'subj': rng.choice(SUBJECTS),
+        'verb': rng.choice(VERBS),
+        'obj': rng.choice(OBJECTS),
+        'when': rng.choice(TIMES),
+        'where': rng.choice(PLACES),
+    }
+
+
+def _render(parts):
+    """将句子成分渲染为 (英文句子, 中文句子)"""
+    subj, verb, obj, when, where = (parts['subj'], parts['verb'], parts['obj'],
+                                    parts['when'], parts['where'])
+    en = f"{subj[0]} {verb[0]} {obj[0]} {where[0]} {when[0]}."
+    en = en[0].upper() + en[1:]
+    zh = f"{subj[1]}{when[1]}{where[1]}{verb[1]}{obj[1]}。"
+    return en, zh
+
+
+def generate_sentence_pair(rng):
+    """
+    生成一个平行句对
+
+    参数:
+        rng: random.Random 实例
+
+    返回:
+        (英文句子, 中文句子)
+    """
+    return _render(_sample_parts(rng))
+
+
+def _distort(rng, parts):
+    """替换谓语和宾语，生成语义被歪曲的译文"""
+    distorted = dict(parts)
+    distorted['verb'] = rng.choice([v for v in VERBS if v != parts['verb']])
+    distorted['obj'] = rng.choice([o for o in OBJECTS if o != parts['obj']])
+    return _render(distorted)[1]
+
+
+def generate_corpus(num_sentences, seed=42, omission_rate=0.02, addition_rate=0.02,
+                    merge_rate=0.03, distortion_rate=0.0, paragraph_size=8):
+    """
+    生成带异常注入的合成平行语料
+
+    参数:
+        num_sentences: 源文本句子数
+        seed: 随机种子（相同参数 + 相同种子 → 完全相同的语料）
+        omission_rate: 缺失注入比例
+        addition_rate: 增添注入比例
+        merge_rate: 2:1 合并注入比例
+        distortion_rate: 语义歪曲注入比例
+        paragraph_size: 每段句子数（用于生成带换行的原始文本）
+
+    返回:
+        corpus: {
+            'source_sents': 源句子列表,
+            'target_sents': 目标句子列表,
+            'source_text': 源文本（按段落换行）,
+            'target_text': 目标文本（按段落换行）,
+            'source_language': 'en',
+            'target_language': 'zh',
+            'gold_alignments': [(src_indices, tgt_indices), ...],
+            'injected': {'omissions': [...], 'additions': [...], 'merges': [...], 'distortions': [...]}
+        }
+    """
+    rng = random.Random(seed)
+    parts = [_sample_parts(rng) for _ in range(num_sentences)]
+    pairs = [_render(p) for p in parts]
+
+    source_sents = [en for en, _ in pairs]
+    target_sents = []
+    gold_alignments = []
+    injected = {'omissions': [], 'additions': [], 'merges': [], 'distortions': []}
+
+    i = 0
+    while i < num_sentences:
+        roll = rng.random()
+        if roll < addition_rate:
+            # 增添：插入一句与源文本无关的译文
+            _, extra_zh = generate_sentence_pair(rng)
+            injected['additions'].append(len(target_sents))
+            gold_alignments.append(([], [len(target_sents)]))
+            target_sents.append(extra_zh)
+            roll = rng.random()
+
+        if roll < omission_rate:
+            # 缺失：源句子没有译文
+            injected['omissions'].append(i)
+            gold_alignments.append(([i], []))
+            i += 1
+        elif roll < omission_rate + merge_rate and i + 1 < num_sentences:
+            # 合并：两句源文本合译为一句
+            merged = pairs[i][1].rstrip("。") + "，" + pairs[i + 1][1]
+            injected['merges'].append(([i, i + 1], len(target_sents)))
+            gold_alignments.append(([i, i + 1], [len(target_sents)]))
+            target_sents.append(merged)
+            i += 2
+        elif roll < omission_rate + merge_rate + distortion_rate:
+            # 语义歪曲：对齐关系不变，但译文意思被改变
+            injected['distortions'].append((i, len(target_sents)))
+            gold_alignments.append(([i], [len(target_sents)]))
+            target_sents.append(_distort(rng, parts[i]))
+            i += 1
+        else:
+            gold_alignments.append(([i], [len(target_sents)]))
+            target_sents.append(pairs[i][1])
+            i += 1
+
+    return {
+        'source_sents': source_sents,
+        'target_sents': target_sents,
+        'source_text': _join_paragraphs(source_sents, paragraph_size, " "),
+        'target_text': _join_paragraphs(target_sents, paragraph_size, ""),
+        'source_language': 'en',
+        'target_language': 'zh',
+        'gold_alignments': gold_alignments,
+        'injected': injected,
+    }
+
+
+def _join_paragraphs(sents, paragraph_size, sep):
+    """按固定句数拼接段落，段落之间用换行分隔"""
+    paragraphs = []
+    for start in range(0, len(sents), paragraph_size):
+        paragraphs.append(sep.join(sents[start:start + paragraph_size]))
+    return "\n".join(paragraphs)
+
+
+if __name__ == "__main__":
+    corpus = generate_corpus(20, seed=1)
+    print(corpus['source_text'])
+    print()
+    print(corpus['target_text'])
+    print()
+    print("注入异常:", corpus['injected'])
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+词匹配算法基准测试
+
+在合成的词相似度矩阵上比较旧版逐词贪心匹配 (greedy) 和 word_matching 中的向量化算法：
+- 耗时：每个算法重复运行取中位数
+- 质量：与金标准对齐（合成时已知的词对应关系）比较的精确率、召回率和 F1
+
+合成方式：随机生成源词向量，目标词向量为打乱顺序的源词向量加噪声，
+另外加入若干没有对应关系的增添词；不需要模型和分词器。
+
+使用方法:
+    python benchmarks/word_matching_benchmark.py --words 200
+    python benchmarks/word_matching_benchmark.py --words 50,200,500 --noise 0.8 --output word_matching.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from word_matching import MATCHERS, greedy_alignment, linear_sum_assignment
+
+
+def synthetic_similarity(n_words, noise, extra_ratio, dim, seed):
+    """
+    生成合成的相似度矩阵
+
+    参数:
+        n_words: 源词数
+        noise: 目标词向量的噪声强度（相对于单位向量）
+        extra_ratio: 源/目标两侧各自增添的无对应词比例
+        dim: 向量维度
+        seed: 随机种子
+
+    返回:
+        (similarity, gold): (m, n) 相似度矩阵和 (m, n) 金标准布尔矩阵
+    """
+    rng = np.random.default_rng(seed)
+
+    def normalize(x):
+        return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+    n_extra = int(n_words * extra_ratio)
+    source = normalize(rng.standard_normal((n_words + n_extra, dim)))
+    order = rng.permutation(n_words)
+    translated = normalize(source[order] + noise * normalize(rng.standard_normal((n_words, dim))))
+    target = np.vstack([translated, normalize(rng.standard_normal((n_extra, dim)))])
+    shuffle = rng.permutation(len(target))
+    target = target[shuffle]
+
+    gold = np.zeros((len(source), len(target)), dtype=bool)
+    # 打乱后位置 j 的目标词来自 shuffle[j]；shuffle[j] < n_words 时对应源词 order[shuffle[j]]
+    for tgt_idx, original in enumerate(shuffle):
+        if original < n_words:
+            gold[order[original], tgt_idx] = True
+    return (source @ target.T).astype(np.float32), gold
+
+
+def score(aligned, gold):
+    """
+    返回:
+        dict: {'precision', 'recall', 'f1', 'pairs'}
+    """
+    correct = int((aligned & gold).sum())
+    predicted = int(aligned.sum())
+    expected = int(gold.sum())
+    precision = correct / predicted if predicted else 0.0
+    recall = correct / expected if expected else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {'precision': precision, 'recall': recall, 'f1': f1, 'pairs': predicted}
+
+
+def time_matcher(matcher, similarity, repeat):
+    """运行 repeat 次，返回 (结果, 中位耗时毫秒)"""
+    timings = []
+    aligned = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        aligned = matcher(similarity)
+        timings.append((time.perf_counter() - start) * 1000)
+    return aligned, float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="词匹配算法基准测试")
+    parser.add_argument('--words', default='200', help="源词数，逗号分隔（默认 200）")
+    parser.add_argument('--noise', type=float, default=0.6, help="目标词向量噪声强度")
+    parser.add_argument('--extra', type=float, default=0.1, help="两侧增添词比例")
+    parser.add_argument('--dim', type=int, default=768, help="词向量维度")
+    parser.add_argument('--repeat', type=int, default=20, help="每个算法的重复次数")
+    parser.add_argument('--seed', type=int, default=1, help="随机种子")
+    parser.add_argument('--output', default=None, help="结果 JSON 输出路径")
+    args = parser.parse_args()
+
+    matchers = {'greedy': greedy_alignment}
+    for name, matcher in MATCHERS.items():
+        if name == 'optimal' and linear_sum_assignment is None:
+            print("⚠️  scipy 未安装，跳过 optimal")
+            continue
+        if name == 'intersection':
+            continue  # 与 argmax 相同
+        matchers[name] = matcher
+
+    results = []
+    for n_words in [int(n) for n in args.words.split(',')]:
+        similarity, gold = synthetic_similarity(n_words, args.noise, args.extra, args.dim, args.seed)
+        print(f"\n词数 {similarity.shape[0]}×{similarity.shape[1]}（噪声 {args.noise}，增添 {args.extra:.0%}）")
+        print(f"  {'算法':<10}{'耗时(ms)':>10}{'加速比':>8}{'词对':>8}{'精确率':>8}{'召回率':>8}{'F1':>8}")
+        baseline_ms = None
+        for name, matcher in matchers.items():
+            aligned, elapsed_ms = time_matcher(matcher, similarity, args.repeat)
+            if baseline_ms is None:
+                baseline_ms = elapsed_ms
+            metrics = score(aligned, gold)
+            print(f"  {name:<10}{elapsed_ms:>10.3f}{baseline_ms / elapsed_ms:>8.1f}x{metrics['pairs']:>7}"
+                  f"{metrics['precision']:>8.3f}{metrics['recall']:>8.3f}{metrics['f1']:>8.3f}")
+            results.append({'words': n_words, 'matcher': name, 'ms': elapsed_ms, **metrics})
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+词对齐中文分词方式的延迟和内存对比
+
+对 WordAligner 的每种中文分词方式（hanlp / jieba / rule）分别启动一个子进程，测量：
+- 加载耗时和加载后增加的常驻内存 (RSS)
+- 逐句调用（旧行为：每个句子调用一次分词器）的总耗时
+- 批量调用（tokenize_batch，一次传入所有句子）的总耗时
+- 与 hanlp 分词结果的词数差异（供评估轻量分词方式对词对齐粒度的影响）
+
+句子来自 synthetic_corpus 的中文译文（可复现）。只测分词，不加载 LaBSE 模型。
+
+使用方法:
+    python benchmarks/zh_tokenizer_benchmark.py --sentences 500
+    python benchmarks/zh_tokenizer_benchmark.py --tiers jieba,rule --output zh_tokenizers.json
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic_corpus import generate_sentence_pair
+
+TIERS = ('hanlp', 'jieba', 'rule')
+
+
+def current_rss():
+    """当前进程的常驻内存（字节）；没有 /proc 时退回峰值 RSS"""
+    status = "/proc/self/status"
+    if os.path.exists(status):
+        with open(status) as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS 的 ru_maxrss 单位为字节，Linux 为 KB
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class _NoEncoder:
+    """只测分词，不需要编码器"""
+
+
+def measure_tier(tier, sentences):
+    """
+    在当前进程中测量一种分词方式（由子进程调用）
+
+    返回:
+        dict: {'tier', 'available', 'load_seconds', 'rss_bytes', 'per_sentence_seconds', 'batch_seconds', 'words'}
+    """
+    from word_aligner import WordAligner
+
+    aligner = WordAligner(encoder=_NoEncoder(), cache_size=0, zh_tokenizer=tier)
+    rss_before = current_rss()
+    start = time.perf_counter()
+    available = aligner.preload(['zh'])['zh']
+    load_seconds = time.perf_counter() - start
+    rss_after_load = current_rss()
+
+    # 预热一次（首次调用的延迟初始化不计入）
+    aligner.tokenize_batch(sentences[:2], 'zh')
+
+    start = time.perf_counter()
+    for sentence in sentences:
+        aligner.tokenize(sentence, 'zh')
+    per_sentence_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    words = aligner.tokenize_batch(sentences, 'zh')
+    batch_seconds = time.perf_counter() - start
+
+    return {
+        'tier': tier,
+        'available': tier == 'rule' or available,
+        'load_seconds': load_seconds,
+        'rss_bytes': rss_after_load - rss_before,
+        'peak_rss_bytes': current_rss() - rss_before,
+        'per_sentence_seconds': per_sentence_seconds,
+        'batch_seconds': batch_seconds,
+        'words': words,
+    }
+
+
+def run_child(tier, num_sentences, seed):
+    """在独立子进程中测量，避免各分词方式的内存互相影响"""
+    output = subprocess.check_output(
+        [sys.executable, os.path.abspath(__file__), '--child', tier,
+         '--sentences', str(num_sentences), '--seed', str(seed)],
+        cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL
+    )
+    # 子进程的最后一行为 JSON 结果（之前可能有模型加载日志）
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def make_sentences(num_sentences, seed):
+    rng = random.Random(seed)
+    return [generate_sentence_pair(rng)[1] for _ in range(num_sentences)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="词对齐中文分词方式的延迟和内存对比")
+    parser.add_argument('--tiers', default=','.join(TIERS), help="分词方式，逗号分隔")
+    parser.add_argument('--sentences', type=int, default=500, help="句子数")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    parser.add_argument('--output', default=None, help="结果 JSON 输出路径")
+    parser.add_argument('--child', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sentences = make_sentences(args.sentences, args.seed)
+    if args.child:
+        print(json.dumps(measure_tier(args.child, sentences), ensure_ascii=False))
+        return
+
+    results = {}
+    for tier in args.tiers.split(','):
+        print(f"测量 {tier} ...")
+        try:
+            results[tier] = run_child(tier, args.sentences, args.seed)
+        except subprocess.CalledProcessError as e:
+            print(f"❌ {tier} 测量失败 (退出码 {e.returncode})")
+
+    reference = results.get('hanlp') if results.get('hanlp', {}).get('available') else None
+    print(f"\n{args.sentences} 个中文句子")
+    print(f"{'分词方式':<8}{'可用':>6}{'加载(s)':>10}{'内存(MB)':>10}{'逐句(ms/句)':>14}{'批量(ms/句)':>14}"
+          f"{'词数':>8}{'与hanlp不同':>12}")
+    for tier, result in results.items():
+        words = result['words']
+        diff = '-'
+        if reference is not None:
+            diff = f"{sum(a != b for a, b in zip(words, reference['words'])) / len(words):.1%}"
+        print(f"{tier:<8}{'是' if result['available'] else '否':>6}{result['load_seconds']:>10.2f}"
+              f"{result['rss_bytes'] / 1024 / 1024:>10.1f}"
+              f"{result['per_sentence_seconds'] * 1000 / len(words):>14.3f}"
+              f"{result['batch_seconds'] * 1000 / len(words):>14.3f}"
+              f"{sum(map(len, words)):>8}{diff:>12}")
+    if any(not result['available'] for result in results.values()):
+        print("⚠️  不可用的分词方式已退回规则分词")
+
+    if args.output:
+        summary = {tier: {k: v for k, v in result.items() if k != 'words'} for tier, result in results.items()}
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        print(f"\n✓ 结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
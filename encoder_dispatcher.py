@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+跨请求的编码微批处理
+
+多个并发请求（/api/check、/api/word-align）各自调用 encode_sentences 时，
+ONNX 会话会收到许多小批次。EncoderDispatcher 将这些调用排队，
+在可配置的几毫秒内（或达到 token 预算时）合并为一批，
+按 token 长度排序分桶、填充后统一推理，再把结果切片返回给各个调用方。
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class _EncodeRequest:
+    """一次排队中的编码请求"""
+
+    __slots__ = ('token_ids', 'num_tokens', 'future')
+
+    def __init__(self, token_ids):
+        self.token_ids = token_ids
+        self.num_tokens = sum(len(ids) for ids in token_ids)
+        self.future = Future()
+
+
+class EncoderDispatcher:
+    """
+    编码请求调度器（与 LaBSEOnnxEncoder 接口兼容）
+
+    用法:
+        encoder = EncoderDispatcher(LaBSEOnnxEncoder(), max_wait_ms=5, max_batch_tokens=16384)
+        embeddings = encoder.encode_sentences(sentences)  # 可在多个线程中同时调用
+    """
+
+    def __init__(self, encoder, max_wait_ms=5.0, max_batch_tokens=16384, listener=None):
+        """
+        初始化调度器
+
+        参数:
+            encoder: 提供 tokenize() 和 encode_token_ids() 的编码器（LaBSEOnnxEncoder）
+            max_wait_ms: 第一个请求到达后最多等待多少毫秒以合并后续请求
+            max_batch_tokens: 单次推理的 token 预算（批大小 × 填充后长度）
+            listener: 可选回调 listener(sentences, tokens, padded_tokens, seconds)，
+                      每次 ONNX 推理后调用（用于指标采集）
+        """
+        self.encoder = encoder
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_batch_tokens = max_batch_tokens
+        self.listener = listener
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_pid = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'sentences': 0,
+            'merged_batches': 0,
+            'inference_batches': 0,
+            'tokens': 0,
+            'padded_tokens': 0,
+            'inference_seconds': 0.0,
+        }
+
+    def __getattr__(self, name):
+        # 其他属性（model_name、tokenizer 等）透传给底层编码器
+        return getattr(self.encoder, name)
+
+    def encode_sentences(self, sentences):
+        """
+        编码句子列表为嵌入向量（阻塞直到本请求所在的批次完成）
+
+        参数:
+            sentences: 句子列表
+
+        返回:
+            embeddings: (n_sentences, hidden_size) 归一化的嵌入向量
+        """
+        if len(sentences) == 0:
+            return self.encoder.encode_sentences(sentences)
+
+        # 在调用方线程中分词，worker 只负责推理
+        request = _EncodeRequest(self.encoder.tokenize(list(sentences)))
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future.result()
+
+    def get_stats(self):
+        """
+        获取调度统计
+
+        返回:
+            dict: 请求数、句子数、合并批次数、推理批次数、token 数、填充率、吞吐
+        """
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['padding_ratio'] = (1.0 - stats['tokens'] / stats['padded_tokens']
+                                  if stats['padded_tokens'] else 0.0)
+        stats['tokens_per_second'] = (stats['tokens'] / stats['inference_seconds']
+                                      if stats['inference_seconds'] else 0.0)
+        return stats
+
+    def _ensure_worker(self):
+        """按需启动后台线程（fork 后的子进程中会重新启动）"""
+        pid = os.getpid()
+        if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+            return
+        with self._start_lock:
+            if self._worker is not None and self._worker_pid == pid and self._worker.is_alive():
+                return
+            if self._worker_pid != pid:
+                # fork 继承的队列可能处于不一致状态，重新创建
+                self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name="encoder-dispatcher", daemon=True)
+            self._worker_pid = pid
+            self._worker.start()
+
+    def _collect(self):
+        """取出第一个请求，并在等待窗口内尽量合并后续请求"""
+        batch = [self._queue.get()]
+        tokens = batch[0].num_tokens
+        deadline = time.monotonic() + self.max_wait
+        while tokens < self.max_batch_tokens:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(request)
+            tokens += request.num_tokens
+        return batch
+
+    def _run(self):
+        """后台线程：合并 → 分桶 → 推理 → 分发结果"""
+        while True:
+            batch = self._collect()
+            try:
+                results = self._encode_merged([r.token_ids for r in batch])
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            for request, embeddings in zip(batch, results):
+                request.future.set_result(embeddings)
+
+    def _encode_merged(self, requests):
+        """
+        将多个请求的句子合并编码
+
+        参数:
+            requests: 每个请求的 token id 列表
+
+        返回:
+            每个请求对应的嵌入矩阵列表
+        """
+        flat = [ids for token_ids in requests for ids in token_ids]
+        # 按长度排序后分桶，减少填充
+        order = sorted(range(len(flat)), key=lambda i: len(flat[i]))
+
+        embeddings = None
+        padded_tokens = 0
+        start_time = time.perf_counter()
+        num_batches = 0
+        start = 0
+        while start < len(order):
+            end = start + 1
+            # 排序后桶内最长的是最后一个元素：批大小 × 最长长度 不超过预算
+            while end < len(order) and (end - start + 1) * len(flat[order[end]]) <= self.max_batch_tokens:
+                end += 1
+            bucket = order[start:end]
+            batch_start = time.perf_counter()
+            vecs = self.encoder.encode_token_ids([flat[i] for i in bucket])
+            if self.listener is not None:
+                self.listener(len(bucket), sum(len(flat[i]) for i in bucket),
+                              len(bucket) * len(flat[bucket[-1]]), time.perf_counter() - batch_start)
+            if embeddings is None:
+                embeddings = np.empty((len(flat), vecs.shape[1]), dtype=vecs.dtype)
+            embeddings[bucket] = vecs
+            padded_tokens += len(bucket) * len(flat[bucket[-1]])
+            num_batches += 1
+            start = end
+        if embeddings is None:
+            # 合并的请求都没有句子
+            embeddings = self.encoder.encode_token_ids([])
+        elapsed = time.perf_counter() - start_time
+
+        with self._stats_lock:
+            self.stats['requests'] += len(requests)
+            self.stats['sentences'] += len(flat)
+            self.stats['merged_batches'] += 1
+            self.stats['inference_batches'] += num_batches
+            self.stats['tokens'] += sum(len(ids) for ids in flat)
+            self.stats['padded_tokens'] += padded_tokens
+            self.stats['inference_seconds'] += elapsed
+
+        results = []
+        offset = 0
+        for token_ids in requests:
+            results.append(embeddings[offset:offset + len(token_ids)])
+            offset += len(token_ids)
+        return results
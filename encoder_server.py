@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地编码服务
+
+由一个独立进程持有 LaBSE ONNX 会话，通过 Unix socket 为多个 web worker 提供
+encode_sentences。服务端用 EncoderDispatcher 将各连接的请求动态合并成大批次推理，
+web worker 以客户端模式使用 LaBSEOnnxEncoder(server_socket=...)，不加载模型和分词器。
+
+启动:
+    python encoder_server.py --socket /tmp/tqa-encoder.sock --threads 8
+
+协议（每条消息）:
+    !IQ 头部长度、负载长度 | JSON 头部 | 二进制负载
+    请求:  {"op": "encode", "sentences": [...]} / {"op": "encode_tokens", "sentences": [...]}
+           {"op": "stats"} / {"op": "ping"}
+    响应:  {"ok": true, "shape": [n, dim], "dtype": "float32"} + 向量字节
+           {"ok": true, "lengths": [...], "hidden_size": dim} + 各句 token 向量 (float32) + 字符偏移 (int64)
+           {"ok": true, "stats": {...}} / {"ok": false, "error": "..."}
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+
+import numpy as np
+
+_FRAME = struct.Struct('!IQ')
+
+
+def _recv_exact(sock, size):
+    """从 socket 读取固定长度的字节（返回可写的 bytearray，np.frombuffer 得到的数组可原地修改）"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise EOFError("连接已关闭")
+        received += n
+    return buffer
+
+
+def send_message(sock, header, payload=b''):
+    """
+    发送一条消息
+
+    参数:
+        sock: socket
+        header: 可 JSON 序列化的头部
+        payload: 二进制负载
+    """
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    sock.sendall(_FRAME.pack(len(header_bytes), len(payload)) + header_bytes)
+    if payload:
+        sock.sendall(payload)
+
+
+def recv_message(sock):
+    """
+    接收一条消息
+
+    返回:
+        (header, payload)
+    """
+    header_len, payload_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header = json.loads(_recv_exact(sock, header_len).decode('utf-8'))
+    payload = _recv_exact(sock, payload_len) if payload_len else b''
+    return header, payload
+
+
+class EncoderClient:
+    """
+    编码服务客户端（每个线程一个连接，fork 后自动重连）
+    """
+
+    def __init__(self, socket_path):
+        """
+        参数:
+            socket_path: 编码服务的 Unix socket 路径
+        """
+        self.socket_path = socket_path
+        self._local = threading.local()
+
+    def _connection(self):
+        """获取当前线程的连接"""
+        pid = os.getpid()
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != pid:
+            # fork 继承的连接与父进程共用同一个文件描述符，不能继续使用
+            conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conn.connect(self.socket_path)
+            self._local.conn = conn
+            self._local.pid = pid
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            try:
+                conn.close()
+            except OSError:
+                pass
+        self._local.conn = None
+
+    def request(self, header):
+        """
+        发送请求并等待响应（连接断开时重连一次）
+
+        返回:
+            (header, payload)
+        """
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                send_message(conn, header)
+                response, payload = recv_message(conn)
+                break
+            except (OSError, EOFError):
+                self._close()
+                if attempt == 1:
+                    raise
+        if not response.get('ok'):
+            raise RuntimeError(f"编码服务错误: {response.get('error')}")
+        return response, payload
+
+    def encode(self, sentences):
+        """
+        编码句子列表
+
+        返回:
+            embeddings: (n_sentences, hidden_size) 归一化的嵌入向量
+        """
+        response, payload = self.request({'op': 'encode', 'sentences': list(sentences)})
+        return np.frombuffer(payload, dtype=response['dtype']).reshape(response['shape'])
+
+    def encode_tokens(self, sentences):
+        """
+        获取每个句子所有 token 的上下文向量（见 LaBSEOnnxEncoder.encode_tokens）
+
+        返回:
+            list: 每个句子一个 (hidden_states, offsets)
+        """
+        response, payload = self.request({'op': 'encode_tokens', 'sentences': list(sentences)})
+        lengths = response['lengths']
+        total = sum(lengths)
+        hidden_bytes = total * response['hidden_size'] * 4
+        hidden = np.frombuffer(payload, dtype=np.float32, count=total * response['hidden_size'])
+        hidden = hidden.reshape(total, response['hidden_size'])
+        offsets = np.frombuffer(payload, dtype=np.int64, offset=hidden_bytes).reshape(total, 2)
+        results = []
+        start = 0
+        for length in lengths:
+            results.append((hidden[start:start + length], offsets[start:start + length]))
+            start += length
+        return results
+
+    def get_stats(self):
+        """获取服务端的批处理统计"""
+        response, _ = self.request({'op': 'stats'})
+        return response['stats']
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """处理一个客户端连接上的所有请求"""
+
+    def handle(self):
+        encoder = self.server.encoder
+        while True:
+            try:
+                header, _ = recv_message(self.request)
+            except (EOFError, OSError):
+                return
+            try:
+                op = header.get('op')
+                if op == 'encode':
+                    embeddings = np.ascontiguousarray(encoder.encode_sentences(header['sentences']),
+                                                      dtype=np.float32)
+                    send_message(self.request,
+                                 {'ok': True, 'shape': list(embeddings.shape), 'dtype': 'float32'},
+                                 embeddings.tobytes())
+                elif op == 'encode_tokens':
+                    encoded = encoder.encode_tokens(header['sentences'])
+                    hidden_size = encoded[0][0].shape[1] if encoded else 0
+                    payload = b''.join(np.ascontiguousarray(h, dtype=np.float32).tobytes() for h, _ in encoded)
+                    payload += b''.join(np.ascontiguousarray(o, dtype=np.int64).tobytes() for _, o in encoded)
+                    send_message(self.request,
+                                 {'ok': True, 'lengths': [len(h) for h, _ in encoded], 'hidden_size': hidden_size},
+                                 payload)
+                elif op == 'stats':
+                    send_message(self.request, {'ok': True, 'stats': encoder.get_stats()})
+                elif op == 'ping':
+                    send_message(self.request, {'ok': True})
+                else:
+                    send_message(self.request, {'ok': False, 'error': f"未知操作: {op}"})
+            except (BrokenPipeError, ConnectionResetError):
+                return
+            except Exception as e:
+                send_message(self.request, {'ok': False, 'error': str(e)})
+
+
+class EncoderServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Unix socket 编码服务（每个连接一个线程，推理由 EncoderDispatcher 合并批处理）
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, encoder):
+        """
+        参数:
+            socket_path: 监听的 Unix socket 路径（已存在的旧文件会被删除）
+            encoder: 提供 encode_sentences()、encode_tokens() 和 get_stats() 的编码器（EncoderDispatcher）
+        """
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        self.encoder = encoder
+        super().__init__(socket_path, _Handler)
+        # 只允许同一用户的进程连接
+        os.chmod(socket_path, 0o600)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LaBSE 本地编码服务 (Unix socket)")
+    parser.add_argument('--socket', default=os.environ.get('TQA_ENCODER_SOCKET', '/tmp/tqa-encoder.sock'),
+                        help="Unix socket 路径")
+    parser.add_argument('--model-path', default=None, help="ONNX 模型目录（默认 labse_onnx）")
+    parser.add_argument('--threads', type=int, default=0, help="ONNX Runtime 算子内线程数（0 表示默认）")
+    parser.add_argument('--max-wait-ms', type=float,
+                        default=float(os.environ.get('TQA_ENCODER_BATCH_WAIT_MS', '5')),
+                        help="合并请求的等待窗口（毫秒）")
+    parser.add_argument('--max-batch-tokens', type=int,
+                        default=int(os.environ.get('TQA_ENCODER_BATCH_TOKENS', '16384')),
+                        help="单次推理的 token 预算")
+    args = parser.parse_args()
+
+    from labse_onnx_encoder import LaBSEOnnxEncoder
+    from encoder_dispatcher import EncoderDispatcher
+
+    encoder = EncoderDispatcher(LaBSEOnnxEncoder(model_path=args.model_path,
+                                                 intra_op_threads=args.threads or None),
+                                max_wait_ms=args.max_wait_ms,
+                                max_batch_tokens=args.max_batch_tokens)
+    # 预热 ONNX 会话，避免第一个客户端请求承担初始化耗时
+    encoder.encode_sentences(["warm-up"])
+
+    server = EncoderServer(args.socket, encoder)
+    print(f"✓ 编码服务已启动: {args.socket} (等待 {args.max_wait_ms} ms, token 预算 {args.max_batch_tokens})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
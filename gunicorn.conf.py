@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+gunicorn 配置（多进程部署）
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+环境变量:
+    TQA_BIND         监听地址 (默认 0.0.0.0:5001)
+    TQA_WORKERS      worker 进程数 (默认 2)
+    TQA_HTTP_THREADS 每个 worker 处理请求的线程数 (默认 4)
+    TQA_PRELOAD      1: 主进程加载模型后 fork（写时复制共享权重）；0: 每个 worker 各自加载
+    TQA_WORKER_THREADS 每个 worker 的计算线程数（OpenMP/torch/numba，默认 CPU 核心数 / worker 数）
+    TQA_WORKER_ORT_THREADS 每个 worker 的 ONNX Runtime 线程数（默认 1：共用主进程的会话和权重；
+                     大于 1 时各 worker 重建会话，每个 worker 多占一份 LaBSE 权重的内存）
+    TQA_JOB_DIR      异步任务的共享目录（多个 worker 时默认为临时目录，主进程退出时删除）
+
+每个 worker 是独立进程：准入控制（TQA_MAX_CONCURRENT_CHECKS 等）、结果缓存和 /metrics 都按 worker 计算，
+整个服务的并发上限为 worker 数 × TQA_MAX_CONCURRENT_CHECKS。异步任务通过 TQA_JOB_DIR 在 worker 间共享。
+"""
+
+import os
+import shutil
+import tempfile
+
+from prefork import (configure_master_threads, configure_worker_env, configure_worker_threads,
+                     default_worker_threads)
+
+bind = os.environ.get('TQA_BIND', '0.0.0.0:5001')
+workers = int(os.environ.get('TQA_WORKERS', '2'))
+worker_class = 'gthread'
+threads = int(os.environ.get('TQA_HTTP_THREADS', '4'))
+# 大文档检查耗时较长（gthread worker 的心跳不受请求耗时影响，这里只作为兜底）
+timeout = 600
+preload_app = os.environ.get('TQA_PRELOAD', '1') != '0'
+
+worker_threads = int(os.environ.get('TQA_WORKER_THREADS', '0')) or default_worker_threads(workers)
+
+# 提交和查询异步任务的请求可能落在不同 worker 上，任务快照写入共享目录
+_owned_job_dir = None
+if workers > 1 and not os.environ.get('TQA_JOB_DIR'):
+    _owned_job_dir = tempfile.mkdtemp(prefix='tqa-jobs-')
+    os.environ['TQA_JOB_DIR'] = _owned_job_dir
+
+# 本文件在主进程加载应用之前执行，线程相关的环境变量必须在这里设置
+if preload_app:
+    configure_master_threads(worker_threads)
+else:
+    configure_worker_env(worker_threads)
+
+
+def post_fork(server, worker):
+    """worker fork 之后：按线程预算重新配置主进程中保持单线程的线程池"""
+    if preload_app:
+        configure_worker_threads(worker_threads)
+
+
+def on_exit(server):
+    """主进程退出：删除自动创建的任务目录"""
+    if _owned_job_dir:
+        shutil.rmtree(_owned_job_dir, ignore_errors=True)
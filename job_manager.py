@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+异步检查任务管理
+
+大文档的检查可能需要数分钟，同步的 /api/check 容易超时。JobManager 将检查放到
+有界的后台线程池中执行：
+- submit() 立即返回任务 ID
+- 任务运行时通过进度回调更新当前阶段和百分比
+- get() 返回任务状态、进度，完成后返回结果
+- 已结束的任务在本地存储中保留 ttl_seconds 秒后被清除
+
+多进程部署（gunicorn 多个 worker）时，提交任务和查询任务的请求可能落在不同 worker 上。
+指定 store_dir 后每次状态变化都把任务快照写入该目录（<job_id>.json，原子替换），
+进度只在阶段变化或距上次写入超过 PROGRESS_PERSIST_SECONDS 时写入；
+本进程中没有的任务从目录中读取；任务仍由提交它的 worker 执行。
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+
+class JobQueueFull(Exception):
+    """排队中的任务数已达上限"""
+
+
+class JobManager:
+    """
+    后台任务管理器
+
+    用法:
+        jobs = JobManager(max_workers=2, ttl_seconds=3600, max_pending=16)
+        job_id = jobs.submit(run_check, data)   # run_check(data, progress=...) 返回结果
+        snapshot = jobs.get(job_id)             # {'status', 'progress', 'result', ...}
+    """
+
+    # 共享目录中过期任务文件的清理间隔（秒）
+    STORE_SWEEP_SECONDS = 60
+    # 同一阶段内进度写入共享目录的最小间隔（秒），状态和阶段变化总是立即写入
+    PROGRESS_PERSIST_SECONDS = 1.0
+
+    def __init__(self, max_workers=2, ttl_seconds=3600, max_pending=16, store_dir=None):
+        """
+        初始化任务管理器
+
+        参数:
+            max_workers: 同时运行的任务数（工作线程数）
+            ttl_seconds: 任务结束后结果保留的秒数
+            max_pending: 允许排队（尚未开始）的最大任务数，超过时 submit() 抛出 JobQueueFull
+            store_dir: 多个进程共享的任务目录，为 None 时任务只保存在本进程中
+        """
+        self.max_workers = max_workers
+        self.ttl_seconds = ttl_seconds
+        self.max_pending = max_pending
+        self.store_dir = store_dir
+        self._last_sweep = 0.0
+        if store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tqa-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """
+        提交任务
+
+        参数:
+            func: 任务函数，以 func(*args, progress=callback, **kwargs) 调用，
+                  callback(stage, percent) 用于上报进度，返回值作为任务结果
+            *args, **kwargs: 传给 func 的参数
+
+        返回:
+            job_id: 任务 ID
+        """
+        self._evict_expired()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job['status'] == JOB_QUEUED)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"排队任务数已达上限 ({self.max_pending})")
+
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'id': job_id,
+                'status': JOB_QUEUED,
+                'stage': None,
+                'percent': 0.0,
+                'created_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+                'result': None,
+                'error': None,
+                'pid': os.getpid(),
+            }
+            snapshot = dict(self._jobs[job_id])
+        self._persist(snapshot)
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        """
+        获取任务快照
+
+        参数:
+            job_id: 任务 ID
+
+        返回:
+            dict: 任务状态（不存在或已过期时返回 None）
+        """
+        self._evict_expired()
+        with self._lock:
+            job = self._jobs.get(job_id)
+            snapshot = dict(job) if job is not None else None
+        if snapshot is None:
+            # 其他 worker 提交的任务
+            snapshot = self._load(job_id)
+            if snapshot is None:
+                return None
+        snapshot.pop('pid', None)
+        snapshot['progress'] = {
+            'stage': snapshot.pop('stage'),
+            'percent': round(snapshot.pop('percent'), 1),
+        }
+        if snapshot['finished_at'] is not None:
+            snapshot['expires_at'] = snapshot['finished_at'] + self.ttl_seconds
+        return snapshot
+
+    def get_stats(self):
+        """
+        获取任务统计
+
+        返回:
+            dict: 各状态的任务数
+        """
+        with self._lock:
+            stats = {status: 0 for status in (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_FAILED)}
+            for job in self._jobs.values():
+                stats[job['status']] += 1
+        return stats
+
+    def _update(self, job_id, persist=True, **fields):
+        """
+        更新任务字段
+
+        参数:
+            job_id: 任务 ID
+            persist: 是否把更新后的快照写入共享目录（快照在锁内复制，在锁外序列化和写入）
+            **fields: 要更新的字段
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            snapshot = dict(job) if persist and self.store_dir else None
+        if snapshot is not None:
+            self._persist(snapshot)
+
+    def _run(self, job_id, func, args, kwargs):
+        """在工作线程中执行任务"""
+        self._update(job_id, status=JOB_RUNNING, started_at=time.time())
+
+        last_persist = {'stage': None, 'time': 0.0}
+
+        def progress(stage, percent):
+            # 进度回调很频繁：阶段不变时按最小间隔写入共享目录
+            now = time.monotonic()
+            persist = (stage != last_persist['stage']
+                       or now - last_persist['time'] >= self.PROGRESS_PERSIST_SECONDS)
+            if persist:
+                last_persist.update(stage=stage, time=now)
+            self._update(job_id, persist=persist, stage=stage, percent=float(percent))
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+        except Exception as e:
+            print(f"⚠️  任务 {job_id} 失败: {e}")
+            traceback.print_exc()
+            self._update(job_id, status=JOB_FAILED, error=str(e), finished_at=time.time())
+            return
+        self._update(job_id, status=JOB_DONE, result=result, percent=100.0, finished_at=time.time())
+
+    def _evict_expired(self):
+        """清除已结束且超过保留时间的任务"""
+        now = time.time()
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['finished_at'] is not None
+                       and now - job['finished_at'] > self.ttl_seconds]
+            for job_id in expired:
+                del self._jobs[job_id]
+                self._remove(job_id)
+        if self.store_dir and now - self._last_sweep > self.STORE_SWEEP_SECONDS:
+            self._last_sweep = now
+            self._sweep_store(now)
+
+    def _job_path(self, job_id):
+        return os.path.join(self.store_dir, f"{job_id}.json")
+
+    def _persist(self, job):
+        """
+        把任务快照写入共享目录
+
+        调用方不应持有 self._lock（序列化大结果期间不阻塞其他请求）。同一任务的快照只由
+        submit() 和执行它的工作线程依次写入，不会乱序。
+
+        参数:
+            job: 任务字典的副本
+        """
+        if not self.store_dir:
+            return
+        path = self._job_path(job['id'])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(job, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️  任务 {job['id']} 写入共享目录失败: {e}")
+
+    def _load(self, job_id):
+        """
+        从共享目录读取任务快照
+
+        返回:
+            dict: 任务快照（不存在、已过期或 ID 无效时返回 None）
+        """
+        if not self.store_dir or not job_id.isalnum():
+            return None
+        try:
+            with open(self._job_path(job_id), encoding='utf-8') as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if job['finished_at'] is not None and time.time() - job['finished_at'] > self.ttl_seconds:
+            self._remove(job_id)
+            return None
+        if job['finished_at'] is None and not _pid_alive(job['pid']):
+            # 执行任务的 worker 已退出（重启或崩溃），任务不会再完成
+            job.update(status=JOB_FAILED, error='执行任务的 worker 进程已退出', finished_at=time.time())
+        return job
+
+    def _remove(self, job_id):
+        if self.store_dir:
+            try:
+                os.remove(self._job_path(job_id))
+            except OSError:
+                pass
+
+    def _sweep_store(self, now):
+        """清理共享目录中过期的任务文件（包括已退出的 worker 留下的）"""
+        try:
+            names = os.listdir(self.store_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.store_dir, name)
+            try:
+                # 文件在任务结束时最后一次写入，修改时间即结束时间
+                if now - os.path.getmtime(path) > self.ttl_seconds:
+                    with open(path, encoding='utf-8') as f:
+                        job = json.load(f)
+                    if job['finished_at'] is not None or not _pid_alive(job['pid']):
+                        os.remove(path)
+            except (OSError, ValueError, KeyError):
+                continue
+
+
+def _pid_alive(pid):
+    """同一主机上的进程是否仍在运行"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
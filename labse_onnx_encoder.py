@@ -4,6 +4,9 @@
 LaBSE ONNX Encoder - 替代Bertalign的默认encoder
 """
 
+import sys
+import threading
+import types
 import numpy as np
 import onnxruntime as ort
 from transformers import AutoTokenizer
@@ -28,21 +31,58 @@ def yield_overlaps(sents, num_overlaps):
                 yield sents[-1]
 
 
+class LockedTokenizer:
+    """
+    为 Hugging Face fast tokenizer 加锁的包装器
+
+    fast tokenizer 每次调用都会修改内部的 padding/truncation 状态，
+    多线程同时调用会抛出 "RuntimeError: Already borrowed"。
+    ONNX Runtime 的 session.run 本身是线程安全的，因此只需对分词加锁。
+    """
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            return self._tokenizer(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._tokenizer, name)
+
+
 class LaBSEOnnxEncoder:
     """
     使用ONNX格式的LaBSE模型进行句子编码
     兼容Bertalign的Encoder接口
     """
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, intra_op_threads=None, server_socket=None):
         """
         初始化LaBSE ONNX编码器
 
         参数:
             model_path: ONNX模型目录路径（默认为脚本所在目录下的labse_onnx）
+            intra_op_threads: ONNX Runtime 算子内线程数（None 表示使用默认值，即全部物理核心）。
+                              设为 1 时不创建线程池，会话可以安全地在 fork 前创建并由子进程共享
+            server_socket: 本地编码服务的 Unix socket 路径（见 encoder_server.py）。
+                           指定后以客户端模式运行：不加载模型和分词器，encode_sentences 转发给编码服务
         """
         import os
 
+        self.server_socket = server_socket
+        if server_socket:
+            from encoder_server import EncoderClient
+
+            self.model_name = "LaBSE-ONNX (encoder server)"
+            self.model_path = None
+            self.tokenizer = None
+            self.session = None
+            self.client = EncoderClient(server_socket)
+            print(f"✓ LaBSE 编码服务客户端已初始化 (socket: {server_socket})")
+            return
+
         # 如果未指定路径，使用脚本所在目录下的labse_onnx
         if model_path is None:
             script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -51,14 +91,71 @@ class LaBSEOnnxEncoder:
         self.model_name = "LaBSE-ONNX"
         self.model_path = model_path
 
-        # 加载tokenizer
-        self.tokenizer = AutoTokenizer.from_pretrained(model_path)
+        # 加载tokenizer（加锁，使编码器可在多个请求线程间共享）
+        self.tokenizer = LockedTokenizer(AutoTokenizer.from_pretrained(model_path))
 
         # 加载ONNX模型
-        onnx_model_path = os.path.join(model_path, "model.onnx")
-        self.session = ort.InferenceSession(onnx_model_path)
+        self.intra_op_threads = None
+        self.session = None
+        self.reset_session(intra_op_threads)
 
         print(f"✓ LaBSE ONNX编码器初始化成功 (模型路径: {model_path})")
+
+    def fingerprint(self):
+        """
+        编码模型的指纹（检查结果缓存键和 ETag 的一部分）：模型名和 model.onnx 的大小、修改时间
+
+        客户端模式下为编码服务的 socket 路径（模型由编码服务加载）。
+
+        返回:
+            str: 指纹
+        """
+        import os
+        from model_config import file_fingerprint
+
+        if self.model_path is None:
+            return f"{self.model_name}:{self.server_socket}"
+        return f"{self.model_name}:{file_fingerprint(os.path.join(self.model_path, 'model.onnx'))}"
+
+    @property
+    def hidden_size(self):
+        """
+        输出向量的维度（空批次返回空数组时使用）：优先取 ONNX 输出的静态维度，否则读取模型目录的 config.json
+        """
+        import json
+        import os
+
+        dim = self.session.get_outputs()[0].shape[-1]
+        if isinstance(dim, int):
+            return dim
+        with open(os.path.join(self.model_path, "config.json"), encoding="utf-8") as f:
+            return json.load(f)["hidden_size"]
+
+    def reset_session(self, intra_op_threads=None):
+        """
+        （重新）创建 ONNX Runtime 会话
+
+        预加载部署中主进程以 intra_op_threads=1 创建会话（fork 前不能有线程池），各 worker 默认共用该会话；
+        设置了 TQA_WORKER_ORT_THREADS > 1 时 worker fork 之后调用本方法以更多线程重建会话
+        （重新加载模型，每个 worker 各持有一份权重）。
+
+        参数:
+            intra_op_threads: 算子内线程数（None 表示使用默认值）
+
+        返回:
+            str: 用于日志的描述
+        """
+        import os
+
+        if self.session is not None and intra_op_threads == self.intra_op_threads:
+            return f"ONNX Runtime ({intra_op_threads})"
+        sess_options = ort.SessionOptions()
+        if intra_op_threads:
+            sess_options.intra_op_num_threads = intra_op_threads
+            sess_options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(os.path.join(self.model_path, "model.onnx"), sess_options)
+        self.intra_op_threads = intra_op_threads
+        return f"ONNX Runtime ({intra_op_threads or '默认'})"
     
     def encode_sentences(self, sentences):
         """
@@ -70,33 +167,116 @@ class LaBSEOnnxEncoder:
         返回:
             embeddings: (n_sentences, hidden_size) 归一化的嵌入向量
         """
-        # Tokenize
+        if self.server_socket:
+            return self.client.encode(sentences)
+        return self.encode_token_ids(self.tokenize(sentences))
+
+    def tokenize(self, sentences):
+        """
+        分词（不填充）
+
+        参数:
+            sentences: 句子列表
+
+        返回:
+            token_ids: 每个句子的 token id 列表（已截断到 512）
+        """
+        if len(sentences) == 0:
+            return []
+        inputs = self.tokenizer(
+            sentences,
+            padding=False,
+            truncation=True,
+            max_length=512
+        )
+        return inputs["input_ids"]
+
+    def encode_token_ids(self, token_ids):
+        """
+        将已分词的句子填充为一个批次并编码
+
+        参数:
+            token_ids: 每个句子的 token id 列表
+
+        返回:
+            embeddings: (n_sentences, hidden_size) 归一化的嵌入向量；空批次返回 (0, hidden_size)
+        """
+        if len(token_ids) == 0:
+            return np.empty((0, self.hidden_size), dtype=np.float32)
+
+        # 提取[CLS] token的嵌入
+        embeddings = self._forward(token_ids)[:, 0, :].astype(np.float32)
+
+        # L2归一化
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        embeddings = embeddings / norms
+
+        return embeddings
+
+    def encode_tokens(self, sentences):
+        """
+        一次前向计算得到每个句子所有 token 的上下文向量（用于上下文词对齐）
+
+        参数:
+            sentences: 句子列表
+
+        返回:
+            list: 每个句子一个 (hidden_states, offsets)：
+                  hidden_states 为 (n_tokens, hidden_size) 的最后一层隐藏状态（未归一化），
+                  offsets 为 (n_tokens, 2) 的字符偏移 [start, end)，特殊 token 为 (0, 0)
+        """
+        if self.server_socket:
+            return self.client.encode_tokens(sentences)
+        if len(sentences) == 0:
+            return []
+
         inputs = self.tokenizer(
-            sentences, 
-            padding=True, 
-            truncation=True, 
+            list(sentences),
+            padding=False,
+            truncation=True,
             max_length=512,
-            return_tensors="np"
+            return_offsets_mapping=True
         )
-        
+        token_ids = inputs["input_ids"]
+        hidden_states = self._forward(token_ids)
+        return [
+            (hidden_states[i, :len(ids)].astype(np.float32),
+             np.asarray(inputs["offset_mapping"][i], dtype=np.int64).reshape(-1, 2))
+            for i, ids in enumerate(token_ids)
+        ]
+
+    def _forward(self, token_ids):
+        """
+        填充为一个批次并运行 ONNX 模型
+
+        参数:
+            token_ids: 每个句子的 token id 列表
+
+        返回:
+            last_hidden_state: (n_sentences, max_len, hidden_size)；空批次返回 (0, 0, hidden_size)
+        """
+        if len(token_ids) == 0:
+            return np.empty((0, 0, self.hidden_size), dtype=np.float32)
+
+        # 填充到批次内最长序列（与 tokenizer 的 padding=True 相同）
+        max_len = max(len(ids) for ids in token_ids)
+        pad_id = self.tokenizer.pad_token_id or 0
+        input_ids = np.full((len(token_ids), max_len), pad_id, dtype=np.int64)
+        attention_mask = np.zeros((len(token_ids), max_len), dtype=np.int64)
+        for i, ids in enumerate(token_ids):
+            input_ids[i, :len(ids)] = ids
+            attention_mask[i, :len(ids)] = 1
+
         # 准备ONNX输入
         onnx_inputs = {
-            "input_ids": inputs["input_ids"].astype(np.int64),
-            "attention_mask": inputs["attention_mask"].astype(np.int64),
-            "token_type_ids": inputs["token_type_ids"].astype(np.int64),
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "token_type_ids": np.zeros_like(input_ids),
         }
         
         # 运行推理
         outputs = self.session.run(None, onnx_inputs)
-        
-        # 提取[CLS] token的嵌入
-        embeddings = outputs[0][:, 0, :].astype(np.float32)
-        
-        # L2归一化
-        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-        embeddings = embeddings / norms
-        
-        return embeddings
+        return outputs[0]
     
     def transform(self, sents, num_overlaps):
         """
@@ -129,6 +309,65 @@ class LaBSEOnnxEncoder:
         return sent_vecs, len_vecs
 
 
+class LazyBertalignEncoder:
+    """
+    Bertalign 全局编码器 (bertalign.model) 的延迟加载替身
+
+    原版 bertalign 在导入时执行 Encoder("LaBSE")，加载分词器和完整的 ONNX 会话；
+    之后 route_bertalign_encoder 把编码路由到共享编码器（或编码服务），这份模型从未使用。
+    替身在首次编码时才加载 LaBSEOnnxEncoder，编码被路由后始终不加载。
+    """
+
+    def __init__(self, model_name):
+        self.model_name = model_name
+        self.session = None
+        self._encoder = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._encoder is None:
+                self._encoder = LaBSEOnnxEncoder()
+            return self._encoder
+
+    @property
+    def tokenizer(self):
+        return self._load().tokenizer
+
+    def encode_onnx(self, sentences):
+        """编码句子（route_bertalign_encoder 会在实例上覆盖本方法）"""
+        return self._load().encode_sentences(sentences)
+
+    def transform(self, sents, num_overlaps):
+        """与 bertalign.encoder.Encoder.transform 相同：编码重叠窗口，返回 (向量, 字节长度)"""
+        overlaps = list(yield_overlaps(sents, num_overlaps))
+        sent_vecs = self.encode_onnx(overlaps)
+
+        embedding_dim = sent_vecs.size // (len(sents) * num_overlaps)
+        sent_vecs = sent_vecs.reshape(num_overlaps, len(sents), embedding_dim)
+
+        len_vecs = np.array([len(line.encode("utf-8")) for line in overlaps])
+        len_vecs = len_vecs.reshape(num_overlaps, len(sents))
+        return sent_vecs, len_vecs
+
+
+def install_lazy_bertalign_encoder():
+    """
+    在导入 bertalign 之前调用：用 LazyBertalignEncoder 代替 bertalign.encoder.Encoder，
+    使导入 bertalign 时不加载 LaBSE 模型（编码服务客户端模式的 worker 因此不持有模型）
+
+    返回:
+        bool: bertalign.model 是否为延迟加载的替身（bertalign 已先被导入时无法替换）
+    """
+    if 'bertalign' in sys.modules:
+        return isinstance(getattr(sys.modules['bertalign'], 'model', None), LazyBertalignEncoder)
+    stub = types.ModuleType('bertalign.encoder')
+    stub.Encoder = LazyBertalignEncoder
+    stub.USE_ONNX = True
+    sys.modules['bertalign.encoder'] = stub
+    return True
+
+
 # 测试编码器
 if __name__ == "__main__":
     print("=" * 80)
@@ -156,4 +395,3 @@ if __name__ == "__main__":
     print("\n" + "="*80)
     print("✓ LaBSE ONNX Encoder测试成功!")
     print("="*80)
-
@@ -150,6 +150,28 @@ class LanguageDetector:
         else:
             return languages, scores_list
     
+    def detect_batch(self, texts):
+        """
+        批量检测多个文本的语言（一次 fastText 调用）
+
+        参数:
+            texts: 文本列表
+
+        返回:
+            list: 语言代码列表，与 texts 一一对应
+        """
+        if not self.model:
+            raise RuntimeError("模型未加载")
+
+        cleaned = [text.replace('\n', ' ').strip() for text in texts]
+        non_empty = [i for i, text in enumerate(cleaned) if text]
+        languages = ['en'] * len(texts)
+        if non_empty:
+            labels, _ = self.model.predict([cleaned[i] for i in non_empty], k=1)
+            for i, label in zip(non_empty, labels):
+                languages[i] = label[0].replace('__label__', '')
+        return languages
+
     def detect_with_confidence(self, text):
         """
         检测文本的语言并返回置信度
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+线程安全的 LRU 缓存
+
+服务中的各个缓存（检查结果、词对齐结果、词向量、分句结果）共用同一个实现：
+OrderedDict + 锁，按条目数淘汰最久未使用的条目，记录命中/未命中/淘汰次数。
+按总字节数或存活时间淘汰的缓存（见 result_cache.ResultCache）通过 _over_limit()、
+_on_add()/_on_remove() 和 _is_expired() 扩展。
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """线程安全的 LRU 缓存（按条目数淘汰），记录命中统计"""
+
+    def __init__(self, max_entries=256):
+        """
+        参数:
+            max_entries: 最多缓存的条目数（0 表示禁用）
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def get(self, key):
+        """查找缓存，未命中返回 None"""
+        with self._lock:
+            return self._lookup_locked(key, record=True)
+
+    def get_many(self, keys, record=True):
+        """
+        批量查找
+
+        参数:
+            keys: 键列表
+            record: 是否计入命中统计（调用方自行统计时为 False）
+
+        返回:
+            dict: {命中的键: 值}
+        """
+        found = {}
+        with self._lock:
+            for key in keys:
+                value = self._lookup_locked(key, record)
+                if value is not None:
+                    found[key] = value
+        return found
+
+    def put(self, key, value):
+        """写入缓存，超过上限时淘汰最久未使用的条目"""
+        self.put_many({key: value})
+
+    def put_many(self, items):
+        """
+        批量写入
+
+        参数:
+            items: {键: 值}
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            for key, value in items.items():
+                if key in self._entries:
+                    self._on_remove(key, self._entries.pop(key))
+                self._entries[key] = value
+                self._on_add(key, value)
+            while self._entries and self._over_limit():
+                key, value = self._entries.popitem(last=False)
+                self._on_remove(key, value)
+                self.stats['evictions'] += 1
+
+    def items(self):
+        """
+        返回:
+            list: (键, 值) 快照，按最久未使用到最近使用排列
+        """
+        with self._lock:
+            return list(self._entries.items())
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for key, value in self._entries.items():
+                self._on_remove(key, value)
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_stats(self):
+        """
+        获取缓存统计
+
+        返回:
+            dict: 命中/未命中/淘汰次数、条目数 (size) 和命中率
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def _lookup_locked(self, key, record):
+        """查找并更新最近使用顺序（调用方需持有 self._lock）"""
+        value = self._entries.get(key)
+        if value is not None and self._is_expired(value):
+            self._on_remove(key, self._entries.pop(key))
+            self.stats['expired'] = self.stats.get('expired', 0) + 1
+            value = None
+        if value is None:
+            if record:
+                self.stats['misses'] += 1
+            return None
+        self._entries.move_to_end(key)
+        if record:
+            self.stats['hits'] += 1
+        return value
+
+    def _over_limit(self):
+        """是否需要继续淘汰（子类可加入总字节数等限制）"""
+        return len(self._entries) > self.max_entries
+
+    def _on_add(self, key, value):
+        """条目写入时调用（子类用于维护总字节数等）"""
+
+    def _on_remove(self, key, value):
+        """条目被移除（淘汰、过期、覆盖或清空）时调用"""
+
+    def _is_expired(self, value):
+        """条目是否已过期（子类用于 TTL）"""
+        return False
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轻量级 Prometheus 指标
+
+不依赖 prometheus_client，提供 Counter / Gauge / Histogram 三种指标和
+Prometheus 文本格式 (text/plain; version=0.0.4) 的导出。
+每次记录只是一次加锁的字典更新（直方图额外一次二分查找），开销足够低，可在生产环境常开。
+
+用法:
+    REQUESTS = REGISTRY.counter('tqa_requests_total', '请求数', ['endpoint'])
+    REQUESTS.inc(endpoint='/api/check')
+    text = REGISTRY.render()
+"""
+
+import bisect
+import math
+import threading
+
+# 默认耗时分桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def exponential_buckets(start, factor, count):
+    """生成指数分桶: start, start*factor, ..."""
+    return tuple(start * factor ** i for i in range(count))
+
+
+def _format_value(value):
+    """格式化样本值"""
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    """转义标签值"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    """格式化标签 {a="x",b="y"}"""
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class _Metric:
+    """指标基类"""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """按标签名顺序生成字典键"""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def clear(self):
+        """清空所有样本（用于在导出时整体重建的 gauge）"""
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        """导出为 Prometheus 文本行"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+
+    metric_type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """增加计数"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+
+    metric_type = 'gauge'
+
+    def set(self, value, **labels):
+        """设置值"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        """增加"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        """减少"""
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        """记录一个观测值"""
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # [各桶计数 (非累计)..., +Inf 桶计数, 总和]
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[index] += 1
+            entry[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = sorted((key, list(entry)) for key, entry in self._values.items())
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), entry[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """创建并注册计数器"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        """创建并注册 gauge"""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        """创建并注册直方图"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector):
+        """
+        注册导出前调用的回调（用于在抓取时更新队列深度等 gauge）
+
+        参数:
+            collector: 无参数回调
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def register_cache(self, name, stats_fn):
+        """
+        注册缓存，导出其命中/未命中次数和命中率
+
+        参数:
+            name: 缓存名（作为 cache 标签）
+            stats_fn: 返回 {'hits', 'misses', 'size'} 的回调
+        """
+        with self._lock:
+            self._caches[name] = stats_fn
+
+    def render(self):
+        """
+        导出所有指标
+
+        返回:
+            str: Prometheus 文本格式
+        """
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics)
+            caches = dict(self._caches)
+
+        for collector in collectors:
+            try:
+                collector()
+            except Exception as e:
+                print(f"⚠️  指标采集失败: {e}")
+
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.extend(self._render_caches(caches))
+        return "\n".join(lines) + "\n"
+
+    def _render_caches(self, caches):
+        """导出缓存命中统计"""
+        if not caches:
+            return []
+        hits, misses, ratio, size = [], [], [], []
+        for name, stats_fn in sorted(caches.items()):
+            try:
+                stats = stats_fn()
+            except Exception as e:
+                print(f"⚠️  缓存统计失败 ({name}): {e}")
+                continue
+            label = _format_labels(('cache',), (name,))
+            total = stats.get('hits', 0) + stats.get('misses', 0)
+            hits.append(f"tqa_cache_hits_total{label} {stats.get('hits', 0)}")
+            misses.append(f"tqa_cache_misses_total{label} {stats.get('misses', 0)}")
+            ratio.append(f"tqa_cache_hit_ratio{label} "
+                         f"{_format_value(stats.get('hits', 0) / total if total else 0.0)}")
+            size.append(f"tqa_cache_entries{label} {stats.get('size', 0)}")
+        return (["# HELP tqa_cache_hits_total 缓存命中次数", "# TYPE tqa_cache_hits_total counter"] + hits
+                + ["# HELP tqa_cache_misses_total 缓存未命中次数", "# TYPE tqa_cache_misses_total counter"] + misses
+                + ["# HELP tqa_cache_hit_ratio 缓存命中率", "# TYPE tqa_cache_hit_ratio gauge"] + ratio
+                + ["# HELP tqa_cache_entries 缓存条目数", "# TYPE tqa_cache_entries gauge"] + size)
+
+
+# 进程内默认注册表
+REGISTRY = MetricsRegistry()
@@ -62,6 +62,34 @@ def setup_hanlp_env():
     print(f"✓ 使用本地 HanLP 目录: {HANLP_LOCAL_DIR}")
     return True
 
+# ===== 模型版本 =====
+def package_version(name):
+    """
+    已安装的 Python 包（含 spaCy 模型包）的版本（只读取元数据，不导入该包）
+
+    返回:
+        str: 版本号，未安装时为 'none'
+    """
+    from importlib import metadata
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return 'none'
+
+
+def file_fingerprint(path):
+    """
+    模型文件的指纹（大小和修改时间，替换模型文件后随之改变）
+
+    返回:
+        str: 'size:mtime_ns'，文件不存在时为 'none'
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return 'none'
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
 # ===== 模型信息 =====
 def get_models_info():
     """
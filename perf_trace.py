@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能追踪模块
+
+为翻译质量检查流水线的各个阶段（分句、语言检测、编码、第一/第二遍对齐、
+相似度计算等）记录：
+- 墙钟时间 (wall time)
+- CPU 时间（进程级，包含 ONNX Runtime / numba 的工作线程）
+- 句子数、窗口数等计数
+- 峰值 RSS 增量（该阶段使进程内存高水位上升了多少）
+
+结果可附加到 results['metadata']['performance']，
+也可导出为 Chrome Trace 格式 (chrome://tracing 或 https://ui.perfetto.dev 打开) 供离线分析。
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+
+def get_peak_rss_bytes():
+    """
+    获取当前进程的峰值常驻内存 (RSS)
+
+    返回:
+        int: 峰值 RSS 字节数（平台不支持时返回 0）
+    """
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+
+
+class PerfTracer:
+    """
+    轻量级阶段计时器
+
+    用法:
+        tracer = PerfTracer()
+        with tracer.span('split_source') as span:
+            sents = splitter.split_sentences(text)
+            span['counts']['sentences'] = len(sents)
+        results['metadata']['performance'] = tracer.summary()
+    """
+
+    def __init__(self, name='check_translation', listener=None):
+        """
+        初始化追踪器
+
+        参数:
+            name: 追踪名称（导出 trace 时作为进程名）
+            listener: 可选回调 listener(stage)，每个阶段开始时调用（用于进度上报）
+        """
+        self.name = name
+        self.listener = listener
+        self.spans = []
+        self._origin = time.perf_counter()
+        self._epoch = time.time()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage, **counts):
+        """
+        记录一个阶段
+
+        参数:
+            stage: 阶段名称
+            **counts: 初始计数（可在 with 块内通过 span['counts'] 补充）
+
+        生成:
+            span: 阶段记录字典，退出 with 块时填充耗时信息
+        """
+        record = {
+            'stage': stage,
+            'counts': dict(counts),
+            'thread': threading.get_ident(),
+        }
+        if self.listener is not None:
+            self.listener(stage)
+        rss_before = get_peak_rss_bytes()
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            wall_end = time.perf_counter()
+            cpu_end = time.process_time()
+            record['start_ms'] = (wall_start - self._origin) * 1000.0
+            record['wall_ms'] = (wall_end - wall_start) * 1000.0
+            record['cpu_ms'] = (cpu_end - cpu_start) * 1000.0
+            record['peak_rss_delta_bytes'] = max(0, get_peak_rss_bytes() - rss_before)
+            with self._lock:
+                self.spans.append(record)
+
+    def summary(self):
+        """
+        生成可 JSON 序列化的阶段统计
+
+        返回:
+            dict: {'total_wall_ms', 'total_cpu_ms', 'peak_rss_bytes', 'stages': [...]}
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s['start_ms'])
+        stages = [{
+            'stage': s['stage'],
+            'start_ms': round(s['start_ms'], 3),
+            'wall_ms': round(s['wall_ms'], 3),
+            'cpu_ms': round(s['cpu_ms'], 3),
+            'peak_rss_delta_bytes': s['peak_rss_delta_bytes'],
+            'counts': s['counts'],
+        } for s in spans]
+        return {
+            'started_at': self._epoch,
+            'total_wall_ms': round((time.perf_counter() - self._origin) * 1000.0, 3),
+            'total_cpu_ms': round(sum(s['cpu_ms'] for s in stages), 3),
+            'peak_rss_bytes': get_peak_rss_bytes(),
+            'stages': stages,
+        }
+
+    def to_chrome_trace(self):
+        """
+        转换为 Chrome Trace Event 格式
+
+        返回:
+            dict: {'traceEvents': [...]}
+        """
+        return performance_to_chrome_trace(self.summary(), name=self.name)
+
+    def export(self, output_path):
+        """
+        导出 trace 文件
+
+        参数:
+            output_path: 输出文件路径（.json）
+        """
+        export_trace(self.summary(), output_path, name=self.name)
+
+
+def performance_to_chrome_trace(performance, name='check_translation'):
+    """
+    将 summary() 的结果转换为 Chrome Trace Event 格式
+
+    参数:
+        performance: PerfTracer.summary() 的返回值（即 results['metadata']['performance']）
+        name: 进程名
+
+    返回:
+        dict: {'traceEvents': [...]}
+    """
+    pid = os.getpid()
+    base_us = performance.get('started_at', 0.0) * 1e6
+    events = [{
+        'name': 'process_name',
+        'ph': 'M',
+        'pid': pid,
+        'tid': 0,
+        'args': {'name': name},
+    }]
+    for stage in performance.get('stages', []):
+        args = dict(stage.get('counts', {}))
+        args['cpu_ms'] = stage['cpu_ms']
+        args['peak_rss_delta_bytes'] = stage['peak_rss_delta_bytes']
+        events.append({
+            'name': stage['stage'],
+            'cat': 'pipeline',
+            'ph': 'X',
+            'pid': pid,
+            'tid': 0,
+            'ts': base_us + stage['start_ms'] * 1000.0,
+            'dur': stage['wall_ms'] * 1000.0,
+            'args': args,
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def export_trace(performance, output_path, name='check_translation'):
+    """
+    将阶段统计导出为 Chrome Trace 文件
+
+    参数:
+        performance: PerfTracer.summary() 的返回值
+        output_path: 输出文件路径
+        name: 进程名
+    """
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(performance_to_chrome_trace(performance, name=name), f, ensure_ascii=False)
+    print(f"✓ 性能追踪文件已保存: {output_path}")
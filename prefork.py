@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多进程部署的线程池配置
+
+预加载模式下，主进程先加载所有模型（LaBSE、fastText、spaCy、HanLP）并完成 numba JIT，
+再 fork 出多个 worker，只读的权重通过写时复制 (copy-on-write) 在进程间共享。
+
+fork 只复制调用线程，父进程中已经启动的线程池在子进程中不复存在，
+继续使用会死锁或崩溃（libgomp / ONNX Runtime 均如此）。因此：
+- 主进程：所有线程池保持单线程（不创建工作线程），ONNX Runtime 会话设为 intra_op_num_threads=1
+- worker：fork 之后再按每个 worker 的线程预算配置 OpenMP (faiss)、BLAS（需要 threadpoolctl）、
+  torch (HanLP) 和 numba，并执行 register_post_fork() 注册的回调（如按 TQA_WORKER_ORT_THREADS
+  重建 ONNX Runtime 会话；默认不重建，各 worker 共用主进程的单线程会话和权重）
+"""
+
+import os
+import sys
+
+# 主进程中需要限制为单线程的线程池环境变量（必须在导入 numpy/onnxruntime/faiss/torch 之前设置）
+_SINGLE_THREAD_ENV = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS')
+
+# worker fork 之后的回调 hook(worker_threads) -> 描述（用于日志）
+_post_fork_hooks = []
+
+
+def register_post_fork(hook):
+    """
+    注册 worker fork 之后执行的回调（如按 worker 线程数重建主进程中单线程创建的 ONNX Runtime 会话）
+
+    参数:
+        hook: hook(worker_threads)，返回用于日志的描述字符串
+    """
+    _post_fork_hooks.append(hook)
+
+
+def default_worker_threads(workers):
+    """按 CPU 核心数平均分配给每个 worker 的线程数"""
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def configure_master_threads(worker_threads):
+    """
+    在主进程加载模型之前调用：让 fork 之前不创建任何线程池
+
+    参数:
+        worker_threads: fork 之后每个 worker 的线程数（numba 线程池上限）
+    """
+    for name in _SINGLE_THREAD_ENV:
+        os.environ.setdefault(name, '1')
+    # numba 的线程池只在 parallel=True 的函数首次运行时启动；这里只设置上限，
+    # 以便 worker 在 fork 之后调用 numba.set_num_threads()
+    os.environ.setdefault('NUMBA_NUM_THREADS', str(worker_threads))
+    # Hugging Face tokenizers 在 fork 前用过并行会在子进程中告警并退化，直接关闭
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+    # ONNX Runtime 单线程运行时不创建线程池，会话可以跨 fork 共享
+    os.environ.setdefault('TQA_ORT_THREADS', '1')
+
+
+def configure_worker_env(worker_threads):
+    """
+    非预加载模式：每个 worker 自己加载模型，在加载之前按线程预算设置环境变量
+
+    参数:
+        worker_threads: 每个 worker 的线程数
+    """
+    for name in _SINGLE_THREAD_ENV:
+        os.environ.setdefault(name, str(worker_threads))
+    os.environ.setdefault('NUMBA_NUM_THREADS', str(worker_threads))
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+    os.environ.setdefault('TQA_ORT_THREADS', str(worker_threads))
+
+
+def configure_worker_threads(worker_threads):
+    """
+    在 worker fork 之后调用：为本进程配置线程池
+
+    只配置已经导入的库，不会因此额外加载模块。
+
+    参数:
+        worker_threads: 本 worker 的线程数
+    """
+    configured = []
+
+    # 主进程设置的单线程环境变量只对之后启动的子进程有效；已加载的 BLAS 库用 threadpoolctl 调整
+    for name in _SINGLE_THREAD_ENV:
+        os.environ[name] = str(worker_threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(limits=worker_threads, user_api='blas')
+        configured.append('BLAS')
+    except ImportError:
+        print("⚠️  threadpoolctl 未安装，numpy 的 BLAS 保持单线程（pip install threadpoolctl）")
+
+    faiss = sys.modules.get('faiss')
+    if faiss is not None:
+        faiss.omp_set_num_threads(worker_threads)
+        configured.append('faiss/OpenMP')
+
+    torch = sys.modules.get('torch')
+    if torch is not None:
+        torch.set_num_threads(worker_threads)
+        configured.append('torch')
+
+    numba = sys.modules.get('numba')
+    if numba is not None:
+        numba.set_num_threads(min(worker_threads, numba.config.NUMBA_NUM_THREADS))
+        configured.append('numba')
+
+    for hook in _post_fork_hooks:
+        configured.append(hook(worker_threads))
+
+    print(f"✓ worker {os.getpid()} 线程池已配置: {worker_threads} 线程 ({', '.join(configured) or '无'})")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+接口响应的格式协商、序列化和压缩
+
+- 格式（Accept 请求头）:
+    application/json                    完整格式（默认，兼容旧客户端）
+    application/vnd.tqa.compact+json    紧凑格式：句子只发送一次，报告行用句子索引引用
+    application/msgpack                 紧凑格式的 MessagePack 编码（需要安装 msgpack）
+- 压缩（Accept-Encoding 请求头）: br（需要安装 brotli）优先，其次 gzip
+- JSON 编码: 安装了 orjson 时使用 orjson，否则使用标准库 json
+
+以上可选依赖缺失时自动退回到可用的格式，不影响接口功能。
+"""
+
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+FORMAT_JSON = 'json'
+FORMAT_COMPACT = 'compact'
+FORMAT_MSGPACK = 'msgpack'
+
+MIMETYPES = {
+    FORMAT_JSON: 'application/json',
+    FORMAT_COMPACT: 'application/vnd.tqa.compact+json',
+    FORMAT_MSGPACK: 'application/msgpack',
+}
+
+# 小于该字节数的响应不压缩（压缩收益抵不过开销）
+MIN_COMPRESS_BYTES = 1024
+
+
+def negotiate_format(accept_mimetypes):
+    """
+    按 Accept 请求头选择响应格式
+
+    参数:
+        accept_mimetypes: werkzeug 的 MIMEAccept（request.accept_mimetypes）
+
+    返回:
+        str: FORMAT_JSON / FORMAT_COMPACT / FORMAT_MSGPACK
+    """
+    # 只有显式声明时才使用非默认格式（*/* 或未带 Accept 时返回完整 JSON）
+    explicit = {value for value in accept_mimetypes.values() if accept_mimetypes[value] > 0}
+    if msgpack is not None and explicit & {MIMETYPES[FORMAT_MSGPACK], 'application/x-msgpack'}:
+        return FORMAT_MSGPACK
+    if MIMETYPES[FORMAT_COMPACT] in explicit:
+        return FORMAT_COMPACT
+    return FORMAT_JSON
+
+
+def negotiate_encoding(accept_encodings):
+    """
+    按 Accept-Encoding 请求头选择压缩算法
+
+    参数:
+        accept_encodings: werkzeug 的 Accept（request.accept_encodings）
+
+    返回:
+        str 或 None: 'br' / 'gzip' / None（不压缩）
+    """
+    offered = (['br'] if brotli is not None else []) + ['gzip']
+    for encoding in offered:
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def dumps_json(obj):
+    """序列化为 UTF-8 JSON 字节（有 orjson 时使用 orjson）"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def serialize(obj, fmt):
+    """
+    按格式序列化
+
+    参数:
+        obj: 响应对象
+        fmt: negotiate_format() 的结果
+
+    返回:
+        bytes
+    """
+    if fmt == FORMAT_MSGPACK:
+        return msgpack.packb(obj, use_bin_type=True)
+    return dumps_json(obj)
+
+
+def compress(body, encoding):
+    """
+    压缩响应体
+
+    参数:
+        body: bytes
+        encoding: 'br' / 'gzip' / None
+
+    返回:
+        (body, encoding): 小响应或 encoding 为 None 时原样返回，encoding 为 None
+    """
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    if encoding == 'br':
+        return brotli.compress(body, quality=5), 'br'
+    return gzip.compress(body, compresslevel=6), 'gzip'
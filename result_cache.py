@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+检查结果缓存
+
+相同的原文、译文和参数（页面刷新、客户端重试、多人打开同一份检查）会得到相同的结果。
+ResultCache 以规范化输入、实际生效参数和服务端配置指纹（模型版本、分句/词对齐配置等，
+见 TranslationQA.fingerprint）的哈希为键，缓存已序列化的响应体，按条目数、总字节数 (LRU)
+和存活时间 (TTL) 淘汰。同一个键也用作 HTTP ETag，模型或配置变化后 ETag 随之改变。
+"""
+
+import hashlib
+import json
+import time
+
+from lru_cache import LRUCache
+
+# 结果格式或检查流水线变化时递增，使旧的缓存键和 ETag 失效
+CACHE_VERSION = 1
+
+
+def normalize_text(text):
+    """
+    规范化输入文本（统一换行符、去掉首尾空白）
+
+    只做不影响检查结果的规范化，检查本身也应使用规范化后的文本。
+    """
+    return text.replace('\r\n', '\n').replace('\r', '\n').strip()
+
+
+def make_key(source_text, target_text, options, fingerprint=''):
+    """
+    计算缓存键
+
+    参数:
+        source_text: 规范化后的原文
+        target_text: 规范化后的译文
+        options: CheckOptions（实际生效的参数）
+        fingerprint: 服务端配置指纹（见 TranslationQA.fingerprint）
+
+    返回:
+        str: 十六进制 SHA-256 摘要
+    """
+    params = {}
+    for name, value in sorted(options.to_dict().items()):
+        # JSON 中的 5 和 5.0 视为同一参数
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        params[name] = value
+
+    digest = hashlib.sha256()
+    digest.update(json.dumps({'version': CACHE_VERSION, 'server': fingerprint, 'params': params},
+                             sort_keys=True).encode('utf-8'))
+    for text in (source_text, target_text):
+        encoded = text.encode('utf-8')
+        # 带长度前缀，避免原文/译文边界不同但拼接相同的输入冲突
+        digest.update(len(encoded).to_bytes(8, 'big'))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class ResultCache(LRUCache):
+    """
+    线程安全的 LRU + TTL 缓存（值为 bytes），在条目数之外还按总字节数淘汰
+    """
+
+    def __init__(self, max_entries=256, max_bytes=256 * 1024 * 1024, ttl_seconds=3600):
+        """
+        参数:
+            max_entries: 最多缓存的结果数（0 表示禁用缓存）
+            max_bytes: 所有缓存值的总字节数上限
+            ttl_seconds: 结果的存活时间（秒，0 表示不过期）
+        """
+        super().__init__(max_entries)
+        self.max_bytes = max_bytes
+        self.ttl = ttl_seconds
+        self._bytes = 0
+        self.stats['expired'] = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key):
+        """
+        查找缓存
+
+        返回:
+            bytes 或 None（未命中或已过期）
+        """
+        entry = super().get(key)  # (expires_at, value)
+        return entry[1] if entry is not None else None
+
+    def put(self, key, value):
+        """
+        写入缓存（超过总字节数上限的单个值不缓存）
+
+        参数:
+            key: make_key() 的结果
+            value: 已序列化的响应体 (bytes)
+        """
+        if not self.enabled or len(value) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        super().put(key, (expires_at, value))
+
+    def get_stats(self):
+        """
+        获取缓存统计
+
+        返回:
+            dict: 命中/未命中/淘汰/过期次数、条目数 (size)、命中率和总字节数
+        """
+        stats = super().get_stats()
+        stats['bytes'] = self._bytes
+        return stats
+
+    def _over_limit(self):
+        return len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+
+    def _on_add(self, key, entry):
+        self._bytes += len(entry[1])
+
+    def _on_remove(self, key, entry):
+        self._bytes -= len(entry[1])
+
+    def _is_expired(self, entry):
+        return entry[0] is not None and entry[0] <= time.monotonic()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分句结果缓存
+
+重新提交同一文档（或只改了几段的文档）时，spaCy / HanLP 分句会整篇重做，长英文和日文 (GiNZA)
+文本要几秒。SentenceCache 以分句单元（见 text_splitter.split_units，句子不会跨越单元边界）为粒度
+缓存分句结果，键为 (分句配置, 语言, 单元文本) 的哈希：修改过的文档只需重新分句改动的单元。
+
+分句配置（见 TextSplitter.segmenter_config）包含模型名和版本、spaCy/HanLP 版本、分句方式和管道组件，
+升级模型或改变分句方式后旧条目自然不再命中，按条目数 LRU 淘汰。
+"""
+
+import hashlib
+
+from lru_cache import LRUCache
+
+# 分句单元的划分或分句后处理（去空白、过滤空句等）变化时递增，使旧条目失效
+CACHE_VERSION = 2
+
+
+def make_key(config, language, paragraph):
+    """
+    计算分句单元的缓存键
+
+    参数:
+        config: 分句配置字符串
+        language: 语言代码
+        paragraph: 分句单元文本
+
+    返回:
+        str: 十六进制 SHA-256 摘要
+    """
+    digest = hashlib.sha256()
+    for part in (str(CACHE_VERSION), config, language, paragraph):
+        encoded = part.encode('utf-8')
+        # 带长度前缀，避免各部分边界不同但拼接相同的输入冲突
+        digest.update(len(encoded).to_bytes(8, 'big'))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+class SentenceCache(LRUCache):
+    """
+    线程安全的分句单元 → 句子列表 LRU 缓存
+    """
+
+    def __init__(self, max_entries=20000):
+        """
+        参数:
+            max_entries: 最多缓存的分句单元数（0 表示禁用缓存）
+        """
+        super().__init__(max_entries)
+
+    def get_many(self, keys, record=True):
+        """
+        批量查找
+
+        参数:
+            keys: 缓存键列表（可重复）
+            record: 是否计入命中统计
+
+        返回:
+            dict: {命中的键: 句子列表}
+        """
+        found = super().get_many(keys, record)
+        return {key: list(sentences) for key, sentences in found.items()}
+
+    def put_many(self, items):
+        """
+        批量写入
+
+        参数:
+            items: {缓存键: 句子列表}
+        """
+        super().put_many({key: tuple(sentences) for key, sentences in items.items()})
@@ -1,5 +1,6 @@
 // 全局变量
 let csvData = '';
+const csvHeaders = ['原文 (Source)', '译文 (Target)', '源索引', '目标索引', '相似度 (Similarity)', '异常情况 (Exception)'];
 
 // DOM元素
 const sourceTextEl = document.getElementById('sourceText');
@@ -29,6 +30,10 @@ const winEl = document.getElementById('win');
 const scoreThresholdEl = document.getElementById('scoreThreshold');
 const useMinSimilarityEl = document.getElementById('useMinSimilarity');
 const autoSplitNMEl = document.getElementById('autoSplitNM');
+const wordAlignmentsEl = document.getElementById('wordAlignments');
+
+// 随检查结果预先计算的词对齐：`${原文}\u0000${译文}` -> 词对齐 CSV
+let precomputedWordAlignments = new Map();
 
 // 预设配置
 const presetConfigs = {
@@ -117,6 +122,22 @@ toggleAdvancedBtn.addEventListener('click', () => {
     toggleIcon.textContent = isHidden ? '▼' : '▶';
 });
 
+// 检测阶段 → 显示名称
+const stageLabels = {
+    split_source: '原文分句',
+    detect_source: '检测原文语言',
+    split_target: '译文分句',
+    detect_target: '检测译文语言',
+    encode: '句子编码',
+    first_pass: '第一遍对齐',
+    second_pass: '第二遍对齐',
+    score: '计算相似度',
+    auto_split_nm: '拆散N:M对齐',
+    detect_issues: '检测异常',
+    word_align: '计算词对齐',
+    done: '完成'
+};
+
 // 检测按钮点击事件
 checkBtn.addEventListener('click', async () => {
     const sourceText = sourceTextEl.value.trim();
@@ -131,40 +152,32 @@ checkBtn.addEventListener('click', async () => {
     checkBtn.disabled = true;
     btnText.style.display = 'none';
     btnLoading.style.display = 'inline';
+    updateProgress('', 0);
     resultSection.style.display = 'none';
     errorSection.style.display = 'none';
     
+    const payload = {
+        source_text: sourceText,
+        target_text: targetText,
+        similarity_threshold: parseFloat(similarityThresholdEl.value),
+        force_split_threshold: parseFloat(forceSplitThresholdEl.value),
+        // 高级参数
+        max_align: parseInt(maxAlignEl.value),
+        top_k: parseInt(topKEl.value),
+        skip: parseFloat(skipEl.value),
+        win: parseInt(winEl.value),
+        score_threshold: parseFloat(scoreThresholdEl.value),
+        use_min_similarity: useMinSimilarityEl.checked,
+        auto_split_nm: autoSplitNMEl.checked,
+        word_alignments: wordAlignmentsEl.value
+    };
+
     try {
-        // 发送请求
-        const response = await fetch('/api/check', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                source_text: sourceText,
-                target_text: targetText,
-                similarity_threshold: parseFloat(similarityThresholdEl.value),
-                force_split_threshold: parseFloat(forceSplitThresholdEl.value),
-                // 高级参数
-                max_align: parseInt(maxAlignEl.value),
-                top_k: parseInt(topKEl.value),
-                skip: parseFloat(skipEl.value),
-                win: parseInt(winEl.value),
-                score_threshold: parseFloat(scoreThresholdEl.value),
-                use_min_similarity: useMinSimilarityEl.checked,
-                auto_split_nm: autoSplitNMEl.checked
-            })
-        });
-        
-        const result = await response.json();
-        
-        if (result.success) {
-            // 显示结果
-            displayResults(result.data);
+        // 浏览器支持流式读取时使用流式接口，逐组渲染结果
+        if (window.ReadableStream && window.TextDecoder) {
+            await runStreamingCheck(payload);
         } else {
-            // 显示错误
-            displayError(result.error);
+            await runCheck(payload);
         }
     } catch (error) {
         displayError(`网络错误: ${error.message}`);
@@ -176,11 +189,259 @@ checkBtn.addEventListener('click', async () => {
     }
 });
 
+// 更新检测进度
+function updateProgress(stage, percent) {
+    const label = stageLabels[stage] || stage;
+    const detail = label ? ` ${label} (${Math.round(percent)}%)` : '';
+    btnLoading.innerHTML = `<span class="spinner"></span> 检测中...${detail}`;
+}
+
+// 一次性检查（等待完整结果）
+async function runCheck(payload) {
+    // 发送请求（请求紧凑格式，浏览器会自动协商 gzip/br 压缩）
+    const response = await fetch('/api/check', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'application/vnd.tqa.compact+json, application/json;q=0.9'
+        },
+        body: JSON.stringify(payload)
+    });
+
+    const result = await response.json();
+
+    if (result.success) {
+        // 显示结果
+        const data = result.data.format === 'compact' ? expandCompactData(result.data) : result.data;
+        displayResults(data);
+    } else {
+        // 显示错误
+        displayError(result.error);
+    }
+}
+
+// 将紧凑格式（句子只发送一次，行中用索引引用）展开为完整格式
+function expandCompactData(data) {
+    const src = data.sentences.source;
+    const tgt = data.sentences.target;
+
+    const lines = [csvHeaders.join(',')];
+    data.rows.forEach(([srcIdx, tgtIdx, similarity, exception]) => {
+        const srcText = srcIdx === null ? '' : src[srcIdx];
+        const tgtText = tgtIdx === null ? '' : tgt[tgtIdx];
+        const simText = similarity === null ? '' : similarity.toFixed(4);
+        lines.push(`"${srcText}","${tgtText}",${srcIdx ?? ''},${tgtIdx ?? ''},${simText},${data.exceptions[exception]}`);
+    });
+
+    return {
+        csv: lines.join('\n'),
+        summary: data.summary,
+        issues: {
+            omissions: data.issues.omissions.map(i => ({ src_index: i, src_text: src[i] })),
+            additions: data.issues.additions.map(i => ({ tgt_index: i, tgt_text: tgt[i] })),
+            low_similarity: data.issues.low_similarity.map(([srcIndices, tgtIndices, similarity]) => ({
+                src_indices: srcIndices,
+                tgt_indices: tgtIndices,
+                similarity: similarity
+            }))
+        },
+        force_split_count: data.force_split_count,
+        performance: data.performance,
+        word_alignments: (data.word_alignments || []).map(([srcIndices, tgtIndices, csv]) => ({
+            src_text: srcIndices.map(i => src[i]).join(' '),
+            tgt_text: tgtIndices.map(i => tgt[i]).join(' '),
+            alignment: { csv: csv }
+        }))
+    };
+}
+
+// 保存随检查结果返回的词对齐
+function setWordAlignments(wordAlignments) {
+    precomputedWordAlignments = new Map();
+    (wordAlignments || []).forEach(item => {
+        precomputedWordAlignments.set(`${item.src_text}\u0000${item.tgt_text}`, item.alignment);
+    });
+}
+
+// 流式检查：逐行读取 NDJSON 事件，对齐组确定后立即追加到表格
+async function runStreamingCheck(payload) {
+    const response = await fetch('/api/check-stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            // 对齐组事件已包含句子文本，最终结果只需紧凑格式
+            'Accept': 'application/x-ndjson, application/vnd.tqa.compact+json'
+        },
+        body: JSON.stringify(payload)
+    });
+
+    if (!response.ok || !response.body) {
+        const result = await response.json();
+        if (result.retry_after) {
+            displayError(`${result.error}（约 ${result.retry_after} 秒后可重试）`);
+        } else {
+            displayError(result.error);
+        }
+        return;
+    }
+
+    const stream = {
+        tbody: null,
+        rowCount: 0,
+        omissions: new Set(),
+        additions: new Set()
+    };
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let newline;
+        while ((newline = buffer.indexOf('\n')) >= 0) {
+            const line = buffer.slice(0, newline).trim();
+            buffer = buffer.slice(newline + 1);
+            if (line) {
+                handleStreamEvent(JSON.parse(line), stream);
+            }
+        }
+    }
+}
+
+// 处理一个流式事件
+function handleStreamEvent(event, stream) {
+    if (event.event === 'progress') {
+        updateProgress(event.stage, event.percent);
+    } else if (event.event === 'group') {
+        if (!stream.tbody) {
+            stream.tbody = startStreamingTable();
+        }
+        appendGroupRows(event, stream);
+    } else if (event.event === 'done') {
+        const data = event.data.format === 'compact' ? expandCompactData(event.data) : event.data;
+        if (!stream.tbody) {
+            // 没有收到对齐组（如命中服务端结果缓存）：直接渲染完整结果
+            displayResults(data);
+            return;
+        }
+        finishStreamingTable(data, stream);
+    } else if (event.event === 'error') {
+        displayError(event.error);
+    }
+}
+
+// 创建空表格并显示结果区域（摘要在检查完成后填充）
+function startStreamingTable() {
+    csvData = '';
+    setWordAlignments([]);
+    summaryEl.innerHTML = '<h3>📊 统计信息</h3><p>对齐结果逐组生成中...</p>';
+
+    let tableHTML = '<table><thead><tr><th>操作</th>';
+    csvHeaders.forEach(header => {
+        tableHTML += `<th>${header}</th>`;
+    });
+    tableHTML += '</tr></thead><tbody></tbody></table>';
+    csvTableEl.innerHTML = tableHTML;
+
+    resultSection.style.display = 'block';
+    errorSection.style.display = 'none';
+    return csvTableEl.querySelector('tbody');
+}
+
+// 按排序键插入一个对齐组的所有行（与完整报告的行顺序一致）
+function appendGroupRows(group, stream) {
+    const showButton = !group.force_split && group.similarity !== null && group.src_text && group.tgt_text;
+
+    group.rows.forEach((cells, i) => {
+        const tr = document.createElement('tr');
+        stream.rowCount += 1;
+        tr.setAttribute('data-row-index', stream.rowCount);
+        tr.dataset.sortKey = group.sort_keys[i];
+
+        let rowHTML = '';
+        if (i === 0 && showButton) {
+            rowHTML += `<td><button class="word-align-btn" data-source="${escapeHtml(group.src_text)}" data-target="${escapeHtml(group.tgt_text)}">词对齐</button></td>`;
+        } else {
+            rowHTML += '<td></td>';
+        }
+        rowHTML += renderCells(cells.map(cell => String(cell)));
+        tr.innerHTML = rowHTML;
+
+        const btn = tr.querySelector('.word-align-btn');
+        if (btn) {
+            btn.addEventListener('click', onWordAlignClick);
+        }
+        insertRowByKey(stream.tbody, tr);
+    });
+
+    group.issues.omissions.forEach(item => stream.omissions.add(item.src_index));
+    group.issues.additions.forEach(item => stream.additions.add(item.tgt_index));
+}
+
+// 插入到第一个排序键更大的行之前（键相同时保持到达顺序）；行大多按顺序到达，从表尾向前查找
+function insertRowByKey(tbody, tr) {
+    const key = Number(tr.dataset.sortKey);
+    let next = null;
+    let row = tbody.lastElementChild;
+    while (row && Number(row.dataset.sortKey) > key) {
+        next = row;
+        row = row.previousElementSibling;
+    }
+    tbody.insertBefore(tr, next);
+}
+
+// 检查完成：在源位置补充未被任何对齐组覆盖的缺失/增添，并显示摘要
+function finishStreamingTable(data, stream) {
+    const rest = [];
+    const keys = [];
+    // 排序键与服务端 omission_row / addition_row 相同
+    data.issues.omissions.forEach(item => {
+        if (!stream.omissions.has(item.src_index)) {
+            rest.push([item.src_text, '', item.src_index, '', '', '缺失 (Omission)']);
+            keys.push(item.src_index);
+        }
+    });
+    data.issues.additions.forEach(item => {
+        if (!stream.additions.has(item.tgt_index)) {
+            rest.push(['', item.tgt_text, '', item.tgt_index, '', '增添 (Addition)']);
+            keys.push(999999);
+        }
+    });
+    if (rest.length > 0) {
+        appendGroupRows({ rows: rest, sort_keys: keys, force_split: true, issues: { omissions: [], additions: [] } }, stream);
+    }
+    // 按最终位置重新编号
+    Array.from(stream.tbody.children).forEach((tr, i) => tr.setAttribute('data-row-index', i + 1));
+
+    csvData = data.csv;
+    setWordAlignments(data.word_alignments);
+    displaySummary(data);
+}
+
 // 显示结果
 function displayResults(data) {
     csvData = data.csv;
+    setWordAlignments(data.word_alignments);
     
     // 显示摘要
+    displaySummary(data);
+    
+    // 显示CSV表格
+    displayCsvTable(data.csv);
+    
+    // 显示结果区域
+    resultSection.style.display = 'block';
+    errorSection.style.display = 'none';
+    
+    // 滚动到结果区域
+    resultSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
+}
+
+// 显示摘要
+function displaySummary(data) {
     const summary = data.summary;
     const issues = data.issues;
     
@@ -232,16 +493,6 @@ function displayResults(data) {
             </div>
         ` : ''}
     `;
-    
-    // 显示CSV表格
-    displayCsvTable(data.csv);
-    
-    // 显示结果区域
-    resultSection.style.display = 'block';
-    errorSection.style.display = 'none';
-    
-    // 滚动到结果区域
-    resultSection.scrollIntoView({ behavior: 'smooth', block: 'start' });
 }
 
 // 显示CSV表格
@@ -324,20 +575,7 @@ function displayCsvTable(csv) {
         }
 
         // 渲染其他列
-        row.cells.forEach((cell, index) => {
-            let className = '';
-            // 最后一列是异常情况
-            if (index === row.cells.length - 1) {
-                if (cell === 'OK') {
-                    className = 'exception-ok';
-                } else if (cell.includes('缺失') || cell.includes('增添')) {
-                    className = 'exception-error';
-                } else if (cell.includes('相似度低')) {
-                    className = 'exception-warning';
-                }
-            }
-            tableHTML += `<td class="${className}">${cell}</td>`;
-        });
+        tableHTML += renderCells(row.cells);
         tableHTML += '</tr>';
     }
 
@@ -346,42 +584,63 @@ function displayCsvTable(csv) {
 
     // 为所有词对齐按钮添加事件监听器
     document.querySelectorAll('.word-align-btn').forEach(btn => {
-        btn.addEventListener('click', function() {
-            const sourceText = this.getAttribute('data-source');
-            const targetText = this.getAttribute('data-target');
-            const groupStartIndex = parseInt(this.getAttribute('data-group-start'));
-            const rowElement = this.closest('tr');
-
-            // 找到对齐组的最后一行
-            let lastRowOfGroup = rowElement;
-            let nextRow = rowElement.nextElementSibling;
-
-            // 遍历找到对齐组的最后一行（下一个有相似度值的行之前）
-            while (nextRow && !nextRow.classList.contains('word-align-row')) {
-                const cells = Array.from(nextRow.querySelectorAll('td'));
-                // 检查相似度列（第5列，索引4+1因为有操作列）
-                const similarityCell = cells[5];
-                if (similarityCell && similarityCell.textContent.trim() !== '') {
-                    // 遇到下一个对齐组，停止
-                    break;
-                }
-                lastRowOfGroup = nextRow;
-                nextRow = nextRow.nextElementSibling;
-            }
+        btn.addEventListener('click', onWordAlignClick);
+    });
+}
 
-            // 检查最后一行的下一行是否已经有词对齐结果
-            const wordAlignRow = lastRowOfGroup.nextElementSibling;
-            if (wordAlignRow && wordAlignRow.classList.contains('word-align-row')) {
-                // 如果已经展开，则关闭
-                wordAlignRow.remove();
-                this.textContent = '词对齐';
-            } else {
-                // 否则执行词对齐
-                this.textContent = '关闭';
-                performWordAlignment(sourceText, targetText, lastRowOfGroup);
+// 渲染一行的数据列（最后一列是异常情况，按类型着色）
+function renderCells(cells) {
+    let html = '';
+    cells.forEach((cell, index) => {
+        let className = '';
+        if (index === cells.length - 1) {
+            if (cell === 'OK') {
+                className = 'exception-ok';
+            } else if (cell.includes('缺失') || cell.includes('增添')) {
+                className = 'exception-error';
+            } else if (cell.includes('相似度低')) {
+                className = 'exception-warning';
             }
-        });
+        }
+        html += `<td class="${className}">${cell}</td>`;
     });
+    return html;
+}
+
+// 词对齐按钮点击事件
+function onWordAlignClick() {
+    const sourceText = this.getAttribute('data-source');
+    const targetText = this.getAttribute('data-target');
+    const rowElement = this.closest('tr');
+
+    // 找到对齐组的最后一行
+    let lastRowOfGroup = rowElement;
+    let nextRow = rowElement.nextElementSibling;
+
+    // 遍历找到对齐组的最后一行（下一个有相似度值的行之前）
+    while (nextRow && !nextRow.classList.contains('word-align-row')) {
+        const cells = Array.from(nextRow.querySelectorAll('td'));
+        // 检查相似度列（第5列，索引4+1因为有操作列）
+        const similarityCell = cells[5];
+        if (similarityCell && similarityCell.textContent.trim() !== '') {
+            // 遇到下一个对齐组，停止
+            break;
+        }
+        lastRowOfGroup = nextRow;
+        nextRow = nextRow.nextElementSibling;
+    }
+
+    // 检查最后一行的下一行是否已经有词对齐结果
+    const wordAlignRow = lastRowOfGroup.nextElementSibling;
+    if (wordAlignRow && wordAlignRow.classList.contains('word-align-row')) {
+        // 如果已经展开，则关闭
+        wordAlignRow.remove();
+        this.textContent = '词对齐';
+    } else {
+        // 否则执行词对齐
+        this.textContent = '关闭';
+        performWordAlignment(sourceText, targetText, lastRowOfGroup);
+    }
 }
 
 // HTML转义函数
@@ -451,6 +710,13 @@ copyTableBtn.addEventListener('click', () => {
 
 // 词对齐功能
 async function performWordAlignment(sourceText, targetText, rowElement) {
+    // 已随检查结果预先计算的，直接显示
+    const precomputed = precomputedWordAlignments.get(`${sourceText}\u0000${targetText}`);
+    if (precomputed) {
+        displayWordAlignmentResult(precomputed, rowElement);
+        return;
+    }
+
     try {
         // 显示加载状态
         const loadingRow = document.createElement('tr');
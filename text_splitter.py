@@ -7,15 +7,183 @@
 - 中文：使用 HanLP
 - 日文：使用 GiNZA (spaCy)
 - 其他语言：使用对应的 spaCy 模型
+
+spaCy 模型只为分句加载必要的组件（见 TextSplitter.SEGMENTERS），
+精简后的管道按 (模型, 分句方式) 在进程内缓存，多个 TextSplitter 实例共用。
+
+超过 chunk_chars 的分句单元按换行和句末标点切成块（见 iter_text_chunks），spaCy 用 nlp.pipe
+批量处理，句子按原顺序拼接；单块大小有上限，不会超过 spaCy 的 max_length。
+processes > 1 时各块交给一个常驻的进程池（spawn 启动，只创建一次，工作进程各自加载
+spaCy 管道 / HanLP 分句器），不在请求线程中 fork。
+
+分句以"分句单元"为单位进行（见 split_units）：空行和以句末标点结尾的行是单元边界，
+硬换行（行尾没有句末标点）的各行留在同一单元，句子不会跨越单元边界。
+传入 SentenceCache 时按单元缓存分句结果（键包含分句配置版本，见 segmenter_config），
+只对缓存中没有的单元分句；是否启用缓存不影响分句结果。
 """
 
+import functools
+import multiprocessing
+import os
 import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from language_detector import LanguageDetector
-from model_config import setup_hanlp_env
+from model_config import FASTTEXT_MODEL_PATH, file_fingerprint, package_version, setup_hanlp_env
+from sentence_cache import CACHE_VERSION as SENTENCE_CACHE_VERSION, make_key
 
 # 设置 HanLP 环境变量（使用本地模型）
 setup_hanlp_env()
 
+# 分句用不到的 spaCy 组件（加载时排除）；tok2vec 在加载后确认没有组件依赖时再移除
+UNUSED_SPACY_COMPONENTS = ['tagger', 'morphologizer', 'parser', 'attribute_ruler',
+                           'lemmatizer', 'trainable_lemmatizer', 'ner', 'entity_ruler']
+
+# (模型名, 分句方式) -> (spaCy 管道, 调用锁)
+_pipeline_cache = {}
+_pipeline_cache_lock = threading.Lock()
+
+
+def load_spacy_pipeline(model_name, segmenter):
+    """
+    加载用于分句的 spaCy 管道（进程内缓存，多个实例共用同一管道和同一把调用锁）
+
+    参数:
+        model_name: spaCy 模型名
+        segmenter: 'full'（完整管道，依存句法分句）、'senter'（只保留统计分句组件）
+                   或 'sentencizer'（只保留分词器 + 标点规则分句）
+
+    返回:
+        (nlp, lock): spaCy 管道和调用锁（spaCy 管道不保证线程安全，调用时需持有该锁）
+
+    异常:
+        OSError: 模型未安装
+        ValueError: 模型的管道组件无法按分句方式启用或移除
+    """
+    key = (model_name, segmenter)
+    with _pipeline_cache_lock:
+        if key in _pipeline_cache:
+            return _pipeline_cache[key]
+
+        import spacy
+        if segmenter == 'full':
+            nlp = spacy.load(model_name)
+        else:
+            nlp = spacy.load(model_name, exclude=UNUSED_SPACY_COMPONENTS)
+            if segmenter == 'senter' and 'senter' in nlp.component_names:
+                # 训练好的管道中 senter 默认是禁用的
+                if 'senter' in nlp.disabled:
+                    nlp.enable_pipe('senter')
+                keep = {'senter'}
+            else:
+                if segmenter == 'senter':
+                    print(f"⚠️  {model_name} 没有 senter 组件，改用规则分句 (sentencizer)")
+                nlp.add_pipe('sentencizer')
+                keep = {'sentencizer'}
+            # 移除其余组件（GiNZA 等模型的自定义组件、不再被依赖的 tok2vec）
+            for name in list(nlp.component_names):
+                if name in keep or name == 'tok2vec':
+                    continue
+                nlp.remove_pipe(name)
+            if 'tok2vec' in nlp.component_names and not getattr(nlp.get_pipe('tok2vec'), 'listening_components', None):
+                nlp.remove_pipe('tok2vec')
+        _pipeline_cache[key] = (nlp, threading.Lock())
+        return _pipeline_cache[key]
+
+
+# 超长段落的切分点：句末标点（及其后的引号/括号）之后，其次为空白
+_SENTENCE_END_PATTERN = re.compile(r'[.!?。！？…]+["\'”’）)\]]*\s*')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+# 以句末标点（及其后的引号/括号）结尾的行
+_LINE_END_PATTERN = re.compile(r'[.!?。！？…]["\'”’）)\]]*\s*$')
+
+
+def split_units(text):
+    """
+    把文本切成分句单元：空行和以句末标点结尾的行之后是单元边界，
+    行尾没有句末标点的硬换行（如 'This sentence is hard-wrapped\\nacross two lines.'）留在同一单元
+
+    分句在每个单元内独立进行，单元边界总是句子边界，因此按单元缓存分句结果不会改变结果。
+
+    参数:
+        text: 输入文本
+
+    返回:
+        list: 分句单元（按原顺序，去掉首尾空白，不含空单元）
+    """
+    units, lines = [], []
+    for line in text.split('\n'):
+        blank = not line.strip()
+        if not blank:
+            lines.append(line)
+        if lines and (blank or _LINE_END_PATTERN.search(line)):
+            units.append('\n'.join(lines).strip())
+            lines = []
+    if lines:
+        units.append('\n'.join(lines).strip())
+    return units
+
+
+def _cut_long_paragraph(paragraph, max_chars):
+    """
+    把超过 max_chars 的段落切成若干段（优先在句末标点之后切，其次在空白处，都没有时硬切）
+
+    返回:
+        list: 段落片段，每段不超过 max_chars
+    """
+    pieces = []
+    while len(paragraph) > max_chars:
+        window = paragraph[:max_chars]
+        cut = 0
+        for pattern in (_SENTENCE_END_PATTERN, _WHITESPACE_PATTERN):
+            for match in pattern.finditer(window):
+                cut = match.end()
+            if cut:
+                break
+        cut = cut or max_chars
+        pieces.append(paragraph[:cut])
+        paragraph = paragraph[cut:]
+    pieces.append(paragraph)
+    return pieces
+
+
+def iter_text_chunks(text, max_chars):
+    """
+    按段落（换行）边界把文本切成不超过 max_chars 的块，逐块生成
+
+    相邻的段落合并进同一块；单个段落超过 max_chars 时在句末标点或空白处再切
+    （此时句子可能被截断在两块之间）。
+
+    参数:
+        text: 输入文本
+        max_chars: 每块的最大字符数
+
+    返回:
+        生成器: 文本块（按原顺序）
+    """
+    buffer, size = [], 0
+    for paragraph in text.split('\n'):
+        for piece in _cut_long_paragraph(paragraph, max_chars):
+            if buffer and size + len(piece) > max_chars:
+                yield '\n'.join(buffer)
+                buffer, size = [], 0
+            buffer.append(piece)
+            size += len(piece) + 1
+    if buffer:
+        yield '\n'.join(buffer)
+
+
+def _spacy_split_chunk(model_name, segmenter, chunk):
+    """在进程池的工作进程中用 spaCy 分句（管道在工作进程内按 load_spacy_pipeline 缓存）"""
+    nlp, _ = load_spacy_pipeline(model_name, segmenter)
+    return [s for s in (sent.text.strip() for sent in nlp(chunk).sents) if s]
+
+
+def _hanlp_split_chunk(chunk):
+    """在进程池的工作进程中用 HanLP 规则分句器处理一块文本"""
+    from hanlp.utils.rules import split_sentence
+    return [s for s in split_sentence(chunk) if s]
+
 
 class TextSplitter:
     """多语言文本分句器"""
@@ -36,18 +204,50 @@ class TextSplitter:
         'ko': 'ko_core_news_sm',     # 韩语
     }
 
-    def __init__(self, auto_detect=True):
+    # spaCy 分句方式：完整管道 / 统计分句组件 senter / 标点规则 sentencizer
+    SEGMENTERS = ('full', 'senter', 'sentencizer')
+
+    # 分块模式下 nlp.pipe 每批的块数
+    PIPE_BATCH_SIZE = 4
+    # nlp.pipe 每批的分句单元数
+    PARAGRAPH_BATCH_SIZE = 64
+
+    def __init__(self, auto_detect=True, segmenter='senter', language_segmenters=None,
+                 chunk_chars=100000, processes=1, sentence_cache=None):
         """
         初始化分句器
 
         参数:
             auto_detect: 是否自动检测语言（使用 fastText）
+            segmenter: spaCy 语言的默认分句方式（见 SEGMENTERS）
+            language_segmenters: 按语言覆盖分句方式，如 {'ja': 'full'}
+            chunk_chars: 超过该字符数的分句单元分块处理（0 表示只在超过 spaCy max_length 时分块）
+            processes: 分块模式下常驻进程池的进程数（spaCy 和 HanLP 共用），1 表示在当前线程中处理
+            sentence_cache: 按分句单元缓存分句结果（SentenceCache），为 None 时不缓存
         """
+        for value in [segmenter, *(language_segmenters or {}).values()]:
+            if value not in self.SEGMENTERS:
+                raise ValueError(f"未知的分句方式: {value}")
+        if chunk_chars < 0 or processes < 1:
+            raise ValueError(f"无效的分块参数: chunk_chars={chunk_chars}, processes={processes}")
+        self.segmenter = segmenter
+        self.language_segmenters = dict(language_segmenters or {})
+        self.chunk_chars = chunk_chars
+        self.processes = processes
+        self._process_pool = None  # 分块分句的进程池（首次需要时创建）
+        self._process_pool_pid = None
+        self.sentence_cache = sentence_cache
+        self._segmenter_configs = {}  # 语言 -> 分句配置字符串（缓存键的一部分）
+        self._fingerprint = None
         self.auto_detect = auto_detect
         self.language_detector = None
-        self.spacy_models = {}  # 缓存已加载的 spaCy 模型
+        self.spacy_models = {}  # 缓存已加载的 spaCy 模型（加载失败的语言为 None）
         self.hanlp_split_sentence = None
 
+        # 多线程共享时：加载模型用全局锁，调用 spaCy 管道按管道加锁（见 load_spacy_pipeline）
+        self._load_lock = threading.Lock()
+        self._nlp_locks = {}
+
         # 初始化语言检测器
         if auto_detect:
             try:
@@ -79,56 +279,96 @@ class TextSplitter:
         if language in self.spacy_models:
             return self.spacy_models[language]
 
+        with self._load_lock:
+            # 等待锁期间其他线程可能已完成加载
+            if language in self.spacy_models:
+                return self.spacy_models[language]
+            return self._load_spacy_model_locked(language)
+
+    def _load_spacy_model_locked(self, language):
+        """
+        加载 spaCy 模型（调用方需持有 self._load_lock）
+
+        参数:
+            language: 语言代码
+
+        返回:
+            spaCy nlp 对象，如果加载失败则返回 None
+        """
         # 获取对应的模型名称
         model_name = self.SPACY_MODELS.get(language)
         if not model_name:
             print(f"⚠️  不支持的语言: {language}")
             return None
 
-        # 尝试加载模型
+        segmenter = self.language_segmenters.get(language, self.segmenter)
+
+        # 尝试加载模型（不在运行时下载：模型应在部署时由 install.sh 安装）
         try:
-            import spacy
-            try:
-                nlp = spacy.load(model_name)
-                self.spacy_models[language] = nlp
-                print(f"✓ spaCy 模型 ({model_name}) 加载成功")
-                return nlp
-            except OSError:
-                # 模型未安装，尝试自动下载
-                print(f"⚠️  spaCy 模型 {model_name} 未安装，正在自动下载...")
-                try:
-                    import subprocess
-                    import sys
-                    
-                    # 特殊处理 ja_ginza
-                    if model_name == 'ja_ginza':
-                        subprocess.check_call([sys.executable, "-m", "pip", "install", 
-                                             "--trusted-host", "pypi.org", 
-                                             "--trusted-host", "files.pythonhosted.org",
-                                             "ja-ginza"], 
-                                            stdout=subprocess.DEVNULL, 
-                                            stderr=subprocess.DEVNULL)
-                    else:
-                        subprocess.check_call([sys.executable, "-m", "spacy", "download", model_name,
-                                             "--trusted-host", "pypi.org",
-                                             "--trusted-host", "files.pythonhosted.org"],
-                                            stdout=subprocess.DEVNULL,
-                                            stderr=subprocess.DEVNULL)
-                    
-                    # 重新尝试加载
-                    nlp = spacy.load(model_name)
-                    self.spacy_models[language] = nlp
-                    print(f"✓ spaCy 模型 ({model_name}) 下载并加载成功")
-                    return nlp
-                except Exception as download_error:
-                    print(f"❌ 自动下载失败: {download_error}")
-                    print(f"   请手动安装: python -m spacy download {model_name}")
-                    return None
+            nlp, lock = load_spacy_pipeline(model_name, segmenter)
         except ImportError:
-            print("⚠️  spaCy 未安装")
+            print("⚠️  spaCy 未安装，使用简单规则分句")
             print("   安装命令: pip install spacy")
+            nlp = None
+        except OSError:
+            install = "pip install ja-ginza" if model_name == 'ja_ginza' else f"python -m spacy download {model_name}"
+            print(f"❌ spaCy 模型 {model_name} 未安装，{language} 使用简单规则分句")
+            print(f"   请在部署时安装: {install}")
+            nlp = None
+        except ValueError as e:
+            print(f"❌ spaCy 模型 {model_name} 无法配置为 {segmenter} 分句 ({e})，{language} 使用简单规则分句")
+            nlp = None
+
+        if nlp is None:
+            # 记录失败，之后的请求直接使用规则分句，不再重复尝试加载
+            self.spacy_models[language] = None
             return None
 
+        self._nlp_locks[language] = lock
+        self.spacy_models[language] = nlp
+        print(f"✓ spaCy 模型 ({model_name}, {segmenter}) 加载成功: {', '.join(nlp.pipe_names)}")
+        return nlp
+
+    def preload(self, languages):
+        """
+        预加载指定语言的分句模型（服务启动预热时调用，避免首个请求承担加载耗时）
+
+        参数:
+            languages: 语言代码列表
+
+        返回:
+            dict: {语言代码: 是否有可用的模型分句器}
+        """
+        loaded = {}
+        for language in languages:
+            if language == 'zh':
+                loaded[language] = self.hanlp_split_sentence is not None
+            elif language in self.SPACY_MODELS:
+                loaded[language] = self._load_spacy_model(language) is not None
+            else:
+                loaded[language] = False
+        return loaded
+
+    def language_status(self):
+        """
+        各语言实际使用的分句器（已加载或已尝试加载的语言）
+
+        返回:
+            dict: {语言代码: {'splitter': 'spacy' / 'hanlp' / 'rule', 'model', 'segmenter', 'components'}}
+        """
+        status = {'zh': {'splitter': 'hanlp' if self.hanlp_split_sentence else 'rule'}}
+        for language, nlp in list(self.spacy_models.items()):
+            if nlp is None:
+                status[language] = {'splitter': 'rule', 'model': self.SPACY_MODELS[language]}
+            else:
+                status[language] = {
+                    'splitter': 'spacy',
+                    'model': self.SPACY_MODELS[language],
+                    'segmenter': self.language_segmenters.get(language, self.segmenter),
+                    'components': nlp.pipe_names,
+                }
+        return status
+
     def split_sentences(self, text, language='auto'):
         """
         分句
@@ -150,60 +390,219 @@ class TextSplitter:
                 language = 'en'
                 print("⚠️  未启用语言检测，使用默认语言: en")
 
-        # 使用对应的分句器
+        return self._split_texts([text], language)[0]
+
+    def split_batch(self, texts, language):
+        """
+        批量分句（同一语言的多个文本）
+
+        所有文本的分句单元一起处理（spaCy 语言使用 nlp.pipe 批量处理）。
+
+        参数:
+            texts: 文本列表
+            language: 语言代码（不支持 'auto'，调用方应先检测语言）
+
+        返回:
+            list: 每个文本的句子列表
+        """
+        return self._split_texts(texts, language)
+
+    def segmenter_config(self, language):
+        """
+        分句配置（缓存键的一部分）：模型名和版本、spaCy/HanLP 版本、分句方式和管道组件
+
+        升级模型或库、改变分句方式，以及模型缺失退回规则分句时配置都会不同，旧的缓存条目不再命中。
+
+        参数:
+            language: 语言代码
+
+        返回:
+            str: 分句配置
+        """
+        config = self._segmenter_configs.get(language)
+        if config is not None:
+            return config
+
         if language == 'zh':
-            return self._split_chinese(text)
-        elif language in self.SPACY_MODELS:
-            return self._split_with_spacy(text, language)
+            if self.hanlp_split_sentence is not None:
+                import hanlp
+                config = f"hanlp:{getattr(hanlp, '__version__', 'unknown')}"
+            else:
+                config = "rule-zh"
         else:
-            # 不支持的语言，使用简单规则分句
-            print(f"⚠️  语言 {language} 不支持，使用简单规则分句")
-            return self._simple_split(text)
+            nlp = self._load_spacy_model(language) if language in self.SPACY_MODELS else None
+            if nlp is not None:
+                import spacy
+                segmenter = self.language_segmenters.get(language, self.segmenter)
+                config = (f"spacy:{spacy.__version__}:{self.SPACY_MODELS[language]}:{nlp.meta.get('version')}"
+                          f":{segmenter}:{','.join(nlp.pipe_names)}")
+            else:
+                config = "rule"
+        self._segmenter_configs[language] = config
+        return config
 
-    def _split_with_spacy(self, text, language):
+    def fingerprint(self):
         """
-        使用 spaCy 分句
+        影响分句结果的全部配置（检查结果缓存键和 ETag 的一部分，不加载模型）
+
+        包括分句单元的划分方式、分句方式、分块大小、spaCy/HanLP 和各 spaCy 模型包的版本，
+        以及 fastText 语言检测模型文件；升级模型或修改分句配置后随之改变。
+
+        返回:
+            str: 配置描述
+        """
+        if self._fingerprint is None:
+            segmenters = ','.join(f"{lang}={seg}" for lang, seg in sorted(self.language_segmenters.items()))
+            models = ','.join(f"{name}={package_version(name)}" for name in sorted(set(self.SPACY_MODELS.values())))
+            detector = file_fingerprint(FASTTEXT_MODEL_PATH) if self.auto_detect else 'off'
+            self._fingerprint = (f"units:{SENTENCE_CACHE_VERSION}|segmenter:{self.segmenter}:{segmenters}"
+                                 f"|chunk:{self.chunk_chars}|spacy:{package_version('spacy')}|{models}"
+                                 f"|hanlp:{package_version('hanlp') if self.hanlp_split_sentence else 'rule'}"
+                                 f"|detector:{detector}")
+        return self._fingerprint
+
+    def _split_texts(self, texts, language):
+        """
+        按分句单元分句：启用缓存时命中的单元直接复用，其余单元一起分句（并写入缓存）
 
         参数:
-            text: 输入文本
-            language: 语言代码
+            texts: 文本列表
+            language: 语言代码（已确定，不为 'auto'）
 
         返回:
-            sentences: 句子列表
+            list: 每个文本的句子列表
+        """
+        unit_lists = [split_units(text) for text in texts]
+        units = list(dict.fromkeys(unit for text_units in unit_lists for unit in text_units))
+
+        if self.sentence_cache is not None and self.sentence_cache.enabled:
+            config = self.segmenter_config(language)
+            keys = {unit: make_key(config, language, unit) for unit in units}
+            found = self.sentence_cache.get_many(list(keys.values()))
+            results = {unit: found[key] for unit, key in keys.items() if key in found}
+            missing = [unit for unit in units if unit not in results]
+            if missing:
+                split = dict(zip(missing, self._split_paragraphs(missing, language)))
+                self.sentence_cache.put_many({keys[unit]: sentences for unit, sentences in split.items()})
+                results.update(split)
+                print(f"  分句缓存: {len(units) - len(missing)}/{len(units)} 个单元命中")
+        else:
+            results = dict(zip(units, self._split_paragraphs(units, language)))
+
+        return [[s for unit in text_units for s in results[unit]] for text_units in unit_lists]
+
+    def _split_paragraphs(self, paragraphs, language):
         """
-        nlp = self._load_spacy_model(language)
+        对若干分句单元分句（spaCy 用 nlp.pipe 批量处理，超长单元走分块模式）
 
-        if nlp:
-            # 使用 spaCy 分句
-            doc = nlp(text)
-            sentences = [sent.text.strip() for sent in doc.sents]
+        参数:
+            paragraphs: 分句单元列表（见 split_units）
+            language: 语言代码
+
+        返回:
+            list: 每个单元的句子列表
+        """
+        if not paragraphs:
+            return []
+        if language == 'zh':
+            if self.hanlp_split_sentence is None:
+                print("  ⚠️  HanLP 不可用，使用简单规则分句")
+                return [self._simple_split_chinese(p) for p in paragraphs]
+            if self.processes > 1 and sum(map(len, paragraphs)) > self._chunk_limit():
+                pool = self._get_process_pool()
+                return list(pool.map(_hanlp_split_chunk, paragraphs, chunksize=self.PARAGRAPH_BATCH_SIZE))
+            return [[s for s in self.hanlp_split_sentence(p) if s] for p in paragraphs]
+
+        if language not in self.SPACY_MODELS:
+            print(f"⚠️  语言 {language} 不支持，使用简单规则分句")
+        nlp = self._load_spacy_model(language) if language in self.SPACY_MODELS else None
+        if nlp is None:
+            return [self._simple_split(p) for p in paragraphs]
+
+        limit = self._chunk_limit(nlp)
+        results = [None] * len(paragraphs)
+        short = [i for i, p in enumerate(paragraphs) if len(p) <= limit]
+        if self.processes > 1 and sum(len(paragraphs[i]) for i in short) > limit:
+            # 待分句的文本总量超过一块时交给进程池
+            split = self._spacy_pool_function(language)
+            chunks = self._get_process_pool().map(split, [paragraphs[i] for i in short],
+                                                  chunksize=self.PARAGRAPH_BATCH_SIZE)
+            for i, sentences in zip(short, chunks):
+                results[i] = sentences
         else:
-            # 如果模型加载失败，使用简单规则分句
-            sentences = self._simple_split(text)
+            with self._nlp_locks[language]:
+                docs = nlp.pipe((paragraphs[i] for i in short), batch_size=self.PARAGRAPH_BATCH_SIZE)
+                for i, doc in zip(short, docs):
+                    results[i] = [s for s in (sent.text.strip() for sent in doc.sents) if s]
+        for i, p in enumerate(paragraphs):
+            if results[i] is None:
+                results[i] = [s for s in self._split_spacy_chunks(nlp, p, language) if s]
+        return results
+
+    def _chunk_limit(self, nlp=None):
+        """
+        分块模式的块大小：chunk_chars，且不超过 spaCy 管道的 max_length
 
-        return [s for s in sentences if s]
+        返回:
+            int: 超过该字符数的文本按块处理
+        """
+        limit = self.chunk_chars or float('inf')
+        if nlp is not None:
+            limit = min(limit, nlp.max_length)
+        return limit
 
-    def _split_chinese(self, text):
+    def _split_spacy_chunks(self, nlp, text, language):
         """
-        中文分句
+        分块模式：按段落切块，用 nlp.pipe 批量处理（processes > 1 时交给进程池），按原顺序拼接句子
+
+        单进程时块是逐个生成的，处理完的 Doc 只保留句子文本，内存占用与块大小而非全文长度成正比；
+        进程池模式下各块一次提交（块是原文的切片，额外内存约为一份原文）。
 
         参数:
-            text: 中文文本
+            nlp: spaCy 管道
+            text: 输入文本
+            language: 语言代码
 
         返回:
             sentences: 句子列表
         """
-        if self.hanlp_split_sentence:
-            # 使用 HanLP 的规则分句器
-            print("  使用 HanLP 规则分句器（中文）")
-            # split_sentence 返回生成器，需要转换为列表
-            sentences = list(self.hanlp_split_sentence(text))
-        else:
-            # 使用简单规则分句
-            print("  ⚠️  HanLP 不可用，使用简单规则分句")
-            sentences = self._simple_split_chinese(text)
+        chunks = iter_text_chunks(text, self._chunk_limit(nlp))
+        sentences = []
+        if self.processes > 1:
+            for chunk_sentences in self._get_process_pool().map(self._spacy_pool_function(language), chunks):
+                sentences.extend(chunk_sentences)
+            return sentences
+        with self._nlp_locks[language]:
+            for doc in nlp.pipe(chunks, batch_size=self.PIPE_BATCH_SIZE):
+                sentences.extend(sent.text.strip() for sent in doc.sents)
+        return sentences
+
+    def _spacy_pool_function(self, language):
+        """进程池中对一块文本分句的函数（可序列化，工作进程按模型名和分句方式加载管道）"""
+        segmenter = self.language_segmenters.get(language, self.segmenter)
+        return functools.partial(_spacy_split_chunk, self.SPACY_MODELS[language], segmenter)
+
+    def _get_process_pool(self):
+        """
+        获取分块分句的常驻进程池（首次调用时创建，之后复用）
 
-        return [s for s in sentences if s]
+        使用 spawn 启动工作进程：服务进程中已有 ONNX Runtime 和编码调度等线程，fork 会复制其锁状态；
+        工作进程各自加载并缓存 spaCy 管道 / HanLP 分句器。
+        """
+        with self._load_lock:
+            # fork 出的子进程（预加载部署的 worker）不能使用父进程的进程池，重新创建
+            if self._process_pool is None or self._process_pool_pid != os.getpid():
+                self._process_pool = ProcessPoolExecutor(max_workers=self.processes,
+                                                         mp_context=multiprocessing.get_context('spawn'))
+                self._process_pool_pid = os.getpid()
+            return self._process_pool
+
+    def close(self):
+        """关闭分块分句的进程池（服务进程退出时调用）"""
+        with self._load_lock:
+            if self._process_pool is not None and self._process_pool_pid == os.getpid():
+                self._process_pool.shutdown(wait=False, cancel_futures=True)
+                self._process_pool = None
 
     def _simple_split(self, text):
         """
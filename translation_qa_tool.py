@@ -15,22 +15,184 @@
 import numpy as np
 import json
 import pandas as pd
+import dataclasses
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
+from labse_onnx_encoder import (LaBSEOnnxEncoder, LazyBertalignEncoder, LockedTokenizer, yield_overlaps,
+                                install_lazy_bertalign_encoder)
+
+# 必须在导入 bertalign 之前：原版 bertalign 导入时即加载完整的 LaBSE 模型
+install_lazy_bertalign_encoder()
+
+import bertalign
 from bertalign import Bertalign
-from labse_onnx_encoder import LaBSEOnnxEncoder
+from bertalign.utils import clean_text
+from bertalign.corelib import (
+    find_top_k_sents, get_alignment_types,
+    find_first_search_path, first_pass_align, first_back_track,
+    find_second_search_path, second_pass_align, second_back_track
+)
+from perf_trace import PerfTracer, export_trace
 from text_splitter import TextSplitter
 from model_config import setup_hanlp_env
 
 # 设置 HanLP 环境变量（使用本地模型）
 setup_hanlp_env()
 
+# Bertalign 的全局编码器在所有请求间共享，其 fast tokenizer 不支持并发调用
+# （延迟加载的替身使用 LaBSEOnnxEncoder，分词器已加锁）
+if (not isinstance(bertalign.model, LazyBertalignEncoder)
+        and not isinstance(bertalign.model.tokenizer, LockedTokenizer)):
+    bertalign.model.tokenizer = LockedTokenizer(bertalign.model.tokenizer)
+
+
+# 当前线程临时使用的编码器（批量检查时为预先计算的向量表，见 encoder_override）
+_encoder_override = threading.local()
+
+
+def _active_encoder(default):
+    """返回当前线程临时指定的编码器，没有则返回 default"""
+    override = getattr(_encoder_override, 'encoder', None)
+    return override if override is not None else default
+
+
+@contextmanager
+def encoder_override(encoder):
+    """
+    在当前线程内临时替换相似度计算和 Bertalign（已路由时）使用的编码器
+
+    参数:
+        encoder: 提供 encode_sentences() 的编码器
+    """
+    previous = getattr(_encoder_override, 'encoder', None)
+    _encoder_override.encoder = encoder
+    try:
+        yield encoder
+    finally:
+        _encoder_override.encoder = previous
+
+
+def route_bertalign_encoder(encoder):
+    """
+    让 Bertalign 的重叠窗口编码也使用指定编码器
+
+    Bertalign 的全局编码器（通常为延迟加载的 LazyBertalignEncoder，见 install_lazy_bertalign_encoder）
+    的编码函数指向共享编码器后，句子对齐与相似度计算的编码请求可以合并批处理。两者使用同一个 LaBSE 模型，
+    输出（[CLS] 向量 + L2 归一化）一致，Bertalign 自己的模型始终不会加载。
+    bertalign 先于本模块被导入（全局编码器已加载）时，释放其 ONNX 会话以免同一模型在内存中保留两份
+    （多进程部署时也避免该会话的线程池跨 fork 遗留）。
+
+    参数:
+        encoder: 提供 encode_sentences() 的编码器
+    """
+    def encode_onnx(sentences):
+        return _active_encoder(encoder).encode_sentences(sentences)
+
+    bertalign.model.encode_onnx = encode_onnx
+    bertalign.model.session = None
+
+
+class PrecomputedEncoder:
+    """
+    预先批量编码的句子向量表（批量检查中各文档对共用）
+
+    构造时对所有句子去重后一次编码（底层编码器按 token 预算分批推理），
+    之后 encode_sentences 直接查表；表中没有的句子交给底层编码器编码并加入表中。
+    """
+
+    def __init__(self, encoder, sentences):
+        """
+        参数:
+            encoder: 底层编码器
+            sentences: 需要预先编码的句子（可重复）
+        """
+        self.encoder = encoder
+        self._vectors = {}
+        self._lock = threading.Lock()
+        unique = list(dict.fromkeys(sentences))
+        if unique:
+            self._vectors = dict(zip(unique, encoder.encode_sentences(unique)))
+
+    def __len__(self):
+        return len(self._vectors)
+
+    def encode_sentences(self, sentences):
+        """
+        查表获取句子向量
+
+        参数:
+            sentences: 句子列表
+
+        返回:
+            embeddings: (n_sentences, hidden_size) 归一化的嵌入向量
+        """
+        if len(sentences) == 0:
+            return self.encoder.encode_sentences(sentences)
+        missing = [s for s in dict.fromkeys(sentences) if s not in self._vectors]
+        if missing:
+            vectors = self.encoder.encode_sentences(missing)
+            with self._lock:
+                self._vectors.update(zip(missing, vectors))
+        return np.stack([self._vectors[s] for s in sentences])
+
+
+# 各阶段开始时的大致总进度（百分比），用于 check_translation 的进度回调
+STAGE_PROGRESS = {
+    'split_source': 0,
+    'detect_source': 4,
+    'split_target': 5,
+    'detect_target': 9,
+    'encode': 10,
+    'first_pass': 50,
+    'second_pass': 60,
+    'score': 75,
+    'auto_split_nm': 92,
+    'detect_issues': 95,
+    'word_align': 97,
+}
+
+# 随检查结果预先计算词对齐的范围：不计算 / 相似度低的对齐组 / 所有对齐组
+WORD_ALIGNMENT_SCOPES = ('none', 'flagged', 'all')
+
+
+@dataclasses.dataclass(frozen=True)
+class CheckOptions:
+    """
+    单次检查的参数（不可变，可在并发请求间安全传递）
+
+    字段含义与 TranslationQA.__init__ 的同名参数一致。
+    """
+    similarity_threshold: float = 0.7
+    max_align: int = 6
+    top_k: int = 5
+    score_threshold: float = 0.15
+    skip: float = -1.0
+    win: int = 10
+    force_split_threshold: float = 0.5
+    use_min_similarity: bool = True
+    auto_split_nm: bool = False
+    word_alignments: str = 'none'
+
+    def replace(self, **changes):
+        """返回修改了部分字段的新参数对象"""
+        return dataclasses.replace(self, **changes)
+
+    def to_dict(self):
+        """转换为字典（用于写入结果元数据）"""
+        return dataclasses.asdict(self)
+
 
 class TranslationQA:
     """翻译质量检查工具"""
 
     def __init__(self, similarity_threshold=0.7, max_align=6, top_k=5, score_threshold=0.15,
                  skip=-1.0, win=10, auto_detect_language=True,
-                 force_split_threshold=0.5, use_min_similarity=True, auto_split_nm=False):
+                 force_split_threshold=0.5, use_min_similarity=True, auto_split_nm=False,
+                 encoder=None, word_alignments='none', word_aligner=None,
+                 sentence_segmenter='senter', language_segmenters=None,
+                 split_chunk_chars=100000, split_processes=1, sentence_cache=None):
         """
         初始化翻译质量检查工具
 
@@ -45,7 +207,17 @@ class TranslationQA:
             force_split_threshold: 强制拆散阈值，低于此值的对齐组将被拆散为缺失+增添 (默认0.5)
             use_min_similarity: N:M对齐时使用最小相似度而非平均相似度 (默认True，更严格)
             auto_split_nm: 自动拆散N:M对齐为多个1:1对齐（如果N==M且拆散后相似度更高）(默认False)
+            encoder: 共享的句子编码器（如 EncoderDispatcher），为 None 时新建 LaBSEOnnxEncoder
+            word_alignments: 随检查结果预先计算词对齐的对齐组：'none'、'flagged'（相似度低）或 'all'
+            word_aligner: 共享的词对齐器（WordAligner），为 None 时在首次需要时用同一编码器新建
+            sentence_segmenter: spaCy 分句方式（'full'、'senter' 或 'sentencizer'，见 TextSplitter.SEGMENTERS）
+            language_segmenters: 按语言覆盖分句方式，如 {'ja': 'full'}
+            split_chunk_chars: 超过该字符数的分句单元分块分句（见 TextSplitter）
+            split_processes: 分块分句的进程数
+            sentence_cache: 共享的分句结果缓存（SentenceCache，按分句单元缓存），为 None 时不缓存
         """
+        if word_alignments not in WORD_ALIGNMENT_SCOPES:
+            raise ValueError(f"未知的词对齐范围: {word_alignments}")
         self.similarity_threshold = similarity_threshold
         self.max_align = max_align
         self.top_k = top_k
@@ -55,12 +227,18 @@ class TranslationQA:
         self.force_split_threshold = force_split_threshold
         self.auto_split_nm = auto_split_nm
         self.use_min_similarity = use_min_similarity
+        self.word_alignments = word_alignments
+        self.word_aligner = word_aligner
+        self._word_aligner_lock = threading.Lock()
 
         # 初始化编码器（用于计算相似度）
-        self.encoder = LaBSEOnnxEncoder()
+        self.encoder = encoder if encoder is not None else LaBSEOnnxEncoder()
 
         # 初始化分句器（支持多语言自动检测）
-        self.text_splitter = TextSplitter(auto_detect=auto_detect_language)
+        self.text_splitter = TextSplitter(auto_detect=auto_detect_language, segmenter=sentence_segmenter,
+                                          language_segmenters=language_segmenters,
+                                          chunk_chars=split_chunk_chars, processes=split_processes,
+                                          sentence_cache=sentence_cache)
 
         print(f"✓ 翻译质量检查工具初始化完成")
         print(f"  相似度阈值: {similarity_threshold}")
@@ -68,8 +246,50 @@ class TranslationQA:
         print(f"  分数阈值: {score_threshold}")
         print(f"  跳过惩罚: {skip} (越负越倾向N:M对齐)")
     
+    def default_options(self):
+        """
+        由实例属性生成检查参数
+
+        返回:
+            CheckOptions: 当前实例属性对应的参数快照
+        """
+        return CheckOptions(
+            similarity_threshold=self.similarity_threshold,
+            max_align=self.max_align,
+            top_k=self.top_k,
+            score_threshold=self.score_threshold,
+            skip=self.skip,
+            win=self.win,
+            force_split_threshold=self.force_split_threshold,
+            use_min_similarity=self.use_min_similarity,
+            auto_split_nm=self.auto_split_nm,
+            word_alignments=self.word_alignments
+        )
+
+    def fingerprint(self):
+        """
+        影响检查结果、但不在 CheckOptions 中的服务端配置（检查结果缓存键和 ETag 的一部分）
+
+        包括 Bertalign 版本、编码模型、分句配置（见 TextSplitter.fingerprint）和词对齐配置，
+        升级模型或修改服务配置后随之改变，客户端缓存的旧结果不再被 304 确认。
+
+        返回:
+            str: 配置描述
+        """
+        parts = [f"bertalign:{getattr(bertalign, '__version__', 'unknown')}",
+                 self.encoder.fingerprint() if hasattr(self.encoder, 'fingerprint') else self.encoder.model_name,
+                 self.text_splitter.fingerprint()]
+        if self.word_aligner is not None:
+            parts.append(self.word_aligner.fingerprint())
+        return '|'.join(parts)
+
+    def _encode(self, sentences):
+        """编码句子（批量检查时使用预先计算的向量表）"""
+        return _active_encoder(self.encoder).encode_sentences(sentences)
+
     def check_translation(self, source_text, target_text, is_split=True,
-                         source_language='auto', target_language='auto'):
+                         source_language='auto', target_language='auto', options=None,
+                         progress=None, on_group=None):
         """
         检查翻译质量
 
@@ -79,14 +299,30 @@ class TranslationQA:
             is_split: 是否已经分句
             source_language: 源语言 ('en', 'zh', 'auto')
             target_language: 目标语言 ('en', 'zh', 'auto')
+            options: CheckOptions，本次检查的参数（默认使用实例属性）。
+                     并发调用时应传入 options，而不是修改共享实例的属性
+            progress: 可选进度回调 progress(stage, percent)，percent 为 0-100
+            on_group: 可选回调 on_group(item, issues)，每个对齐组最终确定（计分、N:M 拆散、
+                      异常判定完成）后按源文本顺序立即调用，用于流式输出。
+                      issues 为 _classify_alignment() 的返回值。未被任何对齐组覆盖的句子
+                      只在检查结束后出现在 results['issues'] 中，不经过此回调
 
         返回:
             results: 检查结果字典
         """
+        if options is None:
+            options = self.default_options()
+
         print("\n" + "="*80)
         print("开始翻译质量检查")
         print("="*80)
 
+        # 各阶段耗时/资源统计（阶段开始时同时上报进度）
+        listener = None
+        if progress is not None:
+            listener = lambda stage: progress(stage, STAGE_PROGRESS.get(stage, 0))
+        tracer = PerfTracer(listener=listener)
+
         # 步骤0: 文本分句（如果需要）
         detected_src_lang = None
         detected_tgt_lang = None
@@ -94,10 +330,13 @@ class TranslationQA:
         if not is_split:
             print("\n步骤0: 文本分句...")
             if isinstance(source_text, str):
-                source_sents = self.text_splitter.split_sentences(source_text, source_language)
+                with tracer.span('split_source', chars=len(source_text)) as span:
+                    source_sents = self.text_splitter.split_sentences(source_text, source_language)
+                    span['counts']['sentences'] = len(source_sents)
                 # 🆕 获取检测到的语言（用于传递给 Bertalign，避免调用 Google Translate）
                 if source_language == 'auto' and self.text_splitter.language_detector:
-                    detected_src_lang = self.text_splitter.language_detector.detect(source_text)
+                    with tracer.span('detect_source', chars=len(source_text)):
+                        detected_src_lang = self.text_splitter.language_detector.detect(source_text)
                     print(f"  检测到源语言: {detected_src_lang}")
                 elif source_language != 'auto':
                     detected_src_lang = source_language
@@ -110,10 +349,13 @@ class TranslationQA:
                 source_sents = source_text
 
             if isinstance(target_text, str):
-                target_sents = self.text_splitter.split_sentences(target_text, target_language)
+                with tracer.span('split_target', chars=len(target_text)) as span:
+                    target_sents = self.text_splitter.split_sentences(target_text, target_language)
+                    span['counts']['sentences'] = len(target_sents)
                 # 🆕 获取检测到的语言（用于传递给 Bertalign，避免调用 Google Translate）
                 if target_language == 'auto' and self.text_splitter.language_detector:
-                    detected_tgt_lang = self.text_splitter.language_detector.detect(target_text)
+                    with tracer.span('detect_target', chars=len(target_text)):
+                        detected_tgt_lang = self.text_splitter.language_detector.detect(target_text)
                     print(f"  检测到目标语言: {detected_tgt_lang}")
                 elif target_language != 'auto':
                     detected_tgt_lang = target_language
@@ -130,24 +372,44 @@ class TranslationQA:
             target_text_for_align = '\n'.join(target_sents)
             is_split = True
         else:
-            source_text_for_align = source_text
-            target_text_for_align = target_text
+            # 已分句：接受句子列表或换行分隔的文本
+            source_text_for_align = source_text if isinstance(source_text, str) else '\n'.join(source_text)
+            target_text_for_align = target_text if isinstance(target_text, str) else '\n'.join(target_text)
+            # Bertalign 需要语言代码（不传会调用已弃用的 detect_lang）
+            detector = self.text_splitter.language_detector
+            if source_language != 'auto':
+                detected_src_lang = source_language
+            elif detector:
+                detected_src_lang = detector.detect(source_text_for_align)
+            else:
+                detected_src_lang = 'en'
+            if target_language != 'auto':
+                detected_tgt_lang = target_language
+            elif detector:
+                detected_tgt_lang = detector.detect(target_text_for_align)
+            else:
+                detected_tgt_lang = 'zh'
 
         # 步骤1: 使用Bertalign进行句子对齐
         print("\n步骤1: 执行句子对齐...")
 
-        aligner = Bertalign(
-            src=source_text_for_align,
-            tgt=target_text_for_align,
-            max_align=self.max_align,
-            top_k=self.top_k,
-            skip=self.skip,
-            win=self.win,
-            is_split=is_split,
-            src_lang=detected_src_lang,  # 🆕 传入语言代码，避免调用 Google Translate
-            tgt_lang=detected_tgt_lang   # 🆕 传入语言代码，避免调用 Google Translate
-        )
-        aligner.align_sents()
+        # Bertalign 构造时对源/目标文本的所有重叠窗口执行 model.transform
+        with tracer.span('encode', num_overlaps=options.max_align - 1) as span:
+            aligner = Bertalign(
+                src=source_text_for_align,
+                tgt=target_text_for_align,
+                max_align=options.max_align,
+                top_k=options.top_k,
+                skip=options.skip,
+                win=options.win,
+                is_split=is_split,
+                src_lang=detected_src_lang,  # 🆕 传入语言代码，避免调用 Google Translate
+                tgt_lang=detected_tgt_lang   # 🆕 传入语言代码，避免调用 Google Translate
+            )
+            span['counts']['src_sentences'] = aligner.src_num
+            span['counts']['tgt_sentences'] = aligner.tgt_num
+            span['counts']['windows'] = (aligner.src_num + aligner.tgt_num) * (options.max_align - 1)
+        self._align_sents(aligner, tracer)
         
         src_sents = aligner.src_sents
         tgt_sents = aligner.tgt_sents
@@ -158,9 +420,295 @@ class TranslationQA:
         
         # 步骤2: 计算每个对齐组的相似度
         print("\n步骤2: 计算语义相似度...")
+        on_scored = None
+        finalized = []
+        if on_group is not None:
+            # 流式输出：每组计分后立即完成 N:M 拆散和异常判定，不必等待全部计分结束
+            def on_scored(item):
+                items = self._split_nm_alignment(item) if options.auto_split_nm else [item]
+                for group in items:
+                    finalized.append(group)
+                    on_group(group, self._classify_alignment(group, src_sents, tgt_sents, options))
+
+        with tracer.span('score', alignments=len(alignments)):
+            alignment_scores = self._score_alignments(alignments, src_sents, tgt_sents, options,
+                                                      progress, on_scored)
+        print(f"✓ 相似度计算完成")
+
+        if on_group is not None:
+            # N:M 拆散已在计分循环中逐组完成
+            alignment_scores = finalized
+        elif options.auto_split_nm:
+            # 步骤2.5: 自动拆散N:M对齐（如果启用）
+            print("\n步骤2.5: 检查是否需要拆散N:M对齐...")
+            with tracer.span('auto_split_nm', alignments=len(alignment_scores)):
+                alignment_scores = self._split_nm_alignments(alignment_scores)
+
+        # 步骤3: 检测异常
+        print("\n步骤3: 检测翻译异常...")
+        with tracer.span('detect_issues', alignments=len(alignment_scores)):
+            omissions, additions, low_similarity, force_split_alignments = self._detect_issues(
+                alignment_scores, src_sents, tgt_sents, options)
+
+        print(f"✓ 异常检测完成:")
+        print(f"  缺失 (Omission): {len(omissions)}处")
+        print(f"  增添 (Addition): {len(additions)}处")
+        print(f"  相似度低 (Low Similarity): {len(low_similarity)}处")
+        if force_split_alignments:
+            print(f"  强制拆散对齐组: {len(force_split_alignments)}个 (相似度 < {options.force_split_threshold})")
+        
+        # 步骤4: 为需要查看的对齐组预先计算词对齐（一次批量分词和编码）
+        word_alignments = None
+        if options.word_alignments != 'none':
+            print("\n步骤4: 预先计算词对齐...")
+            groups = self._word_alignment_groups(alignment_scores, force_split_alignments, options)
+            with tracer.span('word_align', groups=len(groups)):
+                word_alignments = self._align_group_words(groups, detected_src_lang, detected_tgt_lang)
+            print(f"✓ 词对齐完成: {len(word_alignments)}个对齐组")
+
+        # 汇总结果
+        results = {
+            'metadata': {
+                'timestamp': datetime.now().isoformat(),
+                'source_sentences': len(src_sents),
+                'target_sentences': len(tgt_sents),
+                'alignments': len(alignments),
+                'similarity_threshold': options.similarity_threshold,
+                'force_split_threshold': options.force_split_threshold,
+                'options': options.to_dict(),
+                'performance': tracer.summary()  # 🆕 各阶段耗时/资源统计
+            },
+            'sentences': {
+                'source': src_sents,
+                'target': tgt_sents
+            },
+            'alignments': alignment_scores,
+            'force_split_alignments': force_split_alignments,  # 🆕 记录被拆散的对齐组
+            'issues': {
+                'omissions': omissions,
+                'additions': additions,
+                'low_similarity': low_similarity
+            },
+            'summary': {
+                'total_issues': len(omissions) + len(additions) + len(low_similarity),
+                'omission_count': len(omissions),
+                'addition_count': len(additions),
+                'low_similarity_count': len(low_similarity),
+                'force_split_count': len(force_split_alignments)  # 🆕
+            }
+        }
+        if word_alignments is not None:
+            results['word_alignments'] = word_alignments
+
+        if progress is not None:
+            progress('done', 100)
+
+        return results
+
+    def check_translation_batch(self, pairs, options=None, max_workers=4):
+        """
+        批量检查多组原文/译文（适用于大量短文本，如界面字符串、商品描述）
+
+        与逐个调用 check_translation 相比：
+        1. 所有文本一次性检测语言，同一语言的文本一起分句
+        2. 所有文档对的句子和重叠窗口去重后一次编码，编码器按 token 预算合并成大批次
+        3. 各文档对在线程池中并行对齐、计分和检测异常
+
+        参数:
+            pairs: [(source_text, target_text), ...]
+            options: CheckOptions（所有文档对共用，默认使用实例属性）
+            max_workers: 并行对齐的线程数
+
+        返回:
+            dict: {
+                'results': 与 pairs 顺序相同，每项为 check_translation() 的返回值；
+                           单个文档对失败时为 {'error': 错误信息}，不影响其他文档对,
+                'performance': 批量阶段（语言检测、分句、编码、对齐）的耗时统计
+            }
+        """
+        if options is None:
+            options = self.default_options()
+        tracer = PerfTracer()
+
+        # 1. 语言检测（一次 fastText 调用）
+        texts = [text for pair in pairs for text in pair]
+        with tracer.span('detect_languages', texts=len(texts)):
+            detector = self.text_splitter.language_detector
+            if detector:
+                languages = detector.detect_batch(texts)
+            else:
+                languages = ['en', 'zh'] * len(pairs)
+
+        # 2. 按语言分组分句
+        sentences = [None] * len(texts)
+        groups = {}
+        for i, language in enumerate(languages):
+            groups.setdefault(language, []).append(i)
+        with tracer.span('split', texts=len(texts), languages=len(groups)):
+            for language, indices in groups.items():
+                for i, sents in zip(indices, self.text_splitter.split_batch([texts[i] for i in indices], language)):
+                    # 与 Bertalign 内部相同的清理，保证预先编码的窗口文本与对齐时一致
+                    sentences[i] = clean_text("\n".join(sents)).splitlines()
+
+        # 3. 所有文档对的重叠窗口（包含单句）一次编码
+        num_overlaps = options.max_align - 1
+        windows = [window for sents in sentences if sents for window in yield_overlaps(sents, num_overlaps)]
+        with tracer.span('encode', windows=len(windows)) as span:
+            encoder = PrecomputedEncoder(self.encoder, windows)
+            span['counts']['unique_windows'] = len(encoder)
+
+        # 4. 并行对齐、计分和检测异常
+        def check_pair(index):
+            src_sents, tgt_sents = sentences[2 * index], sentences[2 * index + 1]
+            if not src_sents or not tgt_sents:
+                raise ValueError('原文和译文分句后不能为空')
+            with encoder_override(encoder):
+                return self.check_translation(src_sents, tgt_sents, is_split=True,
+                                              source_language=languages[2 * index],
+                                              target_language=languages[2 * index + 1],
+                                              options=options)
+
+        results = []
+        with tracer.span('align', pairs=len(pairs), workers=max_workers):
+            with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="check-batch") as pool:
+                futures = [pool.submit(check_pair, i) for i in range(len(pairs))]
+                for future in futures:
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        print(f"⚠️  批量检查中的文档对失败: {e}")
+                        results.append({'error': str(e)})
+
+        print(f"✓ 批量检查完成: {len(pairs)}组, {len(groups)}种语言, {len(windows)}个窗口"
+              f" ({len(encoder)}个不重复)")
+        return {'results': results, 'performance': tracer.summary()}
+
+    def _get_word_aligner(self):
+        """获取词对齐器（未传入时用同一编码器新建）"""
+        if self.word_aligner is None:
+            with self._word_aligner_lock:
+                if self.word_aligner is None:
+                    from word_aligner import WordAligner
+                    self.word_aligner = WordAligner(encoder=self.encoder)
+        return self.word_aligner
+
+    def _word_alignment_groups(self, alignment_scores, force_split_alignments, options):
+        """
+        选出需要预先计算词对齐的对齐组（与报告中显示"词对齐"按钮的组一致）
+
+        参数:
+            alignment_scores: 对齐组列表
+            force_split_alignments: 被强制拆散的对齐组（报告中显示为缺失+增添）
+            options: CheckOptions（word_alignments 为 'flagged' 时只选相似度低于阈值的组）
+
+        返回:
+            list: 对齐组列表
+        """
+        force_split_ids = {id(item) for item in force_split_alignments}
+        groups = []
+        for item in alignment_scores:
+            if item.get('is_null_alignment', False) or id(item) in force_split_ids:
+                continue
+            if not item['src_text'] or not item['tgt_text']:
+                continue
+            if options.word_alignments == 'flagged' and item['similarity'] >= options.similarity_threshold:
+                continue
+            groups.append(item)
+        return groups
+
+    def _align_group_words(self, groups, source_language, target_language):
+        """
+        批量计算对齐组的词对齐
+
+        参数:
+            groups: 对齐组列表
+            source_language: 源语言代码
+            target_language: 目标语言代码
+
+        返回:
+            list: 每组 {'src_indices', 'tgt_indices', 'src_text', 'tgt_text',
+                        'alignment': {'csv', 'alignments'}（与 /api/word-align 的 data 相同）}
+        """
+        if not groups:
+            return []
+        aligner = self._get_word_aligner()
+        alignments = aligner.align_batch([(item['src_text'], item['tgt_text']) for item in groups],
+                                         source_language or 'auto', target_language or 'auto')
+        return [
+            {
+                'src_indices': item['src_indices'],
+                'tgt_indices': item['tgt_indices'],
+                'src_text': item['src_text'],
+                'tgt_text': item['tgt_text'],
+                'alignment': alignment.to_dict()
+            }
+            for item, alignment in zip(groups, alignments)
+        ]
+
+    def _align_sents(self, aligner, tracer):
+        """
+        执行Bertalign两步对齐（与 Bertalign.align_sents 相同，但分阶段计时）
+
+        参数:
+            aligner: 已完成编码的 Bertalign 实例，结果写入 aligner.result
+            tracer: PerfTracer 实例
+        """
+        print("Performing first-step alignment ...")
+        with tracer.span('first_pass', src_sentences=aligner.src_num,
+                         tgt_sentences=aligner.tgt_num, top_k=aligner.top_k) as span:
+            D, I = find_top_k_sents(aligner.src_vecs[0,:], aligner.tgt_vecs[0,:], k=aligner.top_k)
+            first_alignment_types = get_alignment_types(2) # 0-1, 1-0, 1-1
+            first_w, first_path = find_first_search_path(aligner.src_num, aligner.tgt_num)
+            first_pointers = first_pass_align(aligner.src_num, aligner.tgt_num, first_w, first_path,
+                                              first_alignment_types, D, I)
+            first_alignment = first_back_track(aligner.src_num, aligner.tgt_num, first_pointers,
+                                               first_path, first_alignment_types)
+            span['counts']['dp_cells'] = int(np.sum(first_path[:, 1] - first_path[:, 0] + 1))
+
+        print("Performing second-step alignment ...")
+        with tracer.span('second_pass', src_sentences=aligner.src_num,
+                         tgt_sentences=aligner.tgt_num, win=aligner.win) as span:
+            second_alignment_types = get_alignment_types(aligner.max_align)
+            second_w, second_path = find_second_search_path(first_alignment, aligner.win,
+                                                            aligner.src_num, aligner.tgt_num)
+            second_pointers = second_pass_align(aligner.src_vecs, aligner.tgt_vecs,
+                                                aligner.src_lens, aligner.tgt_lens,
+                                                second_w, second_path, second_alignment_types,
+                                                aligner.char_ratio, aligner.skip,
+                                                margin=aligner.margin, len_penalty=aligner.len_penalty)
+            second_alignment = second_back_track(aligner.src_num, aligner.tgt_num, second_pointers,
+                                                 second_path, second_alignment_types)
+            span['counts']['dp_cells'] = int(np.sum(second_path[:, 1] - second_path[:, 0] + 1))
+            span['counts']['alignment_types'] = len(second_alignment_types)
+
+        print("Finished! Successfully aligning {} {} sentences to {} {} sentences\n".format(
+            aligner.src_num, aligner.src_lang, aligner.tgt_num, aligner.tgt_lang))
+        aligner.result = second_alignment
+
+    def _score_alignments(self, alignments, src_sents, tgt_sents, options, progress=None,
+                          on_scored=None):
+        """
+        计算每个对齐组的语义相似度
+
+        参数:
+            alignments: Bertalign对齐结果 [(src_indices, tgt_indices), ...]
+            src_sents: 源句子列表
+            tgt_sents: 目标句子列表
+            options: CheckOptions
+            progress: 可选进度回调 progress(stage, percent)
+            on_scored: 可选回调 on_scored(item)，每组计分完成后调用
+
+        返回:
+            alignment_scores: 对齐组列表（含文本和相似度）
+        """
         alignment_scores = []
+        start, end = STAGE_PROGRESS['score'], STAGE_PROGRESS['auto_split_nm']
+        report_every = max(1, len(alignments) // 20)
+
+        for n, (src_indices, tgt_indices) in enumerate(alignments):
+            if progress is not None and n % report_every == 0:
+                progress('score', start + (end - start) * n / len(alignments))
 
-        for src_indices, tgt_indices in alignments:
             # 🔴 修复: 先检查是否为空对齐（缺失/增添）
             if len(src_indices) == 0 or len(tgt_indices) == 0:
                 # 空对齐，跳过相似度计算，标记为null
@@ -174,6 +722,8 @@ class TranslationQA:
                     'similarity': None,  # 标记为None而非0.0
                     'is_null_alignment': True
                 })
+                if on_scored is not None:
+                    on_scored(alignment_scores[-1])
                 continue
 
             # 提取句子文本
@@ -181,10 +731,10 @@ class TranslationQA:
             tgt_texts = [tgt_sents[i] for i in tgt_indices]
 
             # 🆕 对于N:M对齐，使用最小相似度策略（更严格）
-            if self.use_min_similarity and (len(src_texts) > 1 or len(tgt_texts) > 1):
+            if options.use_min_similarity and (len(src_texts) > 1 or len(tgt_texts) > 1):
                 # 编码所有句子
-                src_embeddings = self.encoder.encode_sentences(src_texts)
-                tgt_embeddings = self.encoder.encode_sentences(tgt_texts)
+                src_embeddings = self._encode(src_texts)
+                tgt_embeddings = self._encode(tgt_texts)
 
                 # 计算所有源-目标句子对的相似度，取最小值
                 min_sim = 1.0
@@ -199,12 +749,12 @@ class TranslationQA:
             else:
                 # 1:1对齐或使用平均相似度策略
                 # 编码源句子
-                src_embeddings = self.encoder.encode_sentences(src_texts)
+                src_embeddings = self._encode(src_texts)
                 src_emb = np.mean(src_embeddings, axis=0)
                 src_emb = src_emb / np.linalg.norm(src_emb)
 
                 # 编码目标句子
-                tgt_embeddings = self.encoder.encode_sentences(tgt_texts)
+                tgt_embeddings = self._encode(tgt_texts)
                 tgt_emb = np.mean(tgt_embeddings, axis=0)
                 tgt_emb = tgt_emb / np.linalg.norm(tgt_emb)
 
@@ -221,63 +771,157 @@ class TranslationQA:
                 'similarity': similarity,
                 'is_null_alignment': False
             })
+            if on_scored is not None:
+                on_scored(alignment_scores[-1])
 
-        print(f"✓ 相似度计算完成")
+        return alignment_scores
 
-        # 步骤2.5: 自动拆散N:M对齐（如果启用）
-        if self.auto_split_nm:
-            print("\n步骤2.5: 检查是否需要拆散N:M对齐...")
-            new_alignment_scores = []
-            split_count = 0
-
-            for item in alignment_scores:
-                if item.get('is_null_alignment', False):
-                    new_alignment_scores.append(item)
-                    continue
-
-                src_indices = item['src_indices']
-                tgt_indices = item['tgt_indices']
-
-                # 只处理N:N对齐（N==M且N>1）
-                if len(src_indices) == len(tgt_indices) and len(src_indices) > 1:
-                    # 计算拆散后的1:1相似度
-                    individual_sims = []
-                    for i in range(len(src_indices)):
-                        src_emb = self.encoder.encode_sentences([item['src_texts'][i]])[0]
-                        tgt_emb = self.encoder.encode_sentences([item['tgt_texts'][i]])[0]
-                        src_emb = src_emb / np.linalg.norm(src_emb)
-                        tgt_emb = tgt_emb / np.linalg.norm(tgt_emb)
-                        sim = float(np.dot(src_emb, tgt_emb))
-                        individual_sims.append(sim)
-
-                    # 如果所有1:1相似度都高于N:N相似度，则拆散
-                    avg_individual_sim = np.mean(individual_sims)
-                    if avg_individual_sim > item['similarity']:
-                        # 拆散为多个1:1对齐
-                        for i in range(len(src_indices)):
-                            new_alignment_scores.append({
-                                'src_indices': [src_indices[i]],
-                                'tgt_indices': [tgt_indices[i]],
-                                'src_texts': [item['src_texts'][i]],
-                                'tgt_texts': [item['tgt_texts'][i]],
-                                'src_text': item['src_texts'][i],
-                                'tgt_text': item['tgt_texts'][i],
-                                'similarity': individual_sims[i],
-                                'is_null_alignment': False
-                            })
-                        split_count += 1
-                    else:
-                        new_alignment_scores.append(item)
-                else:
-                    new_alignment_scores.append(item)
+    def _split_nm_alignments(self, alignment_scores):
+        """
+        自动拆散N:N对齐为多个1:1对齐（如果拆散后相似度更高）
 
-            alignment_scores = new_alignment_scores
-            if split_count > 0:
-                print(f"✓ 拆散了 {split_count} 个N:M对齐")
+        参数:
+            alignment_scores: _score_alignments()返回的对齐组列表
 
-        # 步骤3: 检测异常
-        print("\n步骤3: 检测翻译异常...")
+        返回:
+            alignment_scores: 拆散后的对齐组列表
+        """
+        new_alignment_scores = []
+        split_count = 0
+
+        for item in alignment_scores:
+            items = self._split_nm_alignment(item)
+            if len(items) > 1:
+                split_count += 1
+            new_alignment_scores.extend(items)
+
+        if split_count > 0:
+            print(f"✓ 拆散了 {split_count} 个N:M对齐")
+
+        return new_alignment_scores
+
+    def _split_nm_alignment(self, item):
+        """
+        尝试将单个N:N对齐组拆散为多个1:1对齐
+
+        参数:
+            item: 对齐组
+
+        返回:
+            list: 拆散后的对齐组列表（不需要拆散时为 [item]）
+        """
+        if item.get('is_null_alignment', False):
+            return [item]
+
+        src_indices = item['src_indices']
+        tgt_indices = item['tgt_indices']
+
+        # 只处理N:N对齐（N==M且N>1）
+        if len(src_indices) != len(tgt_indices) or len(src_indices) <= 1:
+            return [item]
+
+        # 计算拆散后的1:1相似度
+        individual_sims = []
+        for i in range(len(src_indices)):
+            src_emb = self._encode([item['src_texts'][i]])[0]
+            tgt_emb = self._encode([item['tgt_texts'][i]])[0]
+            src_emb = src_emb / np.linalg.norm(src_emb)
+            tgt_emb = tgt_emb / np.linalg.norm(tgt_emb)
+            sim = float(np.dot(src_emb, tgt_emb))
+            individual_sims.append(sim)
+
+        # 如果所有1:1相似度都高于N:N相似度，则拆散
+        avg_individual_sim = np.mean(individual_sims)
+        if avg_individual_sim <= item['similarity']:
+            return [item]
+
+        # 拆散为多个1:1对齐
+        return [{
+            'src_indices': [src_indices[i]],
+            'tgt_indices': [tgt_indices[i]],
+            'src_texts': [item['src_texts'][i]],
+            'tgt_texts': [item['tgt_texts'][i]],
+            'src_text': item['src_texts'][i],
+            'tgt_text': item['tgt_texts'][i],
+            'similarity': individual_sims[i],
+            'is_null_alignment': False
+        } for i in range(len(src_indices))]
+
+    def _classify_alignment(self, item, src_sents, tgt_sents, options):
+        """
+        判定单个对齐组的异常
+
+        参数:
+            item: 对齐组
+            src_sents: 源句子列表
+            tgt_sents: 目标句子列表
+            options: CheckOptions
+
+        返回:
+            dict: {'omissions': [...], 'additions': [...], 'low_similarity': [...], 'force_split': bool}
+        """
+        issues = {'omissions': [], 'additions': [], 'low_similarity': [], 'force_split': False}
+
+        if item.get('is_null_alignment', False):
+            # 空对齐：判断是缺失还是增添
+            if len(item['src_indices']) > 0 and len(item['tgt_indices']) == 0:
+                # 缺失：有源无目标
+                for idx in item['src_indices']:
+                    issues['omissions'].append({
+                        'type': 'omission',
+                        'src_index': idx,
+                        'src_text': src_sents[idx]
+                    })
+            elif len(item['src_indices']) == 0 and len(item['tgt_indices']) > 0:
+                # 增添：无源有目标
+                for idx in item['tgt_indices']:
+                    issues['additions'].append({
+                        'type': 'addition',
+                        'tgt_index': idx,
+                        'tgt_text': tgt_sents[idx]
+                    })
+        # 🆕 事后清洗：强制拆散低相似度对齐组
+        elif item['similarity'] < options.force_split_threshold:
+            # 相似度极低，强制拆散为缺失+增添
+            for idx in item['src_indices']:
+                issues['omissions'].append({
+                    'type': 'omission',
+                    'src_index': idx,
+                    'src_text': src_sents[idx]
+                })
+            for idx in item['tgt_indices']:
+                issues['additions'].append({
+                    'type': 'addition',
+                    'tgt_index': idx,
+                    'tgt_text': tgt_sents[idx]
+                })
+            issues['force_split'] = True
+        # 有效对齐：检查相似度
+        elif item['similarity'] < options.similarity_threshold:
+            issues['low_similarity'].append({
+                'type': 'low_similarity',
+                'src_indices': item['src_indices'],
+                'tgt_indices': item['tgt_indices'],
+                'src_text': item['src_text'],
+                'tgt_text': item['tgt_text'],
+                'similarity': item['similarity']
+            })
 
+        return issues
+
+    def _detect_issues(self, alignment_scores, src_sents, tgt_sents, options):
+        """
+        从对齐组中检测缺失、增添和相似度低
+
+        参数:
+            alignment_scores: 对齐组列表
+            src_sents: 源句子列表
+            tgt_sents: 目标句子列表
+            options: CheckOptions
+
+        返回:
+            (omissions, additions, low_similarity, force_split_alignments)
+        """
         # 🔴 修复: 先从空对齐中提取缺失/增添
         omissions = []
         additions = []
@@ -287,52 +931,13 @@ class TranslationQA:
         force_split_alignments = []
 
         for item in alignment_scores:
-            if item.get('is_null_alignment', False):
-                # 空对齐：判断是缺失还是增添
-                if len(item['src_indices']) > 0 and len(item['tgt_indices']) == 0:
-                    # 缺失：有源无目标
-                    for idx in item['src_indices']:
-                        omissions.append({
-                            'type': 'omission',
-                            'src_index': idx,
-                            'src_text': src_sents[idx]
-                        })
-                elif len(item['src_indices']) == 0 and len(item['tgt_indices']) > 0:
-                    # 增添：无源有目标
-                    for idx in item['tgt_indices']:
-                        additions.append({
-                            'type': 'addition',
-                            'tgt_index': idx,
-                            'tgt_text': tgt_sents[idx]
-                        })
-            else:
-                # 🆕 事后清洗：强制拆散低相似度对齐组
-                if item['similarity'] < self.force_split_threshold:
-                    # 相似度极低，强制拆散为缺失+增添
-                    for idx in item['src_indices']:
-                        omissions.append({
-                            'type': 'omission',
-                            'src_index': idx,
-                            'src_text': src_sents[idx]
-                        })
-                    for idx in item['tgt_indices']:
-                        additions.append({
-                            'type': 'addition',
-                            'tgt_index': idx,
-                            'tgt_text': tgt_sents[idx]
-                        })
-                    # 记录被拆散的对齐组
-                    force_split_alignments.append(item)
-                # 有效对齐：检查相似度
-                elif item['similarity'] < self.similarity_threshold:
-                    low_similarity.append({
-                        'type': 'low_similarity',
-                        'src_indices': item['src_indices'],
-                        'tgt_indices': item['tgt_indices'],
-                        'src_text': item['src_text'],
-                        'tgt_text': item['tgt_text'],
-                        'similarity': item['similarity']
-                    })
+            issues = self._classify_alignment(item, src_sents, tgt_sents, options)
+            omissions.extend(issues['omissions'])
+            additions.extend(issues['additions'])
+            low_similarity.extend(issues['low_similarity'])
+            if issues['force_split']:
+                # 记录被拆散的对齐组
+                force_split_alignments.append(item)
 
         # 3.1 检测未被任何对齐覆盖的句子（补充检查）
         # 🆕 排除被强制拆散的对齐组
@@ -368,41 +973,8 @@ class TranslationQA:
                     'tgt_index': i,
                     'tgt_text': tgt_sents[i]
                 })
-        
-        print(f"✓ 异常检测完成:")
-        print(f"  缺失 (Omission): {len(omissions)}处")
-        print(f"  增添 (Addition): {len(additions)}处")
-        print(f"  相似度低 (Low Similarity): {len(low_similarity)}处")
-        if force_split_alignments:
-            print(f"  强制拆散对齐组: {len(force_split_alignments)}个 (相似度 < {self.force_split_threshold})")
-        
-        # 汇总结果
-        results = {
-            'metadata': {
-                'timestamp': datetime.now().isoformat(),
-                'source_sentences': len(src_sents),
-                'target_sentences': len(tgt_sents),
-                'alignments': len(alignments),
-                'similarity_threshold': self.similarity_threshold,
-                'force_split_threshold': self.force_split_threshold
-            },
-            'alignments': alignment_scores,
-            'force_split_alignments': force_split_alignments,  # 🆕 记录被拆散的对齐组
-            'issues': {
-                'omissions': omissions,
-                'additions': additions,
-                'low_similarity': low_similarity
-            },
-            'summary': {
-                'total_issues': len(omissions) + len(additions) + len(low_similarity),
-                'omission_count': len(omissions),
-                'addition_count': len(additions),
-                'low_similarity_count': len(low_similarity),
-                'force_split_count': len(force_split_alignments)  # 🆕
-            }
-        }
 
-        return results
+        return omissions, additions, low_similarity, force_split_alignments
 
     def save_report_json(self, results, output_path="translation_qa_report.json"):
         """
@@ -417,6 +989,16 @@ class TranslationQA:
 
         print(f"\n✓ JSON报告已保存: {output_path}")
 
+    def save_trace(self, results, output_path="translation_qa_trace.json"):
+        """
+        保存性能追踪文件（Chrome Trace 格式，可在 chrome://tracing 或 Perfetto 中打开）
+
+        参数:
+            results: check_translation()返回的结果
+            output_path: 输出文件路径
+        """
+        export_trace(results['metadata']['performance'], output_path)
+
     def save_report_csv(self, results, output_path="translation_qa_report.csv"):
         """
         保存CSV格式报告（按要求的多行平铺格式）
@@ -430,6 +1012,8 @@ class TranslationQA:
             results: check_translation()返回的结果
             output_path: 输出文件路径
         """
+        similarity_threshold = results['metadata']['similarity_threshold']
+
         # 🔴 修复: 将所有行合并到一个列表，然后按源索引排序
         all_rows = []
 
@@ -455,7 +1039,7 @@ class TranslationQA:
             if similarity is None:
                 # 空对齐，已在Step 3中处理为缺失/增添
                 continue
-            elif similarity < self.similarity_threshold:
+            elif similarity < similarity_threshold:
                 exception_type = '相似度低 (Low Similarity)'
             else:
                 exception_type = 'OK'
@@ -583,7 +1167,7 @@ class TranslationQA:
                 print(f"  目标句子[{item['tgt_index']}]: {item['tgt_text'][:60]}...")
 
         if results['issues']['low_similarity']:
-            print(f"\n⚠️  相似度低 (Low Similarity < {self.similarity_threshold}):")
+            print(f"\n⚠️  相似度低 (Low Similarity < {results['metadata']['similarity_threshold']}):")
             for item in results['issues']['low_similarity']:
                 print(f"  相似度: {item['similarity']:.4f}")
                 print(f"    源: {item['src_text'][:60]}...")
@@ -3,18 +3,142 @@
 """
 词对齐模块
 
-使用 LaBSE 进行词级别的语义对齐
+使用 LaBSE 进行词级别的语义对齐，支持两种词向量：
+- contextual: 每个句子只做一次前向计算，按分词器的字符偏移把子词的上下文向量平均为词向量，
+              再在相似度矩阵上做匹配
+- static: 每个词单独作为一个"句子"编码（无上下文）
+
+两种模式都用 word_matching 中的向量化算法（argmax/intersection、union、itermax、optimal）
+在整个相似度矩阵上一次性匹配。
 """
 
 import numpy as np
 import re
+import threading
 from labse_onnx_encoder import LaBSEOnnxEncoder
-from model_config import setup_hanlp_env
+from lru_cache import LRUCache
+from word_matching import MATCHERS, linear_sum_assignment
+from word_vector_cache import WordVectorCache
+from model_config import file_fingerprint, package_version, setup_hanlp_env
 
 # 设置 HanLP 环境变量（使用本地模型）
 setup_hanlp_env()
 
 
+def rule_tokenize_zh(text):
+    """
+    中文规则分词：汉字逐字切分，连续的字母/数字保留为一个词，标点单独成词
+
+    参数:
+        text: 输入文本
+
+    返回:
+        words: 词列表
+    """
+    return re.findall(r'[\u4e00-\u9fff]|[^\W\u4e00-\u9fff]+|[^\w\s]', text)
+
+
+CSV_HEADER = "源词 (Source Word),目标词 (Target Word),源索引,目标索引,相似度 (Similarity)"
+
+
+def word_spans(text, words):
+    """
+    在原文中定位每个词的字符区间
+
+    参数:
+        text: 原文
+        words: 按顺序排列的分词结果
+
+    返回:
+        list: 每个词的 (start, end)，找不到时为 None
+    """
+    spans = []
+    position = 0
+    for word in words:
+        start = text.find(word, position)
+        if start < 0:
+            spans.append(None)
+            continue
+        spans.append((start, start + len(word)))
+        position = start + len(word)
+    return spans
+
+
+def pool_subword_vectors(hidden_states, offsets, spans):
+    """
+    将子词的上下文向量按字符区间平均为词向量
+
+    参数:
+        hidden_states: (n_tokens, hidden_size) token 向量
+        offsets: (n_tokens, 2) token 的字符偏移（特殊 token 为 (0, 0)）
+        spans: 每个词的 (start, end) 或 None
+
+    返回:
+        (vectors, covered): vectors 为 (n_words, hidden_size) L2 归一化的词向量，
+                            covered 为布尔数组，False 表示该词没有对应的 token（如超出截断长度）
+    """
+    starts = np.array([span[0] if span else 0 for span in spans], dtype=np.int64)
+    ends = np.array([span[1] if span else 0 for span in spans], dtype=np.int64)
+    token_starts, token_ends = offsets[:, 0], offsets[:, 1]
+
+    # (n_words, n_tokens)：token 与词的字符区间有重叠（排除特殊 token）
+    membership = ((token_starts[None, :] < ends[:, None])
+                  & (token_ends[None, :] > starts[:, None])
+                  & (token_ends > token_starts)[None, :])
+    counts = membership.sum(axis=1)
+    vectors = membership.astype(np.float32) @ hidden_states / np.maximum(counts, 1)[:, None]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms > 0, norms, 1.0)
+    return vectors, counts > 0
+
+
+class WordAlignment:
+    """
+    一对句子的词对齐结果（可渲染为 JSON 和 CSV）
+
+    结果会被缓存并在请求间共享，调用方不应修改其内容。
+    """
+
+    def __init__(self, source_words, target_words, alignments):
+        """
+        参数:
+            source_words: 源词列表
+            target_words: 目标词列表
+            alignments: 对齐结果列表（见 WordAligner.align_words）
+        """
+        self.source_words = source_words
+        self.target_words = target_words
+        self.alignments = alignments
+
+    def to_csv_lines(self):
+        """
+        返回:
+            csv_lines: CSV 行列表（含表头）
+        """
+        csv_lines = [CSV_HEADER]
+        for alignment in self.alignments:
+            csv_lines.append(
+                f'"{alignment["source_word"]}","{alignment["target_word"]}",'
+                f'{alignment["source_index"]},{alignment["target_index"]},'
+                f'{alignment["similarity"]:.4f}'
+            )
+        return csv_lines
+
+    def to_csv(self):
+        """CSV 文本"""
+        return '\n'.join(self.to_csv_lines())
+
+    def to_dict(self):
+        """
+        返回:
+            dict: {'csv', 'alignments'}（/api/word-align 的 data）
+        """
+        return {
+            'csv': self.to_csv(),
+            'alignments': self.alignments
+        }
+
+
 class WordAligner:
     """词对齐器"""
 
@@ -36,11 +160,69 @@ class WordAligner:
         'ko': 'ko_core_news_sm',     # 韩语
     }
 
-    def __init__(self):
-        """初始化词对齐器"""
-        self.encoder = LaBSEOnnxEncoder()
+    MODES = ('contextual', 'static')
+
+    # contextual 模式每次前向计算的句子数
+    ENCODE_BATCH_SIZE = 64
+
+    # 中文分词方式：HanLP 神经网络分词 / jieba 词典分词 / 规则分词（无需模型）
+    ZH_TOKENIZERS = ('hanlp', 'jieba', 'rule')
+
+    # HanLP 每次前向计算的句子数
+    HANLP_BATCH_SIZE = 32
+
+    def __init__(self, encoder=None, cache_size=256, mode='contextual', matching='itermax',
+                 word_vector_cache=None, zh_tokenizer='hanlp', zh_user_dict=None):
+        """
+        初始化词对齐器
+
+        参数:
+            encoder: 共享的句子编码器（如 EncoderDispatcher），为 None 时新建 LaBSEOnnxEncoder
+            cache_size: 按句对缓存的词对齐结果数（0 表示不缓存）
+            mode: 词向量模式，'contextual'（每句一次前向计算）或 'static'（逐词编码）
+            matching: 相似度矩阵上的匹配算法（见 word_matching.MATCHERS）
+            word_vector_cache: 逐词编码的词向量缓存（WordVectorCache），为 None 时使用默认大小的内存缓存
+            zh_tokenizer: 中文分词方式（见 ZH_TOKENIZERS），不可用时退回规则分词
+            zh_user_dict: jieba 的用户词典路径（领域术语，每行一个词），为 None 时只用内置词典
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"未知的词对齐模式: {mode}")
+        if matching not in MATCHERS:
+            raise ValueError(f"未知的词匹配算法: {matching}")
+        if matching == 'optimal' and linear_sum_assignment is None:
+            raise ValueError("optimal 词匹配需要 scipy: pip install scipy")
+        if zh_tokenizer not in self.ZH_TOKENIZERS:
+            raise ValueError(f"未知的中文分词方式: {zh_tokenizer}")
+        self.mode = mode
+        self.zh_tokenizer = zh_tokenizer
+        self.zh_user_dict = zh_user_dict
+        self.matching = matching
+        self.encoder = encoder if encoder is not None else LaBSEOnnxEncoder()
+        self.cache = LRUCache(cache_size)
+        self.word_vectors = word_vector_cache if word_vector_cache is not None else WordVectorCache()
         self.spacy_models = {}  # 缓存已加载的 spaCy 模型
         self.hanlp_tokenizer = None  # HanLP 分词器
+        self.jieba_tokenizer = None  # jieba 分词器
+        self._failed_tokenizers = set()  # 加载失败的中文分词器，之后直接使用规则分词，不再重复尝试
+
+        # 多线程共享时：加载模型用全局锁，调用 spaCy/HanLP 按模型加锁
+        self._load_lock = threading.Lock()
+        self._model_locks = {}
+
+    def fingerprint(self):
+        """
+        影响词对齐结果的配置（检查结果缓存键和 ETag 的一部分，不加载模型）
+
+        返回:
+            str: 词向量模式、匹配算法、中文分词方式及用户词典、分词所用库和 spaCy 模型包的版本
+        """
+        tokenizer = self.zh_tokenizer
+        if tokenizer != 'rule':
+            tokenizer = f"{tokenizer}:{package_version(tokenizer)}"
+        user_dict = file_fingerprint(self.zh_user_dict) if self.zh_user_dict else 'none'
+        models = ','.join(f"{name}={package_version(name)}" for name in sorted(set(self.SPACY_MODELS.values())))
+        return (f"{self.mode}:{self.matching}|zh:{tokenizer}:{user_dict}"
+                f"|spacy:{package_version('spacy')}|{models}")
 
     def _load_spacy_model(self, language):
         """
@@ -65,8 +247,12 @@ class WordAligner:
         try:
             import spacy
             try:
-                nlp = spacy.load(model_name)
-                self.spacy_models[language] = nlp
+                with self._load_lock:
+                    if language in self.spacy_models:
+                        return self.spacy_models[language]
+                    nlp = spacy.load(model_name)
+                    self._model_locks[language] = threading.Lock()
+                    self.spacy_models[language] = nlp
                 print(f"✓ 词对齐：spaCy 模型 ({model_name}) 加载成功")
                 return nlp
             except OSError:
@@ -85,17 +271,94 @@ class WordAligner:
         """
         if self.hanlp_tokenizer is not None:
             return self.hanlp_tokenizer
+        if 'hanlp' in self._failed_tokenizers:
+            return None
 
         try:
             import hanlp
-            # 使用 HanLP 的粗粒度分词器
-            self.hanlp_tokenizer = hanlp.load(hanlp.pretrained.tok.COARSE_ELECTRA_SMALL_ZH)
+            with self._load_lock:
+                if self.hanlp_tokenizer is not None:
+                    return self.hanlp_tokenizer
+                # 使用 HanLP 的粗粒度分词器
+                self._model_locks['zh'] = threading.Lock()
+                self.hanlp_tokenizer = hanlp.load(hanlp.pretrained.tok.COARSE_ELECTRA_SMALL_ZH)
             print("✓ 词对齐：HanLP 分词器加载成功")
             return self.hanlp_tokenizer
         except Exception as e:
             print(f"⚠️  词对齐：HanLP 分词器加载失败，使用简单规则分词: {e}")
+            self._failed_tokenizers.add('hanlp')
+            return None
+
+    def _load_jieba_tokenizer(self):
+        """
+        加载 jieba 分词器（中文词典分词，无需神经网络模型）
+
+        返回:
+            jieba.Tokenizer，如果未安装则返回 None
+        """
+        if self.jieba_tokenizer is not None:
+            return self.jieba_tokenizer
+        if 'jieba' in self._failed_tokenizers:
             return None
 
+        try:
+            import jieba
+            with self._load_lock:
+                if self.jieba_tokenizer is not None:
+                    return self.jieba_tokenizer
+                tokenizer = jieba.Tokenizer()
+                tokenizer.initialize()
+                if self.zh_user_dict:
+                    tokenizer.load_userdict(self.zh_user_dict)
+                self._model_locks['zh'] = threading.Lock()
+                self.jieba_tokenizer = tokenizer
+            print("✓ 词对齐：jieba 分词器加载成功")
+            return self.jieba_tokenizer
+        except Exception as e:
+            print(f"⚠️  词对齐：jieba 分词器加载失败，使用简单规则分词: {e}")
+            self._failed_tokenizers.add('jieba')
+            return None
+
+    def _load_zh_tokenizer(self):
+        """
+        按 zh_tokenizer 加载中文分词器
+
+        返回:
+            批量分词函数 tokenize(texts) -> [[词, ...], ...]，规则分词或加载失败时返回 None
+        """
+        if self.zh_tokenizer == 'hanlp':
+            tokenizer = self._load_hanlp_tokenizer()
+            if tokenizer is None:
+                return None
+            # HanLP 接受句子列表，按 batch_size 分批前向计算
+            return lambda texts: tokenizer(texts, batch_size=self.HANLP_BATCH_SIZE)
+        if self.zh_tokenizer == 'jieba':
+            tokenizer = self._load_jieba_tokenizer()
+            if tokenizer is None:
+                return None
+            return lambda texts: [[w for w in tokenizer.lcut(text) if w.strip()] for text in texts]
+        return None
+
+    def preload(self, languages):
+        """
+        预加载指定语言的分词模型（服务启动预热时调用）
+
+        参数:
+            languages: 语言代码列表
+
+        返回:
+            dict: {语言代码: 是否有可用的模型分词器}
+        """
+        loaded = {}
+        for language in languages:
+            if language == 'zh':
+                loaded[language] = self._load_zh_tokenizer() is not None
+            elif language in self.SPACY_MODELS:
+                loaded[language] = self._load_spacy_model(language) is not None
+            else:
+                loaded[language] = False
+        return loaded
+
     def tokenize(self, text, language='auto'):
         """
         分词
@@ -107,40 +370,104 @@ class WordAligner:
         返回:
             words: 词列表
         """
-        # 检测是否包含中文字符
-        has_chinese = bool(re.search(r'[\u4e00-\u9fff]', text))
+        return self.tokenize_batch([text], language)[0]
 
-        if has_chinese or language == 'zh':
-            # 中文：尝试使用 HanLP 分词
-            tokenizer = self._load_hanlp_tokenizer()
+    def tokenize_batch(self, texts, language='auto'):
+        """
+        批量分词（中文分词器和 spaCy 各调用一次，而不是每个句子一次）
+
+        参数:
+            texts: 文本列表
+            language: 语言代码
+
+        返回:
+            list: 每个文本的词列表
+        """
+        results = [None] * len(texts)
+
+        # 检测是否包含中文字符
+        chinese = [i for i, text in enumerate(texts)
+                   if language == 'zh' or re.search(r'[\u4e00-\u9fff]', text)]
+        if chinese:
+            # 中文：按配置使用 HanLP / jieba 批量分词
+            tokenizer = self._load_zh_tokenizer()
             if tokenizer:
                 try:
-                    words = tokenizer(text)
-                    return words
+                    with self._model_locks['zh']:
+                        words_list = tokenizer([texts[i] for i in chinese])
+                    for i, words in zip(chinese, words_list):
+                        results[i] = words
                 except:
                     pass
+            for i in chinese:
+                if results[i] is None:
+                    # 规则分词（或分词器不可用）
+                    results[i] = rule_tokenize_zh(texts[i])
 
-            # 如果 HanLP 不可用，按字符分词
-            words = list(text.strip())
-            # 过滤空格
-            words = [w for w in words if w.strip()]
-            return words
-
-        elif language in self.SPACY_MODELS:
+        rest = [i for i, words in enumerate(results) if words is None]
+        if rest and language in self.SPACY_MODELS:
             # 使用 spaCy 分词
             nlp = self._load_spacy_model(language)
             if nlp:
                 try:
-                    doc = nlp(text)
-                    words = [token.text for token in doc]
-                    return words
+                    with self._model_locks[language]:
+                        docs = list(nlp.pipe([texts[i] for i in rest]))
+                    for i, doc in zip(rest, docs):
+                        results[i] = [token.text for token in doc]
                 except:
                     pass
 
-        # 默认：简单规则分词（按空格和标点）
-        words = re.findall(r'\w+|[^\w\s]', text, re.UNICODE)
-        return words
-    
+        for i, words in enumerate(results):
+            if words is None:
+                # 默认：简单规则分词（按空格和标点）
+                results[i] = re.findall(r'\w+|[^\w\s]', texts[i], re.UNICODE)
+        return results
+
+    def align(self, source_text, target_text, source_lang='auto', target_lang='auto'):
+        """
+        对齐两个句子中的词（同一句对的结果按 LRU 缓存，重复请求不再分词和编码）
+
+        参数:
+            source_text: 源文本
+            target_text: 目标文本
+            source_lang: 源语言
+            target_lang: 目标语言
+
+        返回:
+            WordAlignment
+        """
+        return self.align_batch([(source_text, target_text)], source_lang, target_lang)[0]
+
+    def align_batch(self, pairs, source_lang='auto', target_lang='auto'):
+        """
+        批量对齐多个句对：未缓存的句对一起分词，一起编码（按长度排序后分批前向计算）
+
+        参数:
+            pairs: [(源文本, 目标文本), ...]
+            source_lang: 源语言
+            target_lang: 目标语言
+
+        返回:
+            list: 每个句对的 WordAlignment
+        """
+        results = [None] * len(pairs)
+        pending = {}  # 未命中缓存的句对 -> 在 pairs 中的位置
+        for i, (source_text, target_text) in enumerate(pairs):
+            key = (source_text, target_text, source_lang, target_lang)
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.setdefault((source_text, target_text), []).append(i)
+
+        if pending:
+            todo = list(pending)
+            for (source_text, target_text), result in zip(todo, self._align_batch(todo, source_lang, target_lang)):
+                self.cache.put((source_text, target_text, source_lang, target_lang), result)
+                for i in pending[(source_text, target_text)]:
+                    results[i] = result
+        return results
+
     def align_words(self, source_text, target_text, source_lang='auto', target_lang='auto'):
         """
         对齐两个句子中的词
@@ -160,96 +487,160 @@ class WordAligner:
                 'similarity': 相似度
             }
         """
-        # 分词
-        print(f"\n[词对齐] 开始分词...")
-        print(f"  源文本: {source_text[:100]}...")
-        print(f"  目标文本: {target_text[:100]}...")
+        return self.align(source_text, target_text, source_lang, target_lang).alignments
 
-        source_words = self.tokenize(source_text, source_lang)
-        target_words = self.tokenize(target_text, target_lang)
-
-        print(f"  源词数量: {len(source_words)}")
-        print(f"  目标词数量: {len(target_words)}")
-        print(f"  前10个源词: {source_words[:10]}")
-        print(f"  前10个目标词: {target_words[:10]}")
-        
-        if not source_words or not target_words:
-            return []
-        
-        # 编码所有词
-        source_embeddings = self.encoder.encode_sentences(source_words)
-        target_embeddings = self.encoder.encode_sentences(target_words)
-        
-        # 计算相似度矩阵
-        similarity_matrix = np.dot(source_embeddings, target_embeddings.T)
-        
-        # 使用贪心算法进行对齐
-        alignments = []
-        used_target_indices = set()
-        
-        for src_idx, src_word in enumerate(source_words):
-            # 找到与当前源词最相似的目标词
-            similarities = similarity_matrix[src_idx]
-            
-            # 排除已使用的目标词
-            available_similarities = similarities.copy()
-            for used_idx in used_target_indices:
-                available_similarities[used_idx] = -1
-            
-            # 找到最大相似度
-            tgt_idx = np.argmax(available_similarities)
-            max_similarity = available_similarities[tgt_idx]
-            
-            if max_similarity > 0:  # 只保留正相似度的对齐
-                alignments.append({
-                    'source_word': src_word,
-                    'target_word': target_words[tgt_idx],
-                    'source_index': int(src_idx),  # 转换为 Python int
-                    'target_index': int(tgt_idx),  # 转换为 Python int
-                    'similarity': float(max_similarity)
-                })
-                used_target_indices.add(tgt_idx)
-
-        # 添加未对齐的目标词
-        for tgt_idx, tgt_word in enumerate(target_words):
-            if tgt_idx not in used_target_indices:
-                alignments.append({
-                    'source_word': '-',
-                    'target_word': tgt_word,
-                    'source_index': -1,
-                    'target_index': int(tgt_idx),  # 转换为 Python int
-                    'similarity': 0.0
-                })
-        
-        # 按源索引和目标索引排序
-        alignments.sort(key=lambda x: (x['source_index'], x['target_index']))
-        
-        return alignments
-    
     def align_words_to_csv(self, source_text, target_text, source_lang='auto', target_lang='auto'):
         """
         将词对齐结果转换为 CSV 格式
-        
+
         参数:
             source_text: 源文本
             target_text: 目标文本
             source_lang: 源语言
             target_lang: 目标语言
-        
+
         返回:
             csv_lines: CSV 行列表
         """
-        alignments = self.align_words(source_text, target_text, source_lang, target_lang)
-        
-        csv_lines = []
-        csv_lines.append("源词 (Source Word),目标词 (Target Word),源索引,目标索引,相似度 (Similarity)")
-        
-        for alignment in alignments:
-            csv_lines.append(
-                f'"{alignment["source_word"]}","{alignment["target_word"]}",'
-                f'{alignment["source_index"]},{alignment["target_index"]},'
-                f'{alignment["similarity"]:.4f}'
-            )
-        
-        return csv_lines
+        return self.align(source_text, target_text, source_lang, target_lang).to_csv_lines()
+
+    def _align_batch(self, pairs, source_lang, target_lang):
+        """
+        执行词对齐（不经过缓存）
+
+        参数:
+            pairs: [(源文本, 目标文本), ...]
+            source_lang: 源语言
+            target_lang: 目标语言
+
+        返回:
+            list: 每个句对的 WordAlignment
+        """
+        source_texts = [source_text for source_text, _ in pairs]
+        target_texts = [target_text for _, target_text in pairs]
+
+        # 分词（每种语言一次）
+        source_words_list = self.tokenize_batch(source_texts, source_lang)
+        target_words_list = self.tokenize_batch(target_texts, target_lang)
+
+        print(f"\n[词对齐] {len(pairs)} 个句对: 源词 {sum(map(len, source_words_list))} 个，"
+              f"目标词 {sum(map(len, target_words_list))} 个")
+
+        # 两侧都有词的句对才需要编码
+        active = [i for i in range(len(pairs)) if source_words_list[i] and target_words_list[i]]
+        if self.mode == 'contextual':
+            source_vectors = self._contextual_word_vectors(
+                [source_texts[i] for i in active], [source_words_list[i] for i in active], source_lang)
+            target_vectors = self._contextual_word_vectors(
+                [target_texts[i] for i in active], [target_words_list[i] for i in active], target_lang)
+        else:
+            # 逐词编码（无上下文，所有句对的词合并后经过词向量缓存，只编码未见过的词）
+            source_vectors = self._encode_word_lists([source_words_list[i] for i in active], source_lang)
+            target_vectors = self._encode_word_lists([target_words_list[i] for i in active], target_lang)
+
+        results = [WordAlignment(source_words_list[i], target_words_list[i], []) for i in range(len(pairs))]
+        for n, i in enumerate(active):
+            similarity_matrix = source_vectors[n] @ target_vectors[n].T
+            results[i] = self._build_alignment(similarity_matrix, source_words_list[i], target_words_list[i])
+        return results
+
+    def _encode_words(self, words, language):
+        """
+        逐词编码（经过词向量缓存，只有未见过的词送入编码器）
+
+        参数:
+            words: 词列表
+            language: 语言代码
+
+        返回:
+            (n_words, hidden_size) 归一化词向量
+        """
+        return self.word_vectors.encode(self.encoder, words, language)
+
+    def _encode_word_lists(self, words_list, language):
+        """
+        逐词编码多个句子的词（合并为一次编码）
+
+        返回:
+            list: 每个句子的 (n_words, hidden_size) 归一化词向量
+        """
+        if not words_list:
+            return []
+        vectors = self._encode_words([word for words in words_list for word in words], language)
+        bounds = np.cumsum([0] + [len(words) for words in words_list])
+        return [vectors[bounds[n]:bounds[n + 1]] for n in range(len(words_list))]
+
+    def _contextual_word_vectors(self, texts, words_list, language):
+        """
+        每个句子一次前向计算，得到上下文词向量
+
+        句子按长度排序后每 ENCODE_BATCH_SIZE 句一次前向计算，减少填充。
+
+        参数:
+            texts: 句子列表
+            words_list: 每个句子的分词结果
+            language: 语言代码
+
+        返回:
+            list: 每个句子的 (n_words, hidden_size) 归一化词向量
+        """
+        encoded = [None] * len(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), self.ENCODE_BATCH_SIZE):
+            chunk = order[start:start + self.ENCODE_BATCH_SIZE]
+            for i, item in zip(chunk, self.encoder.encode_tokens([texts[i] for i in chunk])):
+                encoded[i] = item
+
+        results = []
+        for text, words, (hidden_states, offsets) in zip(texts, words_list, encoded):
+            vectors, covered = pool_subword_vectors(hidden_states, offsets, word_spans(text, words))
+            if not covered.all():
+                # 在原文中找不到或被截断的词：退回逐词编码
+                missing = np.flatnonzero(~covered)
+                vectors[missing] = self._encode_words([words[i] for i in missing], language)
+            results.append(vectors)
+        return results
+
+    def _build_alignment(self, similarity_matrix, source_words, target_words):
+        """
+        在相似度矩阵上做匹配，生成对齐结果
+
+        参数:
+            similarity_matrix: (源词数, 目标词数) 相似度矩阵
+            source_words: 源词列表
+            target_words: 目标词列表
+
+        返回:
+            WordAlignment: 对齐的词对，以及未对齐的源词（目标为 '-'）和目标词（源为 '-'）
+        """
+        aligned = MATCHERS[self.matching](similarity_matrix)
+
+        alignments = []
+        for src_idx, tgt_idx in zip(*np.nonzero(aligned)):
+            alignments.append({
+                'source_word': source_words[src_idx],
+                'target_word': target_words[tgt_idx],
+                'source_index': int(src_idx),
+                'target_index': int(tgt_idx),
+                'similarity': float(similarity_matrix[src_idx, tgt_idx])
+            })
+        for src_idx in np.flatnonzero(~aligned.any(axis=1)):
+            alignments.append({
+                'source_word': source_words[src_idx],
+                'target_word': '-',
+                'source_index': int(src_idx),
+                'target_index': -1,
+                'similarity': 0.0
+            })
+        for tgt_idx in np.flatnonzero(~aligned.any(axis=0)):
+            alignments.append({
+                'source_word': '-',
+                'target_word': target_words[tgt_idx],
+                'source_index': -1,
+                'target_index': int(tgt_idx),
+                'similarity': 0.0
+            })
+
+        alignments.sort(key=lambda x: (x['source_index'], x['target_index']))
+        return WordAlignment(source_words, target_words, alignments)
 
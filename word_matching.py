@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+词相似度矩阵上的匹配算法
+
+输入为 (源词数, 目标词数) 的相似度矩阵，输出同形状的布尔矩阵（True 表示对齐）。
+所有算法都在整个矩阵上用 numpy 掩码计算，结果与词的顺序无关：
+- argmax / intersection: 双向 argmax 的交集，即互为最相似（SimAlign 的 ArgMax）
+- union: 双向 argmax 的并集（召回更高，允许一对多）
+- itermax: 在 argmax 基础上迭代，为尚未对齐的词补充互为最相似的对齐（SimAlign 的 IterMax）
+- optimal: 一对一最优分配，使对齐词对的相似度之和最大（scipy.optimize.linear_sum_assignment）
+- greedy: 旧版逐词贪心匹配（仅用于基准对比，结果依赖词序）
+"""
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+
+def _directional_argmax(similarity):
+    """
+    双向 argmax
+
+    返回:
+        (forward, backward): 两个 (m, n) 布尔矩阵，
+        forward[i, j] 表示 j 是源词 i 的最相似目标词，backward[i, j] 表示 i 是目标词 j 的最相似源词
+    """
+    m, n = similarity.shape
+    forward = np.zeros((m, n), dtype=bool)
+    backward = np.zeros((m, n), dtype=bool)
+    if m == 0 or n == 0:
+        return forward, backward
+    forward[np.arange(m), similarity.argmax(axis=1)] = True
+    backward[similarity.argmax(axis=0), np.arange(n)] = True
+    return forward, backward
+
+
+def argmax_alignment(similarity):
+    """
+    双向 argmax 的交集：源词 i 的最相似目标词是 j，且目标词 j 的最相似源词是 i
+
+    参数:
+        similarity: (m, n) 相似度矩阵
+
+    返回:
+        (m, n) 布尔矩阵
+    """
+    forward, backward = _directional_argmax(similarity)
+    return forward & backward
+
+
+def union_alignment(similarity):
+    """
+    双向 argmax 的并集：每个源词和每个目标词都至少对齐到一个词
+
+    参数:
+        similarity: (m, n) 相似度矩阵
+
+    返回:
+        (m, n) 布尔矩阵
+    """
+    forward, backward = _directional_argmax(similarity)
+    return forward | backward
+
+
+def itermax_alignment(similarity, max_count=2, alpha_ratio=0.9):
+    """
+    迭代 argmax：每轮只在至少一侧尚未对齐的词之间寻找互为最相似的词对
+
+    参数:
+        similarity: (m, n) 相似度矩阵
+        max_count: 最多迭代轮数（含第一轮 argmax）
+        alpha_ratio: 一侧已对齐的位置的相似度折扣（两侧都已对齐的位置不再参与）
+
+    返回:
+        (m, n) 布尔矩阵
+    """
+    aligned = argmax_alignment(similarity)
+    m, n = similarity.shape
+    if min(m, n) <= 2:
+        return aligned
+
+    for _ in range(max_count - 1):
+        src_free = ~aligned.any(axis=1)
+        tgt_free = ~aligned.any(axis=0)
+        if not src_free.any() or not tgt_free.any():
+            break
+        # 两侧都未对齐: 1.0；只有一侧未对齐: alpha_ratio；两侧都已对齐: 不参与
+        weight = np.clip(alpha_ratio * src_free[:, None] + alpha_ratio * tgt_free[None, :], 0.0, 1.0)
+        candidates = src_free[:, None] | tgt_free[None, :]
+        masked = np.where(candidates, similarity * weight, -np.inf)
+        new = argmax_alignment(masked) & candidates
+        if not (new & ~aligned).any():
+            break
+        aligned |= new
+    return aligned
+
+
+def optimal_alignment(similarity, min_similarity=0.0):
+    """
+    一对一最优分配（匈牙利算法），只保留相似度高于 min_similarity 的词对
+
+    参数:
+        similarity: (m, n) 相似度矩阵
+        min_similarity: 保留的最低相似度
+
+    返回:
+        (m, n) 布尔矩阵
+    """
+    if linear_sum_assignment is None:
+        raise RuntimeError("optimal 匹配需要 scipy: pip install scipy")
+    aligned = np.zeros(similarity.shape, dtype=bool)
+    if similarity.size == 0:
+        return aligned
+    rows, cols = linear_sum_assignment(similarity, maximize=True)
+    keep = similarity[rows, cols] > min_similarity
+    aligned[rows[keep], cols[keep]] = True
+    return aligned
+
+
+def greedy_alignment(similarity):
+    """
+    旧版逐词贪心匹配：按源词顺序选择尚未使用的最相似目标词（相似度需为正）
+
+    仅用于基准对比（见 benchmarks/word_matching_benchmark.py），结果依赖词序。
+
+    参数:
+        similarity: (m, n) 相似度矩阵
+
+    返回:
+        (m, n) 布尔矩阵
+    """
+    aligned = np.zeros(similarity.shape, dtype=bool)
+    used = set()
+    for src_idx in range(similarity.shape[0]):
+        available = similarity[src_idx].copy()
+        for used_idx in used:
+            available[used_idx] = -1
+        tgt_idx = int(np.argmax(available))
+        if available[tgt_idx] > 0:
+            aligned[src_idx, tgt_idx] = True
+            used.add(tgt_idx)
+    return aligned
+
+
+# 名称到匹配函数的映射（WordAligner 的 matching 参数）
+MATCHERS = {
+    'argmax': argmax_alignment,
+    'intersection': argmax_alignment,
+    'union': union_alignment,
+    'itermax': itermax_alignment,
+    'optimal': optimal_alignment,
+}
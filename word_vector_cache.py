@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+词向量缓存
+
+虚词和领域术语几乎出现在每个句子里。WordVectorCache 以 (语言, 词) 为键缓存单独编码的
+词向量（LaBSE 句向量，与上下文无关），按条目数 LRU 淘汰；encode() 只把未见过的词
+（去重后）合并成一批送入编码器。
+
+可选持久化：指定 path 时启动时从 .npz 文件加载，save() 以原子替换的方式写回，
+服务重启后无需重新编码常用词。
+"""
+
+import os
+
+import numpy as np
+
+from lru_cache import LRUCache
+
+# 向量来源（模型或归一化方式）变化时递增，使旧的持久化文件失效
+CACHE_VERSION = 1
+
+
+class WordVectorCache(LRUCache):
+    """
+    线程安全的 (语言, 词) → 词向量 LRU 缓存
+    """
+
+    def __init__(self, max_entries=50000, path=None):
+        """
+        参数:
+            max_entries: 最多缓存的词数（0 表示禁用缓存）
+            path: 持久化文件路径（.npz），为 None 时不持久化
+        """
+        super().__init__(max_entries)  # (language, word) -> (dim,) float32
+        self.path = path
+        self.stats['encoded_batches'] = 0
+
+        if path and max_entries > 0 and os.path.exists(path):
+            self.load(path)
+
+    def encode(self, encoder, words, language='auto'):
+        """
+        获取词向量，只编码缓存中没有的词
+
+        参数:
+            encoder: 提供 encode_sentences() 的编码器
+            words: 词列表（可重复）
+            language: 语言代码
+
+        返回:
+            vectors: (len(words), hidden_size) 归一化的词向量
+        """
+        if not words:
+            return np.zeros((0, 0), dtype=np.float32)
+        if not self.enabled:
+            return encoder.encode_sentences(list(words))
+
+        cached = self.get_many([(language, word) for word in dict.fromkeys(words)], record=False)
+        found = {word: vector for (_, word), vector in cached.items()}
+        missing = [word for word in dict.fromkeys(words) if word not in found]
+        with self._lock:
+            # 每个词出现要么由缓存（或同批中的重复词）提供，要么是一次编码
+            self.stats['hits'] += len(words) - len(missing)
+            self.stats['misses'] += len(missing)
+
+        if missing:
+            # 未见过的词去重后一次编码
+            embeddings = np.asarray(encoder.encode_sentences(missing), dtype=np.float32)
+            with self._lock:
+                self.stats['encoded_batches'] += 1
+            found.update(zip(missing, embeddings))
+            self.put_many({(language, word): found[word] for word in missing})
+
+        return np.stack([found[word] for word in words])
+
+    def load(self, path):
+        """
+        从 .npz 文件加载（版本不符或文件损坏时忽略）
+
+        返回:
+            int: 加载的词数
+        """
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data['version']) != CACHE_VERSION:
+                    print(f"⚠️  词向量缓存版本不符，忽略: {path}")
+                    return 0
+                languages, words, vectors = data['languages'], data['words'], data['vectors']
+        except Exception as e:
+            print(f"⚠️  词向量缓存加载失败，忽略: {e}")
+            return 0
+
+        self.put_many({(language, word): vector
+                       for language, word, vector in zip(languages.tolist(), words.tolist(), vectors)})
+        count = len(self)
+        print(f"✓ 词向量缓存已加载: {count} 个词 ({path})")
+        return count
+
+    def save(self, path=None):
+        """
+        写入 .npz 文件（先写临时文件再原子替换，多个进程同时保存时以最后一个为准）
+
+        参数:
+            path: 文件路径，默认使用构造时的 path
+
+        返回:
+            int: 保存的词数
+        """
+        path = path or self.path
+        if not path or not self.enabled:
+            return 0
+        entries = self.items()
+        if not entries:
+            return 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f,
+                     version=np.array(CACHE_VERSION),
+                     languages=np.array([language for (language, _), _ in entries]),
+                     words=np.array([word for (_, word), _ in entries]),
+                     vectors=np.stack([vector for _, vector in entries]).astype(np.float32))
+        os.replace(tmp_path, path)
+        return len(entries)
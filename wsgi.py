@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WSGI 入口（多进程部署）
+
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+预加载模式 (TQA_PRELOAD=1，默认) 下本模块在 gunicorn 主进程中导入：同步完成预热
+（加载全部模型并完成 numba JIT）之后才 fork 出 worker，只读权重在 worker 间写时复制共享。
+非预加载模式下每个 worker 各自导入本模块并独立加载模型。
+"""
+
+import app as server
+
+server.start_warmup(background=False)
+
+application = server.app